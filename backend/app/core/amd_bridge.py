@@ -4,6 +4,9 @@ from huggingface_hub import hf_hub_download
 from transformers import AutoTokenizer
 import os
 
+MODEL_NAME = "optimum/all-MiniLM-L6-v2"
+MAX_TOKENS = 256   # all-MiniLM-L6-v2 was trained on 256-token inputs; longer text is truncated
+
 class AMDBridge:
     def __init__(self):
         print("\n--- 🧠 SYNAPSE HARDWARE CHECK ---")
@@ -25,7 +28,7 @@ class AMDBridge:
             self.hardware_mode = "CPU_MOCK"
 
         # 2. Load the Model (ONNX)
-        self.model_name = "optimum/all-MiniLM-L6-v2"
+        self.model_name = MODEL_NAME
         self.model_path = self._get_model()
         self.session = ort.InferenceSession(self.model_path, providers=self.execution_providers)
         
@@ -40,8 +43,14 @@ class AMDBridge:
         """
         Real vectorization logic with robust input handling.
         """
-        # A. Tokenize the text
-        inputs = self.tokenizer(text, return_tensors="np", padding=True, truncation=True)
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts):
+        """
+        Vectorizes many texts in one padded inference call (one NPU dispatch per batch).
+        """
+        # A. Tokenize the texts (padded to the longest one in the batch)
+        inputs = self.tokenizer(list(texts), return_tensors="np", padding=True, truncation=True, max_length=MAX_TOKENS)
         
         # B. PREPARE INPUTS (The Fix: Handle missing token_type_ids)
         # Some tokenizers don't return token_type_ids for single sentences, 
@@ -65,11 +74,11 @@ class AMDBridge:
         # C. Run Inference
         outputs = self.session.run(None, ort_inputs)
         
-        # D. Mean Pooling
+        # D. Mean Pooling (padding tokens are masked out, so batching doesn't change vectors)
         last_hidden_state = outputs[0]
-        embedding = self._mean_pooling(last_hidden_state, attention_mask)
+        embeddings = self._mean_pooling(last_hidden_state, attention_mask)
         
-        return embedding[0].tolist()
+        return embeddings.tolist()
 
     def _mean_pooling(self, model_output, attention_mask):
         token_embeddings = model_output
@@ -0,0 +1,133 @@
+"""Reuses generated answers for paraphrased questions whose retrieved context hasn't changed."""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from app.core.coalesce import fingerprint
+
+
+def context_fingerprint(model: str, retrieved_docs) -> str:
+    """Identifies the retrieved chunks an answer is generated from (not the packed prompt)."""
+    return fingerprint(model, *retrieved_docs)
+
+
+class AnswerCache:
+    """Answers grouped by (tenant, context fingerprint), searched by question embedding."""
+
+    def __init__(self, threshold: float = None, max_entries: int = None, ttl_sec: float = None):
+        self.threshold = threshold if threshold is not None else float(os.getenv("SYNAPSE_ANSWER_CACHE_THRESHOLD", "0.92"))
+        self.max_entries = max_entries or int(os.getenv("SYNAPSE_ANSWER_CACHE_SIZE", "2048"))
+        self.ttl_sec = ttl_sec or float(os.getenv("SYNAPSE_ANSWER_CACHE_TTL_SEC", "86400"))
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()   # id -> entry, oldest first
+        self._groups: Dict[Tuple[str, str], list] = {}                      # (tenant, fingerprint) -> ids
+        self._by_tenant: Dict[str, set] = {}                                # tenant -> fingerprints in use
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def lookup(self, tenant_id: str, context_fingerprint: str, query_vector) -> Optional[Dict[str, Any]]:
+        """
+        The cached answer for the closest matching question, or None. On a miss,
+        entries for similar questions cached under a different context are
+        dropped: retrieval no longer returns the chunks they were built from.
+        """
+        if not self.enabled:
+            return None
+        query = self._unit(query_vector)
+        now = time.time()
+        with self._lock:
+            for i in list(self._groups.get((tenant_id, context_fingerprint), ())):
+                if now - self._entries[i]["created_at"] > self.ttl_sec:
+                    self._remove(i)
+            ids = self._groups.get((tenant_id, context_fingerprint), [])
+            if ids:
+                scores = np.stack([self._entries[i]["vector"] for i in ids]) @ query
+                k = int(np.argmax(scores))
+                if scores[k] >= self.threshold:
+                    entry_id = ids[k]
+                    entry = self._entries[entry_id]
+                    self._entries.move_to_end(entry_id)
+                    entry["hits"] += 1
+                    self.hits += 1
+                    return {"answer": entry["answer"], "question": entry["question"],
+                            "similarity": round(float(scores[k]), 4)}
+            self.misses += 1
+            self._invalidate_similar(tenant_id, context_fingerprint, query)
+            return None
+
+    def put(self, tenant_id: str, context_fingerprint: str, query_vector, question: str, answer: str):
+        if not self.enabled or not answer:
+            return
+        vector = self._unit(query_vector)
+        with self._lock:
+            group = self._groups.setdefault((tenant_id, context_fingerprint), [])
+            # Coalesced requests finish together; keep one entry per question
+            for i in group:
+                if float(self._entries[i]["vector"] @ vector) >= 0.999:
+                    self._entries[i].update(answer=answer, created_at=time.time())
+                    self._entries.move_to_end(i)
+                    return
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {"tenant_id": tenant_id, "fingerprint": context_fingerprint, "vector": vector,
+                                       "question": question, "answer": answer, "created_at": time.time(), "hits": 0}
+            group.append(entry_id)
+            self._by_tenant.setdefault(tenant_id, set()).add(context_fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _invalidate_similar(self, tenant_id: str, context_fingerprint: str, query: np.ndarray):
+        """Drops this tenant's entries for questions like `query` cached under another context. Caller holds the lock."""
+        for other in list(self._by_tenant.get(tenant_id, ())):
+            if other == context_fingerprint:
+                continue
+            for i in list(self._groups.get((tenant_id, other), ())):
+                if float(self._entries[i]["vector"] @ query) >= self.threshold:
+                    self._remove(i)
+                    self.invalidated += 1
+
+    def _remove(self, entry_id: int):
+        """Caller holds the lock."""
+        entry = self._entries.pop(entry_id)
+        key = (entry["tenant_id"], entry["fingerprint"])
+        group = self._groups.get(key, [])
+        if entry_id in group:
+            group.remove(entry_id)
+        if not group:
+            self._groups.pop(key, None)
+            fingerprints = self._by_tenant.get(entry["tenant_id"])
+            if fingerprints is not None:
+                fingerprints.discard(entry["fingerprint"])
+                if not fingerprints:
+                    del self._by_tenant[entry["tenant_id"]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "invalidated": self.invalidated,
+            }
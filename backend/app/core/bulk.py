@@ -0,0 +1,305 @@
+"""Bulk ingestion of archives and server-side directories through the upload jobs."""
+
+import os
+import sys
+import time
+import uuid
+import tarfile
+import zipfile
+import argparse
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+from app.core.ingester import FileIngester
+from app.core.jobs import TERMINAL_STATES
+from app.core.uploads import UploadSpool, DEFAULT_MAX_UPLOAD_MB, DEFAULT_MEMORY_CEILING_MB
+
+COPY_BUFFER_BYTES = 1024 * 1024
+
+
+def allowed_roots() -> List[str]:
+    """SYNAPSE_INGEST_ROOTS: directories the server may ingest from (os.pathsep-separated)."""
+    raw = os.getenv("SYNAPSE_INGEST_ROOTS", "")
+    return [os.path.realpath(root) for root in raw.split(os.pathsep) if root.strip()]
+
+
+def resolve_directory(path: str, roots: Optional[List[str]] = None) -> str:
+    """Real path of `path`, refusing anything outside the allowed roots."""
+    roots = allowed_roots() if roots is None else roots
+    if not roots:
+        raise PermissionError("Directory ingestion is disabled (set SYNAPSE_INGEST_ROOTS).")
+    real = os.path.realpath(path)
+    if not any(real == root or real.startswith(root.rstrip(os.sep) + os.sep) for root in roots):
+        raise PermissionError(f"'{path}' is outside the allowed ingestion roots.")
+    if not os.path.isdir(real):
+        raise FileNotFoundError(f"'{path}' is not a directory.")
+    return real
+
+
+def iter_directory(root: str):
+    """Yields (name relative to root, absolute path) for every regular file, in a stable order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            if os.path.islink(path) or not os.path.isfile(path):
+                continue
+            yield os.path.relpath(path, root).replace(os.sep, "/"), path
+
+
+def open_archive(fileobj):
+    """
+    Returns an iterator of (entry name, size, open_entry) for a zip or tar
+    archive. Tars are read as a stream (`r|*`): each entry must be consumed
+    before the next one is requested. Raises ValueError for anything else.
+    """
+    fileobj.seek(0)
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        archive = zipfile.ZipFile(fileobj)
+
+        def zip_entries():
+            with archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        yield info.filename, info.file_size, lambda info=info: archive.open(info)
+        return zip_entries()
+
+    fileobj.seek(0)
+    try:
+        archive = tarfile.open(fileobj=fileobj, mode="r|*")
+    except tarfile.TarError:
+        raise ValueError("Expected a .zip or .tar(.gz/.bz2/.xz) archive.")
+
+    def tar_entries():
+        with archive:
+            for member in archive:
+                if member.isfile():
+                    yield member.name, member.size, lambda member=member: archive.extractfile(member)
+    return tar_entries()
+
+
+class BulkJob:
+    """One archive or directory: the per-file ingestion jobs plus entries that were skipped."""
+
+    def __init__(self, kind: str, name: str, tenant_id: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind                # "archive" | "directory"
+        self.name = name
+        self.tenant_id = tenant_id
+        self.files: List[Dict[str, Any]] = []   # {"name", "job"} or {"name", "skipped"}
+        self.walk_done = False
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return "failed"
+        if not self.walk_done:
+            return "walking"
+        if all(f["job"].status in TERMINAL_STATES for f in self.files if f.get("job")):
+            if self.finished_at is None:
+                self.finished_at = time.time()
+            return "done"
+        return "ingesting"
+
+    def to_dict(self, include_files: bool = True) -> Dict[str, Any]:
+        status = self.status
+        jobs = [f["job"] for f in self.files if f.get("job")]
+        finished = [job for job in jobs if job.status in TERMINAL_STATES]
+        chunks_embedded = sum(job.chunks_embedded for job in jobs)
+        elapsed = max((self.finished_at or time.time()) - self.created_at, 1e-6)
+        summary = {
+            "bulk_id": self.id,
+            "kind": self.kind,
+            "name": self.name,
+            "status": status,
+            "error": self.error,
+            "files_seen": len(self.files),
+            "files_queued": len(jobs),
+            "files_done": sum(job.status == "done" for job in finished),
+            "files_failed": sum(job.status == "failed" for job in finished),
+            "files_skipped": len(self.files) - len(jobs),
+            "chunks_total": sum(job.chunks_queued for job in jobs),
+            "chunks_embedded": chunks_embedded,
+            "chunks_reused": sum(job.chunks_reused for job in jobs),
+            "files_per_sec": round(len(finished) / elapsed, 2),
+            "chunks_per_sec": round(chunks_embedded / elapsed, 2),
+            "elapsed_sec": round(elapsed, 2),
+        }
+        if include_files:
+            summary["files"] = [
+                {"name": f["name"], "status": "skipped", "reason": f["skipped"]} if not f.get("job") else {
+                    "name": f["name"],
+                    "job_id": f["job"].id,
+                    "status": f["job"].status,
+                    "pages": f["job"].pages_parsed,
+                    "chunks": f["job"].chunks_queued,
+                    "chunks_embedded": f["job"].chunks_embedded,
+                    "error": f["job"].error,
+                }
+                for f in self.files
+            ]
+        return summary
+
+
+class BulkIngester:
+    """Walks archives/directories on a background thread and feeds every file to the JobManager."""
+
+    def __init__(self, job_manager, max_inflight: int = None, max_entry_bytes: int = None,
+                 memory_ceiling: int = None, spool_dir: Optional[str] = None, max_bulk_jobs: int = 50):
+        self.job_manager = job_manager
+        self.max_inflight = max_inflight or int(os.getenv("SYNAPSE_BULK_MAX_INFLIGHT", "8"))
+        self.max_entry_bytes = max_entry_bytes or int(DEFAULT_MAX_UPLOAD_MB * 1024 * 1024)
+        self.memory_ceiling = memory_ceiling or int(DEFAULT_MEMORY_CEILING_MB * 1024 * 1024)
+        self.spool_dir = spool_dir
+        self.max_bulk_jobs = max_bulk_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit_archive(self, fileobj, name: str, tenant_id: Optional[str]) -> BulkJob:
+        """Starts ingesting an archive file object (closed when walked). Raises ValueError if it isn't one."""
+        try:
+            entries = open_archive(fileobj)
+        except Exception:
+            fileobj.close()
+            raise
+        return self._start(BulkJob("archive", name, tenant_id), entries, fileobj)
+
+    def submit_directory(self, path: str, tenant_id: Optional[str], check_roots: bool = True) -> BulkJob:
+        """Starts ingesting every supported file under `path` (which must be inside SYNAPSE_INGEST_ROOTS)."""
+        root = resolve_directory(path) if check_roots else os.path.realpath(path)
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"'{path}' is not a directory.")
+        entries = ((rel, os.path.getsize(full), full) for rel, full in iter_directory(root))
+        return self._start(BulkJob("directory", root, tenant_id), entries, None)
+
+    def get(self, bulk_id: str, tenant_id: Optional[str] = None) -> Optional[BulkJob]:
+        """The bulk job, or None if it doesn't exist or belongs to another tenant."""
+        bulk = self._jobs.get(bulk_id)
+        if bulk is None or bulk.tenant_id != tenant_id:
+            return None
+        return bulk
+
+    def list(self, tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [job.to_dict(include_files=False) for job in reversed(list(self._jobs.values()))
+                if job.tenant_id == tenant_id]
+
+    def _start(self, bulk: BulkJob, entries, closer) -> BulkJob:
+        with self._lock:
+            self._jobs[bulk.id] = bulk
+            while len(self._jobs) > self.max_bulk_jobs:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest.status not in TERMINAL_STATES:
+                    break
+                del self._jobs[oldest_id]
+        thread = threading.Thread(target=self._walk, args=(bulk, entries, closer), name=f"bulk-{bulk.id[:8]}")
+        thread.daemon = True
+        thread.start()
+        print(f"📦 Bulk ingestion started: {bulk.kind} '{bulk.name}'")
+        return bulk
+
+    def _wait_for_slot(self, inflight: deque):
+        """Backpressure: keep at most max_inflight files spooled but not yet parsed."""
+        while inflight and len(inflight) >= self.max_inflight:
+            if inflight[0].parsed.wait(0.5):
+                inflight.popleft()
+            while inflight and inflight[0].parsed.is_set():
+                inflight.popleft()
+
+    def _spool(self, open_entry, size: int = None):
+        """Copies an archive entry into an UploadSpool, enforcing max_entry_bytes while copying."""
+        spool = UploadSpool(max_size=self.memory_ceiling, dir=self.spool_dir, size_hint=size)
+        copied = 0
+        with open_entry() as entry:
+            while True:
+                block = entry.read(COPY_BUFFER_BYTES)
+                if not block:
+                    break
+                copied += len(block)
+                if copied > self.max_entry_bytes:
+                    spool.close()
+                    return None
+                spool.write(block)
+        spool.seek(0)
+        return spool
+
+    def _walk(self, bulk: BulkJob, entries, closer):
+        inflight = deque()
+        try:
+            for name, size, source in entries:
+                while name.startswith("./"):
+                    name = name[2:]
+                name = name.lstrip("/")
+                if not FileIngester.supports(name):
+                    bulk.files.append({"name": name, "skipped": "unsupported file type"})
+                    continue
+                if size > self.max_entry_bytes:
+                    bulk.files.append({"name": name, "skipped": "file too large"})
+                    continue
+
+                self._wait_for_slot(inflight)
+                if bulk.kind == "directory":
+                    job = self.job_manager.submit(source, name, bulk.tenant_id, owned=False, metadata={"path": source})
+                else:
+                    spool = self._spool(source, size)
+                    if spool is None:
+                        bulk.files.append({"name": name, "skipped": "file too large"})
+                        continue
+                    job = self.job_manager.submit(spool, name, bulk.tenant_id, metadata={"archive": bulk.name})
+                bulk.files.append({"name": name, "job": job})
+                inflight.append(job)
+        except Exception as e:
+            bulk.error = str(e)
+            print(f"❌ Bulk ingestion of '{bulk.name}' failed: {e}")
+        finally:
+            bulk.walk_done = True
+            if closer is not None:
+                closer.close()
+        queued = sum(1 for f in bulk.files if f.get("job"))
+        print(f"📦 Bulk walk finished: {queued} files queued, {len(bulk.files) - queued} skipped from '{bulk.name}'")
+
+
+def main(argv=None):
+    # Allow `python app/core/bulk.py` as well as `python -m app.core.bulk`
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from app.core.tenancy import TenantMemoryPool
+    from app.core.ingest_queue import IngestQueue, IngestWorkers
+    from app.core.jobs import JobManager
+    from app.core.parsers import start_pdf_pool
+    import json
+
+    parser = argparse.ArgumentParser(description="Bulk-ingest an archive or a directory into Synapse memory.")
+    parser.add_argument("path", help="A .zip/.tar(.gz) archive or a directory")
+    parser.add_argument("--tenant", default=None, help="Tenant id (default tenant if omitted)")
+    parser.add_argument("--files", action="store_true", help="Print the per-file summary")
+    args = parser.parse_args(argv)
+
+    pool = TenantMemoryPool()
+    queue = IngestQueue()
+    jobs = JobManager(queue)
+    workers = IngestWorkers(queue, pool, on_stored=jobs.record_stored, on_failed=jobs.record_failed)
+    start_pdf_pool()
+    workers.start()
+    bulk_ingester = BulkIngester(jobs)
+
+    if os.path.isdir(args.path):
+        bulk = bulk_ingester.submit_directory(args.path, args.tenant, check_roots=False)
+    else:
+        bulk = bulk_ingester.submit_archive(open(args.path, "rb"), os.path.basename(args.path), args.tenant)
+
+    while bulk.status not in TERMINAL_STATES:
+        time.sleep(2)
+        progress = bulk.to_dict(include_files=False)
+        print(f"⏳ {progress['status']}: {progress['files_done']}/{progress['files_queued']} files, "
+              f"{progress['chunks_embedded']} chunks ({progress['files_per_sec']} files/s, "
+              f"{progress['chunks_per_sec']} chunks/s)")
+    workers.stop()
+    print(json.dumps(bulk.to_dict(include_files=args.files), indent=2))
+
+
+if __name__ == "__main__":
+    main()
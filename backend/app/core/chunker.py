@@ -0,0 +1,230 @@
+"""Splits document text into token-aware, content-defined (cdc) or fixed-word chunks."""
+
+import os
+import re
+import threading
+from typing import Iterable, Iterator, List
+
+import numpy as np
+
+from app.core.ingester import FileIngester
+
+CHUNKERS = ("tokens", "cdc", "words")
+
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+WORD_BREAK = re.compile(r"\s+")
+
+# Streamed text is tokenized in buffers of about this many characters
+STREAM_BUFFER_CHARS = 64 * 1024
+
+
+def load_tokenizer():
+    """The embedding model's tokenizer on its own (no ONNX session)."""
+    from transformers import AutoTokenizer
+    from app.core.amd_bridge import MODEL_NAME
+    return AutoTokenizer.from_pretrained(MODEL_NAME)
+
+
+class WordChunker:
+    """Fixed-size word chunks (the original behaviour)."""
+
+    def __init__(self, chunk_size: int = 500):
+        self.chunk_size = chunk_size
+
+    def chunk(self, text: str) -> List[str]:
+        return FileIngester.chunk_text(text, self.chunk_size)
+
+    def iter_chunks(self, texts: Iterable[str]) -> Iterator[str]:
+        return FileIngester.iter_chunks(texts, self.chunk_size)
+
+
+class TokenChunker:
+    """
+    Chunks of at most `max_tokens` model tokens (special tokens included),
+    overlapping by about `overlap` tokens.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int = None, overlap: int = None):
+        from app.core.amd_bridge import MAX_TOKENS
+        if not getattr(tokenizer, "is_fast", False):
+            raise ValueError("TokenChunker needs a fast tokenizer (offset mappings).")
+        self.tokenizer = tokenizer
+        max_tokens = max_tokens or int(os.getenv("SYNAPSE_CHUNK_TOKENS", str(MAX_TOKENS)))
+        self.budget = max_tokens - tokenizer.num_special_tokens_to_add()
+        overlap = overlap if overlap is not None else int(os.getenv("SYNAPSE_CHUNK_OVERLAP", "32"))
+        self.overlap = max(0, min(overlap, self.budget // 2))
+        # A nicer boundary is only worth it if the chunk stays at least this full
+        self.min_tokens = self.budget // 2
+        self._lock = threading.Lock()   # the Rust tokenizer isn't safe to share across threads
+
+    def _encode(self, text: str):
+        """Token ids and (start, end) character offsets, in one tokenizer pass."""
+        with self._lock:
+            encoded = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                                     return_attention_mask=False, return_token_type_ids=False, verbose=False)
+        ids = np.asarray(encoded["input_ids"], dtype=np.uint64)
+        return ids, np.asarray(encoded["offset_mapping"], dtype=np.int64).reshape(-1, 2)
+
+    @staticmethod
+    def _boundaries(pattern, text: str, starts: np.ndarray) -> np.ndarray:
+        """Token indices that begin a new paragraph/sentence/word."""
+        positions = np.fromiter((m.end() for m in pattern.finditer(text)), dtype=np.int64)
+        return np.unique(np.searchsorted(starts, positions, side="left"))
+
+    @staticmethod
+    def _last_at_most(boundaries: np.ndarray, limit: int):
+        k = np.searchsorted(boundaries, limit, side="right") - 1
+        return int(boundaries[k]) if k >= 0 else None
+
+    @staticmethod
+    def _first_at_least(boundaries: np.ndarray, limit: int):
+        k = np.searchsorted(boundaries, limit, side="left")
+        return int(boundaries[k]) if k < len(boundaries) else None
+
+    def _split(self, text: str, final: bool):
+        """
+        Chunks `text` in one tokenizer pass. Unless `final`, stops before the
+        last window (it may continue in the next buffer) and returns the
+        character offset where the unconsumed tail starts.
+        """
+        _, offsets = self._encode(text)
+        total = len(offsets)
+        if not total:
+            return len(text), []
+        starts, ends = offsets[:, 0], offsets[:, 1]
+        levels = [self._boundaries(p, text, starts) for p in (PARAGRAPH_BREAK, SENTENCE_BREAK, WORD_BREAK)]
+        paragraphs, sentences, words = levels
+
+        chunks = []
+        i = 0
+        while i < total:
+            if total - i <= self.budget:
+                if not final:
+                    break
+                end = total
+            else:
+                if not final and i + self.budget >= total - 1:
+                    break
+                limit = i + self.budget
+                end = None
+                for boundaries in levels:
+                    candidate = self._last_at_most(boundaries, limit)
+                    if candidate is not None and candidate >= i + self.min_tokens:
+                        end = candidate
+                        break
+                end = end or limit
+
+            chunk = text[starts[i]:ends[end - 1]].strip()
+            if chunk:
+                chunks.append(chunk)
+            if end >= total:
+                return len(text), chunks
+
+            # Start the next chunk `overlap` tokens back, on a sentence or word start if one is close
+            following = end
+            if self.overlap:
+                target = max(end - self.overlap, i + 1)
+                for boundaries in (sentences, words):
+                    candidate = self._first_at_least(boundaries, target)
+                    if candidate is not None and candidate < end:
+                        following = candidate
+                        break
+                else:
+                    following = target
+            i = following
+        return int(starts[i]) if i < total else len(text), chunks
+
+    def chunk(self, text: str) -> List[str]:
+        return self._split(text, final=True)[1]
+
+    def iter_chunks(self, texts: Iterable[str]) -> Iterator[str]:
+        """Streaming chunker: pages are buffered to ~STREAM_BUFFER_CHARS, then chunked."""
+        buffer = ""
+        for text in texts:
+            buffer = f"{buffer}\n{text}" if buffer else text
+            if len(buffer) < STREAM_BUFFER_CHARS:
+                continue
+            consumed, chunks = self._split(buffer, final=False)
+            yield from chunks
+            buffer = buffer[consumed:]
+        if buffer:
+            yield from self._split(buffer, final=True)[1]
+
+
+class ContentDefinedChunker(TokenChunker):
+    """
+    Non-overlapping chunks cut where a rolling hash of the last WINDOW tokens
+    hits a mask, never shorter than `min_tokens` nor longer than the model budget.
+    Cuts only fall on word starts.
+    """
+
+    WINDOW = 16
+    PRIME = np.uint64(0x100000001B3)
+
+    def __init__(self, tokenizer, max_tokens: int = None, min_tokens: int = None):
+        super().__init__(tokenizer, max_tokens=max_tokens, overlap=0)
+        self.min_tokens = min_tokens or max(self.budget // 4, self.WINDOW)
+        # Expected spacing of hash hits past the minimum is 2**bits tokens
+        bits = max(int(np.log2(max(self.budget - self.min_tokens, 2) / 2)), 1)
+        self.mask = np.uint64((1 << bits) - 1)
+        # Fixed per-token-id random values (seeded, so cut points are stable across restarts)
+        self.gear = np.random.default_rng(0x5EED).integers(0, 2 ** 63, size=65536, dtype=np.uint64) | np.uint64(1)
+
+    def _cut_points(self, ids: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """Token indices where the windowed hash selects a boundary (vectorized over the buffer)."""
+        values = self.gear[(ids % np.uint64(len(self.gear))).astype(np.int64)]
+        rolling = np.zeros(len(ids), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for lag in range(self.WINDOW):
+                rolling[lag:] = rolling[lag:] * self.PRIME + values[:len(ids) - lag]
+        hits = ((rolling >> np.uint64(32)) & self.mask) == 0
+        # hit at token i means "cut after i"; keep only cuts that land on a word start
+        word_start = np.zeros(len(ids), dtype=bool)
+        word_start[1:] = offsets[1:, 0] > offsets[:-1, 1]
+        cuts = np.flatnonzero(hits[:-1] & word_start[1:]) + 1
+        return cuts
+
+    def _split(self, text: str, final: bool):
+        ids, offsets = self._encode(text)
+        total = len(offsets)
+        if not total:
+            return len(text), []
+        starts, ends = offsets[:, 0], offsets[:, 1]
+        cuts = self._cut_points(ids, offsets)
+        words = self._boundaries(WORD_BREAK, text, starts)
+
+        chunks = []
+        i = 0
+        while i < total:
+            if not final and total - i <= self.budget + self.WINDOW:
+                break   # the cut may depend on text in the next buffer
+            if total - i <= self.budget:
+                end = total
+            else:
+                candidate = self._first_at_least(cuts, i + self.min_tokens)
+                if candidate is not None and candidate <= i + self.budget:
+                    end = candidate
+                else:
+                    # No hash hit in range: cut at the last word start that fits
+                    candidate = self._last_at_most(words, i + self.budget)
+                    end = candidate if candidate is not None and candidate > i else min(i + self.budget, total)
+            chunk = text[starts[i]:ends[end - 1]].strip()
+            if chunk:
+                chunks.append(chunk)
+            i = end
+        return int(starts[i]) if i < total else len(text), chunks
+
+
+def make_chunker(mode: str = None):
+    """Builds the chunker named by `mode` or SYNAPSE_CHUNKER (default: tokens)."""
+    mode = (mode or os.getenv("SYNAPSE_CHUNKER") or "tokens").lower()
+    if mode == "words":
+        return WordChunker()
+    if mode in ("tokens", "cdc"):
+        try:
+            return (ContentDefinedChunker if mode == "cdc" else TokenChunker)(load_tokenizer())
+        except Exception as e:
+            print(f"⚠️ Token chunker unavailable ({e}); falling back to word chunks.")
+            return WordChunker()
+    raise ValueError(f"Unknown chunker '{mode}' (expected one of {', '.join(CHUNKERS)})")
@@ -0,0 +1,142 @@
+"""Shares one retrieval and one generation between identical in-flight /ask requests."""
+
+import re
+import asyncio
+import hashlib
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional
+
+
+def normalize(question: str) -> str:
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+
+def fingerprint(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class Flight:
+    """
+    One running generation that any number of subscribers can follow. Its
+    creator and every joiner count as subscribers from the moment they hold
+    the flight, and each must iterate subscribe() (or result()) once.
+    """
+
+    def __init__(self, key: str, tokens: AsyncIterator[str], on_finish: Callable[[], None] = None):
+        self.key = key
+        self.tokens = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 1             # the creator, until its subscribe() ends
+        self._on_finish = on_finish
+        self._wake = asyncio.Event()
+        self.task = asyncio.ensure_future(self._run(tokens))
+        # A done callback, not a finally in _run: it also fires for a task cancelled before it ever ran
+        self.task.add_done_callback(self._finish)
+
+    def _notify(self):
+        wake, self._wake = self._wake, asyncio.Event()
+        wake.set()
+
+    async def _run(self, tokens: AsyncIterator[str]):
+        try:
+            async for token in tokens:
+                self.tokens.append(token)
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = ConnectionAbortedError("Generation cancelled.")
+        except Exception as e:
+            self.error = e
+
+    def _finish(self, task: asyncio.Task):
+        if task.cancelled() and self.error is None:
+            self.error = ConnectionAbortedError("Generation cancelled.")
+        try:
+            if self._on_finish:
+                self._on_finish()
+        finally:
+            self.done = True
+            self._notify()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Tokens from the start of the generation; raises what the generation raised."""
+        position = 0
+        try:
+            while True:
+                wake = self._wake
+                while position < len(self.tokens):
+                    position += 1
+                    yield self.tokens[position - 1]
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await wake.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                # Nobody is listening any more: stop the model
+                self.task.cancel()
+
+    async def result(self) -> str:
+        return "".join([token async for token in self.subscribe()])
+
+
+class Coalescer:
+    """In-flight retrievals and generations by key, on the server's event loop."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._flights: Dict[str, Flight] = {}
+        self.generations = 0
+        self.generations_saved = 0
+        self.retrievals = 0
+        self.retrievals_saved = 0
+
+    async def call(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs `fn` once for all concurrent callers with this key (the leader leaving doesn't cancel it)."""
+        task = self._calls.get(key)
+        if task is not None:
+            self.retrievals_saved += 1
+        else:
+            self.retrievals += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def join(self, key: str) -> Optional[Flight]:
+        """The running generation for `key`, if there is one that can still be followed."""
+        flight = self._flights.get(key)
+        if flight is None or (flight.done and flight.error is not None):
+            return None
+        # Counted now, not when it starts iterating: the leader leaving before
+        # this joiner's stream begins must not cancel the generation
+        flight.subscribers += 1
+        self.generations_saved += 1
+        return flight
+
+    def start(self, key: str, tokens: AsyncIterator[str], on_finish: Callable[[], None] = None) -> Flight:
+        self.generations += 1
+
+        def finished():
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if on_finish:
+                on_finish()
+
+        flight = Flight(key, tokens, finished)
+        self._flights[key] = flight
+        return flight
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "generations": self.generations,
+            "generations_saved": self.generations_saved,
+            "retrievals": self.retrievals,
+            "retrievals_saved": self.retrievals_saved,
+            "in_flight": len(self._flights),
+        }
@@ -0,0 +1,141 @@
+"""Packs the retrieved chunks into a token budget for the LLM prompt."""
+
+import os
+import re
+import math
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+
+from app.core.chunker import PARAGRAPH_BREAK, SENTENCE_BREAK, load_tokenizer
+
+TERM = re.compile(r"\w+")
+TOKEN_ESTIMATE = re.compile(r"\w+|[^\w\s]")
+
+# Sentences scoring below this fraction of the best one are left out
+RELEVANCE_FLOOR = 0.25
+# Longer "sentences" (tables, code, text without punctuation) are split into pieces of this many words
+MAX_SENTENCE_WORDS = 60
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does did for from has have how i in is it its me my of on or our so
+that the their them there these this to use used uses using was we what when where which who why
+will with you your
+""".split())
+
+
+def terms(text: str) -> List[str]:
+    return [t for t in TERM.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        for sentence in SENTENCE_BREAK.split(paragraph):
+            words = sentence.split()
+            for i in range(0, len(words), MAX_SENTENCE_WORDS):
+                sentences.append(" ".join(words[i:i + MAX_SENTENCE_WORDS]))
+    return sentences
+
+
+class ContextPacker:
+    """Dedupes, trims and budgets retrieved chunks into the prompt's context block."""
+
+    def __init__(self, budget_tokens: int = None, tokenizer=None):
+        self.budget_tokens = budget_tokens if budget_tokens is not None else int(os.getenv("SYNAPSE_CONTEXT_TOKENS", "1024"))
+        self.tokenizer = tokenizer
+        if self.tokenizer is None and self.enabled:
+            try:
+                self.tokenizer = load_tokenizer()
+            except Exception as e:
+                print(f"⚠️ Tokenizer unavailable ({e}); estimating context tokens.")
+        self._lock = threading.Lock()   # the Rust tokenizer isn't safe to share across threads
+        self.requests = 0
+        self.tokens_retrieved = 0
+        self.tokens_packed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_tokens > 0
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        if self.tokenizer is None:
+            return [len(TOKEN_ESTIMATE.findall(text)) for text in texts]
+        with self._lock:
+            encoded = self.tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+    def pack(self, question: str, docs: List[str]) -> Tuple[str, Dict[str, Any]]:
+        """The context block for `question` and its report: tokens retrieved, packed and saved."""
+        if not self.enabled:
+            return "\n".join(docs), {}
+
+        # 1. Sentences per chunk, each one kept only the first time it appears
+        seen = set()
+        candidates = []   # (chunk rank, position in chunk, sentence)
+        for rank, doc in enumerate(docs):
+            for position, sentence in enumerate(split_sentences(doc)):
+                key = " ".join(TERM.findall(sentence.lower()))
+                if key and key not in seen:
+                    seen.add(key)
+                    candidates.append((rank, position, sentence))
+
+        counts = self.count_tokens(list(docs) + [sentence for _, _, sentence in candidates])
+        retrieved, lengths = sum(counts[:len(docs)]), counts[len(docs):]
+
+        # 2. Relevance: rare query terms count more than ones every sentence shares
+        query = set(terms(question))
+        sentence_terms = [set(terms(sentence)) for _, _, sentence in candidates]
+        frequency = Counter(t for found in sentence_terms for t in found & query)
+        n = len(candidates)
+        scores = [sum(math.log(1 + n / frequency[t]) for t in found & query) for found in sentence_terms]
+        best = max(scores, default=0.0)
+
+        if best > 0:
+            # Best sentences first; the better chunk wins a tie
+            order = sorted((i for i in range(n) if scores[i] >= best * RELEVANCE_FLOOR),
+                           key=lambda i: (-scores[i], candidates[i][0], candidates[i][1]))
+        else:
+            order = range(n)
+
+        # 3. Fill the budget, skipping sentences that no longer fit
+        chosen, used = [], 0
+        for i in order:
+            if used + lengths[i] <= self.budget_tokens:
+                chosen.append(i)
+                used += lengths[i]
+
+        # 4. Back into reading order: chunks by retrieval rank, sentences as written
+        chunks: Dict[int, List[str]] = {}
+        for i in sorted(chosen, key=lambda i: candidates[i][:2]):
+            chunks.setdefault(candidates[i][0], []).append(candidates[i][2])
+        context = "\n".join(" ".join(sentences) for sentences in chunks.values())
+
+        with self._lock:
+            self.requests += 1
+            self.tokens_retrieved += retrieved
+            self.tokens_packed += used
+        return context, {
+            "tokens_retrieved": retrieved,
+            "tokens_packed": used,
+            "tokens_saved": max(0, retrieved - used),
+            "chunks_used": len(chunks),
+            "sentences_used": len(chosen),
+            "sentences_dropped": n - len(chosen),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            saved = max(0, self.tokens_retrieved - self.tokens_packed)
+            return {
+                "enabled": self.enabled,
+                "budget_tokens": self.budget_tokens,
+                "token_counter": "tokenizer" if self.tokenizer is not None else "estimate",
+                "requests": self.requests,
+                "tokens_retrieved": self.tokens_retrieved,
+                "tokens_packed": self.tokens_packed,
+                "tokens_saved": saved,
+                "saved_ratio": round(saved / self.tokens_retrieved, 3) if self.tokens_retrieved else None,
+            }
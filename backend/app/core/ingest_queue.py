@@ -0,0 +1,269 @@
+"""Durable SQLite queue between the upload/sync paths and MemoryBank, drained by batching workers."""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional, Callable
+
+from app.core.vector_store import DEFAULT_DB_PATH
+from app.core.pipeline import Pipeline
+
+
+def chunk_id(tenant_id: str, source: str, text: str) -> str:
+    """Content-addressed id: the same text from the same source always maps to the same chunk."""
+    key = f"{tenant_id or ''}\x1f{source}\x1f{text}"
+    return str(uuid.UUID(hashlib.sha1(key.encode("utf-8")).hexdigest()[:32]))
+
+
+class IngestQueue:
+    """SQLite-backed FIFO of chunks waiting to be embedded and stored."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+            chunk_id    TEXT NOT NULL,
+            tenant_id   TEXT,
+            text        TEXT NOT NULL,
+            metadata    TEXT NOT NULL,
+            job_id      TEXT,
+            status      TEXT NOT NULL DEFAULT 'pending',
+            attempts    INTEGER NOT NULL DEFAULT 0,
+            lease_until REAL,
+            enqueued_at REAL NOT NULL,
+            error       TEXT
+        );
+        CREATE INDEX IF NOT EXISTS items_status ON items (status, seq);
+    """
+
+    def __init__(self, path: str = None, max_attempts: int = 5):
+        self.path = path or os.path.join(DEFAULT_DB_PATH, "ingest_queue.sqlite3")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._has_work = threading.Event()
+        self._has_work.set()   # drain whatever survived the last shutdown
+        self._drained = threading.Condition()
+
+    def enqueue(self, tenant_id: Optional[str], chunks: List[Dict[str, Any]], job_id: str = None) -> int:
+        """
+        Appends chunks ({"id", "text", "metadata"}) in one transaction.
+        Returns once the rows are durable on disk.
+        """
+        now = time.time()
+        rows = [(c["id"], tenant_id, c["text"], json.dumps(c.get("metadata") or {}), job_id, now) for c in chunks]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO items (chunk_id, tenant_id, text, metadata, job_id, enqueued_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        self._has_work.set()
+        return len(rows)
+
+    def claim(self, batch_size: int = 32, lease_sec: float = 300) -> List[Dict[str, Any]]:
+        """Leases up to `batch_size` of the oldest pending (or lease-expired) rows."""
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                """SELECT seq, chunk_id, tenant_id, text, metadata, job_id, attempts FROM items
+                   WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?)
+                   ORDER BY seq LIMIT ?""",
+                (now, batch_size)
+            ).fetchall()
+            if rows:
+                self._conn.executemany(
+                    "UPDATE items SET status = 'leased', lease_until = ?, attempts = attempts + 1 WHERE seq = ?",
+                    [(now + lease_sec, r[0]) for r in rows]
+                )
+        if not rows:
+            self._has_work.clear()
+        return [
+            {"seq": r[0], "id": r[1], "tenant_id": r[2], "text": r[3],
+             "metadata": json.loads(r[4]), "job_id": r[5], "attempts": r[6] + 1}
+            for r in rows
+        ]
+
+    def ack(self, seqs: List[int]):
+        """Stored successfully: drop the rows from the log."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM items WHERE seq = ?", [(s,) for s in seqs])
+        with self._drained:
+            self._drained.notify_all()
+
+    def nack(self, items: List[Dict[str, Any]], error: str) -> List[Dict[str, Any]]:
+        """Return rows to the queue, or park them as 'failed' after max_attempts. Returns the parked ones."""
+        parked = [item for item in items if item["attempts"] >= self.max_attempts]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE items SET status = ?, lease_until = NULL, error = ? WHERE seq = ?",
+                [("failed" if item["attempts"] >= self.max_attempts else "pending", error[:500], item["seq"])
+                 for item in items]
+            )
+        self._has_work.set()
+        with self._drained:
+            self._drained.notify_all()
+        return parked
+
+    def wait_for_work(self, timeout: float):
+        self._has_work.wait(timeout)
+
+    def backlog(self) -> int:
+        """Chunks enqueued but not yet stored (pending + leased)."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items WHERE status IN ('pending', 'leased')").fetchone()[0]
+
+    def wait_for_room(self, max_backlog: int, poll_sec: float = 1.0):
+        """Backpressure for producers: blocks while the backlog is at or above `max_backlog`."""
+        while self.backlog() >= max_backlog:
+            with self._drained:
+                self._drained.wait(poll_sec)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("pending", "leased", "failed")}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class IngestWorkers:
+    """
+    Background threads that drain the IngestQueue into tenant memory.
+    Each claimed batch is embedded in one AMD Bridge call and upserted in one store write.
+    """
+
+    def __init__(self, queue: IngestQueue, pool, num_workers: int = None, batch_size: int = None,
+                 on_stored: Callable[[List[Dict[str, Any]]], None] = None,
+                 on_failed: Callable[[List[Dict[str, Any]], str], None] = None):
+        self.queue = queue
+        self.pool = pool
+        self.num_workers = num_workers or int(os.getenv("SYNAPSE_INGEST_WORKERS", "1"))
+        self.batch_size = batch_size or int(os.getenv("SYNAPSE_INGEST_BATCH", "32"))
+        self.on_stored = on_stored
+        self.on_failed = on_failed      # chunks parked as failed (out of attempts), with the error
+        self.running = False
+        self.chunks_stored = 0
+        self.chunks_reused = 0
+        self.batches_failed = 0
+
+    def start(self):
+        self.running = True
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._loop, name=f"ingest-worker-{i}")
+            thread.daemon = True
+            thread.start()
+        print(f"📥 Ingestion workers active: {self.num_workers} x batch {self.batch_size}")
+
+    def stop(self):
+        self.running = False
+
+    def _loop(self):
+        # claim -> embed -> store on separate threads, one batch in flight between each
+        while self.running:
+            try:
+                Pipeline(self._claimed(), maxsize=1, name="ingest") \
+                    .then(self._embed, "embed") \
+                    .then(self._store, "store") \
+                    .run()
+            except Exception as e:
+                print(f"⚠️ Ingestion pipeline restarted: {e}")
+                time.sleep(1.0)
+
+    def _claimed(self):
+        while self.running:
+            items = self.queue.claim(self.batch_size)
+            if not items:
+                self.queue.wait_for_work(timeout=1.0)
+                continue
+            yield items
+
+    def _fail(self, items: List[Dict[str, Any]], error: Exception):
+        self.batches_failed += 1
+        print(f"⚠️ Ingestion batch failed ({len(items)} chunks): {error}")
+        parked = self.queue.nack(items, str(error))
+        if parked and self.on_failed:
+            self.on_failed(parked, str(error))
+
+    def _stored_vectors(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Vectors already in the tenants' stores for these chunk ids (unchanged content)."""
+        found = {}
+        by_tenant = {}
+        for item in items:
+            by_tenant.setdefault(item["tenant_id"], []).append(item["id"])
+        for tenant_id, ids in by_tenant.items():
+            with self.pool.lease(tenant_id) as memory:
+                existing = memory.store.get(ids=list(dict.fromkeys(ids)), include_embeddings=True)
+            embeddings = existing.get("embeddings")
+            for doc_id, vector in zip(existing["ids"], embeddings if embeddings is not None else []):
+                found[(tenant_id, doc_id)] = list(map(float, vector))
+        return found
+
+    def _embed(self, batches):
+        """One batched AMD Bridge call per claimed batch, skipping chunks whose text is already stored."""
+        for items in batches:
+            try:
+                stored = self._stored_vectors(items)
+                fresh = [item for item in items if (item["tenant_id"], item["id"]) not in stored]
+                vectors = self.pool.brain.embed_batch([item["text"] for item in fresh]) if fresh else []
+            except Exception as e:
+                self._fail(items, e)
+                continue
+            fresh_vectors = iter(vectors)
+            batch_vectors = []
+            for item in items:
+                key = (item["tenant_id"], item["id"])
+                if key in stored:
+                    item["reused"] = True
+                    batch_vectors.append(stored[key])
+                else:
+                    batch_vectors.append(next(fresh_vectors))
+            self.chunks_reused += len(items) - len(fresh)
+            yield items, batch_vectors
+
+    def _store(self, embedded):
+        """Upserts each embedded batch, grouped by tenant; acks on success, nacks on failure."""
+        for items, vectors in embedded:
+            by_tenant = {}
+            for item, vector in zip(items, vectors):
+                by_tenant.setdefault(item["tenant_id"], []).append((item, vector))
+
+            for tenant_id, pairs in by_tenant.items():
+                group = [item for item, _ in pairs]
+                # The same chunk id can be claimed twice in one batch (a repeated
+                # paragraph, a file enqueued twice); stores reject repeated ids in
+                # one upsert, so write the last copy and ack every row
+                unique = list({item["id"]: (item, vector) for item, vector in pairs}.values())
+                try:
+                    with self.pool.lease(tenant_id) as memory:
+                        memory.store_embedded(
+                            [item["text"] for item, _ in unique],
+                            [vector for _, vector in unique],
+                            metadatas=[item["metadata"] for item, _ in unique],
+                            ids=[item["id"] for item, _ in unique],
+                        )
+                except Exception as e:
+                    self._fail(group, e)
+                    continue
+                self.queue.ack([item["seq"] for item in group])
+                self.chunks_stored += len(unique)
+                if self.on_stored:
+                    self.on_stored(group)
+                yield len(group)
+
+    def process(self, items: List[Dict[str, Any]]):
+        """Embeds and stores one claimed batch synchronously (same steps as the worker pipeline)."""
+        for _ in self._store(self._embed([items])):
+            pass
+
+    def stats(self):
+        return {**self.queue.stats(), "chunks_stored": self.chunks_stored, "chunks_reused": self.chunks_reused,
+                "batches_failed": self.batches_failed, "workers": self.num_workers}
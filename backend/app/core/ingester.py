@@ -1,60 +1,125 @@
-import pypdf
 from fastapi import UploadFile
-import io
+
+from app.core.parse_cache import get_parse_cache
+from app.core.parsers import Parser, UnsupportedFormat, read_head, registry
+
 
 class FileIngester:
     @staticmethod
     async def parse_file(file: UploadFile) -> str:
         """
-        Extracts text from uploaded files (PDF or TXT).
-        """
-        filename = file.filename.lower()
-        content = await file.read()
-        
-        # 1. Handle PDF
-        if filename.endswith(".pdf"):
-            return FileIngester._read_pdf(content)
-        
-        # 2. Handle Text/Code
-        elif filename.endswith(".txt") or filename.endswith(".md") or filename.endswith(".py"):
-            return content.decode("utf-8")
-            
+        Extracts text from an uploaded file of any registered format.
+        Reads from the upload's spooled file instead of copying it into memory.
+        """
+        return "\n".join(FileIngester.iter_pages(file.file, file.filename))
+
+    @staticmethod
+    def supports(filename: str) -> bool:
+        """True if a parser is registered for this file's extension."""
+        return registry.for_file(filename) is not None
+
+    @staticmethod
+    def parser_for(source, filename: str, content_type: str = None) -> Parser:
+        """
+        The parser that will read this file, after a cheap look at its first
+        bytes. Raises UnsupportedFormat for unknown types and for content that
+        doesn't match its type (e.g. binary data named .txt), so callers can
+        refuse the file before any parsing or embedding happens.
+        """
+        parser = FileIngester._lookup(filename, content_type)
+        if not parser.accepts(read_head(source)):
+            raise UnsupportedFormat(f"{filename} doesn't look like a {parser.name} file.")
+        return parser
+
+    @staticmethod
+    def _lookup(filename: str, content_type: str = None) -> Parser:
+        parser = registry.for_file(filename, content_type)
+        if parser is None:
+            raise UnsupportedFormat(f"Unsupported file format: {filename}")
+        return parser
+
+    @staticmethod
+    def count_pages(source, filename: str, content_type: str = None):
+        """Number of pieces iter_pages will yield (PDF pages, text blocks), or None if unknown before parsing."""
+        parser = FileIngester._lookup(filename, content_type)
+        if parser.cacheable:
+            cache = get_parse_cache()
+            if cache is not None:
+                cached = cache.page_count(cache.key_for(source, f"{parser.name}/{parser.version}"))
+                if cached is not None:
+                    return cached
+        return parser.count(source)
+
+    @staticmethod
+    def iter_pages(source, filename: str, content_type: str = None):
+        """
+        Yields the text of a file one page at a time, so callers can report
+        progress while parsing. `source` is a path or a binary file object
+        (e.g. a spooled upload); neither is ever copied into a bytes buffer.
+        """
+        parser = FileIngester._lookup(filename, content_type)
+        if parser.cacheable:
+            yield from FileIngester._iter_cached(source, f"{parser.name}/{parser.version}", parser.iter_pages)
+        else:
+            yield from parser.iter_pages(source)
+
+    @staticmethod
+    def _iter_cached(source, parser_version: str, parse):
+        """
+        Pages from the parse cache when this exact file was parsed before;
+        otherwise `parse(source, skipped)`, saving the pages as they stream past.
+        Files with skipped pages aren't cached, so they get another try next time.
+        """
+        cache = get_parse_cache()
+        if cache is None:
+            yield from parse(source, [])
+            return
+        key = cache.key_for(source, parser_version)
+        cached = cache.iter_pages(key)
+        if cached is not None:
+            yield from cached
+            return
+        writer = cache.writer(key)
+        skipped = []
+        try:
+            for page in parse(source, skipped):
+                writer.add(page)
+                yield page
+        except BaseException:
+            writer.abort()
+            raise
+        if skipped:
+            writer.abort()
         else:
-            return "Unsupported file format."
+            writer.commit()
 
     @staticmethod
-    def _read_pdf(file_bytes):
-        text = ""
-        # Create a BytesIO object because pypdf expects a file-like object
-        pdf_file = io.BytesIO(file_bytes)
-        reader = pypdf.PdfReader(pdf_file)
-        
-        for page in reader.pages:
-            extracted = page.extract_text()
-            if extracted:
-                text += extracted + "\n"
-        return text
+    def _read_pdf(source):
+        """Full text of a PDF (path or file object), built with a single join."""
+        return "".join(page + "\n" for page in FileIngester.iter_pages(source, "document.pdf") if page)
 
     @staticmethod
     def chunk_text(text, chunk_size=500):
         """
         Splits massive text into smaller 'bites' for the vector DB.
         """
-        words = text.split()
-        chunks = []
+        return list(FileIngester.iter_chunks([text], chunk_size))
+
+    @staticmethod
+    def iter_chunks(texts, chunk_size=500):
+        """
+        Streaming chunk_text: consumes a stream of texts (e.g. iter_pages) and
+        yields each chunk as soon as it fills. Words carry over between pages,
+        so the chunks are the same as chunk_text on the joined document.
+        """
         current_chunk = []
-        current_count = 0
-        
-        for word in words:
-            current_chunk.append(word)
-            current_count += 1
-            
-            if current_count >= chunk_size:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = []
-                current_count = 0
-                
+        for text in texts:
+            for word in text.split():
+                current_chunk.append(word)
+                if len(current_chunk) >= chunk_size:
+                    yield " ".join(current_chunk)
+                    current_chunk = []
+
         if current_chunk:
-            chunks.append(" ".join(current_chunk))
-            
-        return chunks
\ No newline at end of file
+            yield " ".join(current_chunk)
+
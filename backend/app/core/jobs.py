@@ -0,0 +1,226 @@
+"""Background ingestion jobs: uploads are parsed and chunked off the request path, with progress over SSE."""
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List
+
+from app.core.ingester import FileIngester
+from app.core.ingest_queue import chunk_id
+from app.core.pipeline import Pipeline, batched
+from app.core.chunker import make_chunker
+
+TERMINAL_STATES = ("done", "failed")
+
+
+class IngestJob:
+    """Progress of one uploaded file."""
+
+    def __init__(self, filename: str, tenant_id: Optional[str], content_type: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.content_type = content_type  # picks the parser when the extension doesn't
+        self.tenant_id = tenant_id
+        self.parsed = threading.Event()  # set once parsing ends (chunks queued, or failed)
+        self.version = None             # the `version` stamped on this ingestion's chunks
+        self.chunk_ids = None           # ids of every chunk queued, if submitted with keep_ids
+        self.status = "queued"          # queued -> parsing (embedding alongside) -> embedding -> done | failed
+        self.pages_total = None         # None until parsed for formats that can't be counted up front
+        self.pages_parsed = 0
+        self.chunks_total = None        # known once parsing finishes
+        self.chunks_queued = 0
+        self.chunks_embedded = 0
+        self.chunks_reused = 0          # unchanged chunks whose stored vector was reused
+        self.chunks_failed = 0          # parked by the queue after running out of attempts
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.embed_started_at = None
+        self.finished_at = None
+        self.revision = 0               # bumped on every change, drives the SSE stream
+
+    def touch(self):
+        self.revision += 1
+
+    def settle(self):
+        """Finishes the job once every queued chunk is either stored or failed (caller holds the lock)."""
+        if self.chunks_total is None or self.status in TERMINAL_STATES:
+            return
+        if self.chunks_embedded + self.chunks_failed < self.chunks_total:
+            self.status = "embedding"
+            return
+        if self.chunks_failed:
+            self.status = "failed"
+            self.error = f"{self.chunks_failed} of {self.chunks_total} chunks could not be stored: {self.error or 'unknown error'}"
+        else:
+            self.status = "done"
+        self.finished_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = self.finished_at or time.time()
+        throughput = None
+        eta = None
+        if self.embed_started_at and self.chunks_embedded:
+            elapsed = max(now - self.embed_started_at, 1e-6)
+            throughput = self.chunks_embedded / elapsed
+            if self.chunks_total is not None and self.status not in TERMINAL_STATES:
+                eta = max(self.chunks_total - self.chunks_embedded, 0) / throughput
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "pages_total": self.pages_total,
+            "pages_parsed": self.pages_parsed,
+            "chunks_total": self.chunks_total,
+            "chunks_queued": self.chunks_queued,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_reused": self.chunks_reused,
+            "chunks_failed": self.chunks_failed,
+            "chunks_per_sec": round(throughput, 2) if throughput else None,
+            "eta_sec": round(eta, 1) if eta is not None else None,
+            "elapsed_sec": round(now - (self.started_at or self.created_at), 2),
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Runs upload jobs on a thread pool and keeps the most recent `max_jobs` for status queries."""
+
+    def __init__(self, queue, max_workers: int = None, max_jobs: int = 500,
+                 enqueue_batch: int = 64, max_backlog: int = None, chunker=None):
+        self.queue = queue
+        self.chunker = chunker or make_chunker()
+        self.max_jobs = max_jobs
+        self.enqueue_batch = enqueue_batch
+        self.max_backlog = max_backlog or int(os.getenv("SYNAPSE_INGEST_MAX_BACKLOG", "2048"))
+        workers = max_workers or int(os.getenv("SYNAPSE_JOB_WORKERS", "2"))
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, source, filename: str, tenant_id: Optional[str], owned: bool = True,
+               metadata: Optional[Dict[str, Any]] = None, content_type: Optional[str] = None,
+               keep_ids: bool = False) -> IngestJob:
+        """
+        Schedules parsing of `source`: a spooled upload file object (closed when
+        parsed) or a path on disk (deleted when parsed, unless `owned` is False).
+        `metadata` is merged into every chunk's metadata (it may override source_type).
+        With `keep_ids` the job collects its chunk ids in `job.chunk_ids`.
+        """
+        job = IngestJob(filename, tenant_id, content_type)
+        if keep_ids:
+            job.chunk_ids = set()
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest.status not in TERMINAL_STATES:
+                    break
+                del self._jobs[oldest_id]
+        self.executor.submit(self._run, job, source, owned, metadata or {})
+        return job
+
+    def get(self, job_id: str, tenant_id: Optional[str] = None) -> Optional[IngestJob]:
+        """The job, or None if it doesn't exist or belongs to another tenant."""
+        job = self._jobs.get(job_id)
+        if job is None or job.tenant_id != tenant_id:
+            return None
+        return job
+
+    def list(self, tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [job.to_dict() for job in reversed(list(self._jobs.values())) if job.tenant_id == tenant_id]
+
+    def _pages(self, job: IngestJob, source):
+        for text in FileIngester.iter_pages(source, job.filename, job.content_type):
+            job.pages_parsed += 1
+            job.touch()
+            yield text
+
+    def _run(self, job: IngestJob, source, owned: bool = True, extra_metadata: Dict[str, Any] = None):
+        job.started_at = time.time()
+        job.status = "parsing"
+        job.touch()
+        try:
+            # Unknown or mislabelled (e.g. binary) files fail here, before anything is embedded
+            FileIngester.parser_for(source, job.filename, job.content_type)
+            job.pages_total = FileIngester.count_pages(source, job.filename, job.content_type)
+            version = job.version = int(time.time() * 1000)
+            metadata = {"source_type": "upload", **(extra_metadata or {}), "source": job.filename, "version": version}
+
+            # parse -> chunk -> batch, each on its own thread with a few items between them
+            stream = Pipeline(self._pages(job, source), maxsize=4, name=f"job-{job.id[:8]}") \
+                .then(self.chunker.iter_chunks, "chunk", maxsize=self.enqueue_batch) \
+                .then(lambda chunks: batched(chunks, self.enqueue_batch), "batch", maxsize=2)
+            for batch in stream:
+                # Backpressure: don't run further ahead of the embedders than the backlog allows
+                self.queue.wait_for_room(self.max_backlog)
+                with self._lock:
+                    # Counted before the enqueue: a fast worker may store these before it returns
+                    job.chunks_queued += len(batch)
+                    job.embed_started_at = job.embed_started_at or time.time()
+                    job.touch()
+                items = [{"id": chunk_id(job.tenant_id, job.filename, chunk), "text": chunk, "metadata": metadata}
+                         for chunk in batch]
+                if job.chunk_ids is not None:
+                    job.chunk_ids.update(item["id"] for item in items)
+                self.queue.enqueue(job.tenant_id, items, job_id=job.id)
+
+            with self._lock:
+                job.pages_total = job.pages_parsed if job.pages_total is None else job.pages_total
+                job.chunks_total = job.chunks_queued
+                job.embed_started_at = job.embed_started_at or time.time()
+                job.settle()
+                job.touch()
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            job.finished_at = time.time()
+            job.touch()
+            print(f"❌ Ingestion job {job.id} failed: {e}")
+        finally:
+            if owned and isinstance(source, str):
+                try:
+                    os.remove(source)
+                except OSError:
+                    pass
+            elif owned:
+                source.close()
+            job.parsed.set()
+
+    def record_stored(self, items: List[Dict[str, Any]]):
+        """IngestWorkers callback: credit stored chunks to their jobs."""
+        counts, reused = {}, {}
+        for item in items:
+            if item.get("job_id"):
+                counts[item["job_id"]] = counts.get(item["job_id"], 0) + 1
+                if item.get("reused"):
+                    reused[item["job_id"]] = reused.get(item["job_id"], 0) + 1
+        with self._lock:
+            for job_id, count in counts.items():
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                job.chunks_reused = min(job.chunks_reused + reused.get(job_id, 0), job.chunks_queued)
+                # Redelivered chunks can be stored twice; never report more than were queued
+                job.chunks_embedded = min(job.chunks_embedded + count, job.chunks_queued - job.chunks_failed)
+                job.settle()
+                job.touch()
+
+    def record_failed(self, items: List[Dict[str, Any]], error: str):
+        """IngestWorkers callback: chunks the queue gave up on; their job fails once nothing else is pending."""
+        counts = {}
+        for item in items:
+            if item.get("job_id"):
+                counts[item["job_id"]] = counts.get(item["job_id"], 0) + 1
+        with self._lock:
+            for job_id, count in counts.items():
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                job.chunks_failed = min(job.chunks_failed + count, job.chunks_queued - job.chunks_embedded)
+                job.error = error
+                job.settle()
+                job.touch()
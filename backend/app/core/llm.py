@@ -1,16 +1,209 @@
-import requests
+import httpx
 import json
+import os
+import time
+import random
+import asyncio
+
+from app.core.ollama_pool import BackendPool, BackendUnavailable
+
+# Connection-level failures that are safe to retry: the request never reached Ollama
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.RemoteProtocolError)
+# ...and the ones that send the request to another backend
+FAILOVER_ERRORS = RETRYABLE_ERRORS + (BackendUnavailable,)
+
+# A generation whose load_duration exceeds this had to load the model first (a cold start)
+COLD_LOAD_MS = 500
+
+def parse_range(value):
+    """'8-18' -> (8, 18); '' -> None (no restriction)."""
+    if not value or not value.strip():
+        return None
+    start, _, end = value.partition("-")
+    return int(start), int(end or start)
 
 class LocalLLM:
-    def __init__(self, model="llama3"):
+    """
+    Async Ollama client. One pooled httpx.AsyncClient keeps connections to
+    Ollama alive across requests; connect/read timeouts are explicit, and
+    connection failures are retried with jittered exponential backoff.
+
+    Several Ollama backends: `base_url` may be a list (or SYNAPSE_OLLAMA_URLS
+    a comma-separated one). Each request goes to the backend BackendPool
+    picks (least outstanding requests, model affinity), and a failed request
+    moves to the next backend before any backoff.
+
+    Keeping the model resident: every request asks Ollama to keep the model
+    loaded for `keep_alive`; start_warmup() preloads it on every backend when
+    the server boots and then pings each backend every `warm_interval`
+    seconds it sits idle during `warm_hours` on `warm_days`, so the first
+    question of the day doesn't pay for the model load.
+    """
+
+    def __init__(self, model="llama3", base_url=None, connect_timeout=None, read_timeout=None,
+                 retries=None, max_connections=None, keep_alive=None, warm_interval=None,
+                 warm_hours=None, warm_days=None):
         self.model = model
-        self.api_url = "http://localhost:11434/api/generate"
+        self.pool = BackendPool(base_url.split(",") if isinstance(base_url, str) else base_url)
+        self.base_url = self.pool.backends[0].url
+        self.api_url = self.pool.backends[0].api_url
+        self.connect_timeout = connect_timeout or float(os.getenv("SYNAPSE_LLM_CONNECT_TIMEOUT_SEC", "5"))
+        # Between bytes: for streams that's the gap between tokens, for /ask the whole generation
+        self.read_timeout = read_timeout or float(os.getenv("SYNAPSE_LLM_READ_TIMEOUT_SEC", "300"))
+        self.retries = retries if retries is not None else int(os.getenv("SYNAPSE_LLM_RETRIES", "2"))
+        self.max_connections = max_connections or int(os.getenv("SYNAPSE_LLM_MAX_CONNECTIONS", "16"))
+        self.keep_alive = keep_alive or os.getenv("SYNAPSE_LLM_KEEP_ALIVE", "30m")
+        self.warm_interval = warm_interval if warm_interval is not None else float(os.getenv("SYNAPSE_LLM_WARM_INTERVAL_SEC", "240"))
+        self.warm_hours = parse_range(warm_hours if warm_hours is not None else os.getenv("SYNAPSE_LLM_WARM_HOURS", "8-18"))
+        self.warm_days = parse_range(warm_days if warm_days is not None else os.getenv("SYNAPSE_LLM_WARM_DAYS", "1-5"))
+        self._client = None
+        self._tasks = []
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Created on first use, inside the server's event loop."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout, pool=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections, keepalive_expiry=60),
+            )
+        return self._client
+
+    async def aclose(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
-    def generate_answer(self, context, question):
+    async def _backoff(self, attempt, error):
+        # Full jitter: concurrent requests that failed together don't retry together
+        delay = random.uniform(0, min(4.0, 0.25 * 2 ** attempt))
+        print(f"⚠️ Ollama connection failed ({error!r}); retry {attempt + 1}/{self.retries} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+    async def _failover(self, backend, tried, attempt, error, prefer=None):
         """
-        Uses the Local LLM (Simulating AMD ROCm) to answer.
+        After `backend` failed: the next untried backend right away, or, once
+        all have been tried, the whole pool again after a backoff (up to
+        `retries` times). Returns (backend, attempt); raises `error` when out
+        of retries.
         """
-        prompt = f"""
+        self.pool.failed(backend, error)
+        tried.add(backend)
+        following = self.pool.pick(self.model, exclude=tried, prefer=prefer)
+        if following is not None:
+            self.pool.failovers += 1
+            print(f"↪️ Ollama backend {backend.url} failed ({error!r}); trying {following.url}")
+            return following, attempt
+        if attempt >= self.retries:
+            raise error
+        await self._backoff(attempt, error)
+        tried.clear()
+        return self.pool.pick(self.model, prefer=prefer), attempt + 1
+
+    @staticmethod
+    def _check_status(backend, response):
+        if response.status_code >= 500:
+            raise BackendUnavailable(f"{backend.url} answered HTTP {response.status_code}")
+
+    def _observe(self, backend, data, elapsed_ms=None):
+        """Notes from a finished Ollama response whether the model had to be loaded for it."""
+        self.pool.succeeded(backend, self.model)
+        load_ms = data.get("load_duration", 0) / 1e6
+        if data.get("done_reason") == "load" and elapsed_ms is not None:
+            load_ms = elapsed_ms
+        if load_ms >= COLD_LOAD_MS or backend.load_ms is None:
+            if load_ms >= COLD_LOAD_MS:
+                backend.cold_starts += 1
+                print(f"🔥 {self.model} loaded on {backend.url} in {load_ms:.0f}ms")
+            backend.load_ms = round(load_ms)
+            backend.last_loaded_at = time.time()
+
+    async def _warm_backend(self, backend):
+        """Loads the model (an empty prompt generates nothing) and resets its keep-alive timer."""
+        backend.warming = True
+        started = time.monotonic()
+        try:
+            with self.pool.track(backend):
+                response = await self.client.post(backend.api_url, json={"model": self.model, "prompt": "", "keep_alive": self.keep_alive})
+            response.raise_for_status()
+            self._observe(backend, response.json(), elapsed_ms=(time.monotonic() - started) * 1000)
+        except Exception as e:
+            self.pool.failed(backend, e)
+            raise
+        finally:
+            backend.warming = False
+
+    async def warm(self, idle_for=0):
+        """Warms every backend idle for at least `idle_for` seconds; raises if none of them could load the model."""
+        now = time.time()
+        backends = [b for b in self.pool.backends if now - b.last_used_at >= idle_for]
+        results = await asyncio.gather(*(self._warm_backend(b) for b in backends), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors and len(errors) == len(backends):
+            raise errors[0]
+
+    def in_warm_hours(self, now=None):
+        now = time.localtime(now)
+        if self.warm_days and not self.warm_days[0] <= now.tm_wday + 1 <= self.warm_days[1]:
+            return False
+        if self.warm_hours and not self.warm_hours[0] <= now.tm_hour < self.warm_hours[1]:
+            return False
+        return True
+
+    async def keep_warm(self):
+        """Preloads the model, then keeps it resident while idle during warm hours."""
+        try:
+            await self.warm()
+        except Exception as e:
+            print(f"⚠️ Could not preload {self.model} ({e!r}); it will load on the first question.")
+        if self.warm_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.warm_interval)
+            if not self.in_warm_hours():
+                continue
+            try:
+                await self.warm(idle_for=self.warm_interval)
+            except Exception as e:
+                print(f"⚠️ Keep-warm ping for {self.model} failed ({e!r})")
+
+    def start_warmup(self):
+        """Starts keep_warm() and the backend health checks in the background on the running event loop."""
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self.keep_warm()),
+                           asyncio.ensure_future(self.pool.run_health_checks(self.client, self.connect_timeout))]
+
+    def status(self):
+        """Cold/warm status per backend, as of the last health check (/api/ps); never probes itself."""
+        backends = self.pool.stats(self.model)
+        if any(b["model_loaded"] for b in backends):
+            state = "warm"
+        elif any(b.warming for b in self.pool.backends):
+            state = "loading"
+        elif any(b["healthy"] for b in backends):
+            state = "cold"
+        else:
+            state = "unreachable"
+        loads = [b for b in backends if b["last_loaded_at"]]
+        latest = max(loads, key=lambda b: b["last_loaded_at"]) if loads else {}
+        return {
+            "model": self.model,
+            "state": state,
+            "load_ms": latest.get("load_ms"),
+            "last_loaded_at": latest.get("last_loaded_at"),
+            "cold_starts": sum(b["cold_starts"] for b in backends),
+            "keep_alive": self.keep_alive,
+            "keep_warm": self.warm_interval > 0 and self.in_warm_hours(),
+            "failovers": self.pool.failovers,
+            "backends": backends,
+        }
+
+    def build_prompt(self, context, question):
+        return f"""
         You are Synapse, an intelligent OS assistant. 
         Use the following retrieved context to answer the user's question.
         
@@ -22,16 +215,98 @@ class LocalLLM:
         
         ANSWER (Keep it concise and technical):
         """
-        
+
+    def _payload(self, prompt, stream, context=None):
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False
+            "stream": stream,
+            "keep_alive": self.keep_alive
         }
-        
+        if context:
+            # Token state returned by an earlier response: Ollama continues from it
+            # instead of re-evaluating the conversation so far
+            payload["context"] = context
+        return payload
+
+    async def generate(self, prompt, context=None, prefer=None):
+        """
+        One complete (non-streamed) generation; returns Ollama's response object
+        (plus "backend": the URL that served it), raises on failure. `prefer`
+        favours a backend, e.g. the one holding a conversation's KV cache.
+        """
+        payload = self._payload(prompt, False, context)
+        tried, attempt = set(), 0
+        backend = self.pool.pick(self.model, prefer=prefer)
+        while True:
+            try:
+                with self.pool.track(backend):
+                    response = await self.client.post(backend.api_url, json=payload)
+                self._check_status(backend, response)
+                break
+            except FAILOVER_ERRORS as e:
+                backend, attempt = await self._failover(backend, tried, attempt, e, prefer)
+        data = response.json()
+        if data.get("error"):
+            raise RuntimeError(data["error"])
+        self._observe(backend, data)
+        data["backend"] = backend.url
+        return data
+
+    async def generate_answer(self, context, question):
+        """
+        Uses the Local LLM (Simulating AMD ROCm) to answer.
+        """
         try:
-            response = requests.post(self.api_url, json=payload)
-            data = response.json()
+            data = await self.generate(self.build_prompt(context, question))
             return data.get("response", "Error generating response.")
         except Exception as e:
-            return f"LLM Connection Failed: {str(e)}"
\ No newline at end of file
+            return f"LLM Connection Failed: {str(e)}"
+
+    def stream_answer(self, context, question):
+        """Same prompt as generate_answer, streamed (see stream_generate)."""
+        return self.stream_generate(self.build_prompt(context, question))
+
+    async def stream_generate(self, prompt, context=None, on_done=None, prefer=None):
+        """
+        Yields tokens as Ollama produces them (its NDJSON stream: one
+        {"response": "...", "done": false} object per line), then passes the
+        final object (timings, `context`, "backend") to `on_done`. Raises on
+        connection or model errors. Closing the generator early closes the
+        connection, which makes Ollama stop generating. Failed requests move
+        to another backend (or are retried) only before the first token.
+        """
+        payload = self._payload(prompt, True, context)
+        tried, attempt = set(), 0
+        backend = self.pool.pick(self.model, prefer=prefer)
+
+        while True:
+            yielded = False
+            try:
+                with self.pool.track(backend):
+                    async with self.client.stream("POST", backend.api_url, json=payload) as response:
+                        self._check_status(backend, response)
+                        if response.status_code >= 400:
+                            await response.aread()
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if not line.strip():
+                                continue
+                            data = json.loads(line)
+                            if data.get("error"):
+                                raise RuntimeError(data["error"])
+                            if data.get("response"):
+                                yielded = True
+                                yield data["response"]
+                            if data.get("done"):
+                                self._observe(backend, data)
+                                data["backend"] = backend.url
+                                if on_done:
+                                    on_done(data)
+                                return
+                return
+            except FAILOVER_ERRORS as e:
+                if yielded:
+                    self.pool.failed(backend, e)
+                    raise
+                backend, attempt = await self._failover(backend, tried, attempt, e, prefer)
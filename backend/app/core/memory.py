@@ -1,30 +1,53 @@
-import chromadb
+import os
+import time
 import uuid
+import threading
 from app.core.amd_bridge import AMDBridge
+from app.core.vector_store import open_vector_store, DEFAULT_DB_PATH, DEFAULT_COLLECTION
+from app.core.snapshot import export_snapshot, import_snapshot
 
 class MemoryBank:
-    def __init__(self):
-        print("💾 Initializing Synapse Memory (ChromaDB)...")
-        # Initialize the AMD Bridge for embeddings
-        self.brain = AMDBridge()
-        
+    def __init__(self, collection_name=DEFAULT_COLLECTION, path=DEFAULT_DB_PATH, backend=None, quantization=None, brain=None):
+        # Compressed codes ("sq8", "pq48", ...) for collections too large to keep as float32 in RAM
+        self.quantization = quantization or os.getenv("SYNAPSE_QUANTIZATION") or None
+        # Storage engine: "chroma" (default) or "flat" (memory-mapped exact search)
+        self.backend = backend or os.getenv("SYNAPSE_VECTOR_BACKEND") or ("flat" if self.quantization else "chroma")
+        print(f"💾 Initializing Synapse Memory ({self.backend})...")
+        # The AMD Bridge for embeddings is loaded on first use, so maintenance
+        # work (snapshots, compaction) never pays for the ONNX model
+        self._brain = brain
+
         # Initialize Local Database (Persistent)
-        self.client = chromadb.PersistentClient(path="./synapse_memory_db")
-        
-        # Create or Get the collection (Like a folder for memories)
-        self.collection = self.client.get_or_create_collection(name="project_alpha")
+        # The store is the "folder" for memories; MemoryBank never touches the engine directly
+        self.store = open_vector_store(self.backend, path, collection_name, quantization=self.quantization)
+
+        # In-flight recalls, so background maintenance can yield to live queries
+        self._active_queries = 0
+        self._activity_lock = threading.Lock()
+
+    @property
+    def brain(self):
+        if self._brain is None:
+            self._brain = AMDBridge()
+        return self._brain
+
+    @property
+    def busy(self):
+        return self._active_queries > 0
 
     def memorize(self, text, metadata={"source": "user_input"}):
         """
         1. Uses AMD Bridge to turn text -> vector.
-        2. Saves text + vector to ChromaDB.
+        2. Saves text + vector to the vector store.
         """
         # Step 1: NPU Workload (Embedding)
         vector = self.brain.embed_text(text)
-        
-        # Step 2: Storage
+
+        # Step 2: Storage (timestamped so retention policies can age it out)
+        metadata = dict(metadata)
+        metadata.setdefault("ingested_at", time.time())
         doc_id = str(uuid.uuid4())
-        self.collection.add(
+        self.store.add(
             ids=[doc_id],
             documents=[text],
             embeddings=[vector],
@@ -32,32 +55,81 @@ class MemoryBank:
         )
         return doc_id
 
-    def recall(self, query_text, n_results=3):
+    def memorize_batch(self, texts, metadatas=None, ids=None):
+        """
+        Batched memorize: one embedding call and one store write for many chunks.
+        Passing `ids` makes the write an idempotent upsert (safe to retry).
+        """
+        if not texts:
+            return []
+        # Step 1: NPU Workload (Embedding, whole batch in one pass)
+        vectors = self.brain.embed_batch(texts)
+
+        # Step 2: Storage
+        return self.store_embedded(texts, vectors, metadatas=metadatas, ids=ids)
+
+    def store_embedded(self, texts, vectors, metadatas=None, ids=None):
         """
-        1. Turns query -> vector.
+        The storage half of memorize_batch, for pipelines that embed on another
+        thread (the AMD Bridge is shared, so embedding needs no MemoryBank).
+        """
+        if not texts:
+            return []
+        now = time.time()
+        metadatas = [dict(m or {}) for m in (metadatas or [{"source": "user_input"}] * len(texts))]
+        for metadata in metadatas:
+            metadata.setdefault("ingested_at", now)
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        self.store.upsert(ids=ids, documents=list(texts), embeddings=vectors, metadatas=metadatas)
+        return ids
+
+    def recall(self, query_text, n_results=3, query_vector=None):
+        """
+        1. Turns query -> vector (unless the caller already has it).
         2. Finds closest vectors in DB.
         """
-        # Step 1: NPU Workload
-        query_vector = self.brain.embed_text(query_text)
-        
-        # Step 2: Retrieval
-        results = self.collection.query(
-            query_embeddings=[query_vector],
-            n_results=n_results
-        )
-        return results
+        with self._activity_lock:
+            self._active_queries += 1
+        try:
+            # Step 1: NPU Workload
+            if query_vector is None:
+                query_vector = self.brain.embed_text(query_text)
+
+            # Step 2: Retrieval
+            results = self.store.query(
+                query_embeddings=[query_vector],
+                n_results=n_results
+            )
+            return results
+        finally:
+            with self._activity_lock:
+                self._active_queries -= 1
+
+    def compression_report(self, sample_queries=200, k=10):
+        """Memory/recall numbers for the active compression level (quantized stores only)."""
+        if not hasattr(self.store, "compression_report"):
+            return {"level": None, "message": "Collection stores full-precision vectors."}
+        return self.store.compression_report(sample_queries=sample_queries, k=k)
+
+    def export_snapshot(self, out_dir, shard_size=10000, compress=False):
+        """Writes ids, documents, metadata and embeddings as columnar npz shards."""
+        return export_snapshot(self.store, out_dir, shard_size=shard_size, compress=compress)
+
+    def import_snapshot(self, in_dir, batch_size=2000):
+        """Bulk-loads a snapshot with its stored embeddings (no AMD Bridge calls)."""
+        return import_snapshot(self.store, in_dir, batch_size=batch_size)
 
 # TEST RUNNER
 if __name__ == "__main__":
     mem = MemoryBank()
-    
+
     # Teach it something
     print("\n📝 Learning...")
     mem.memorize("The hackathon project is called Synapse.")
     mem.memorize("Synapse uses AMD Ryzen AI for embeddings.")
-    
+
     # Ask it something
     print("🕵️ Searching for 'AMD'...")
     results = mem.recall("What does Synapse use?")
-    
-    print(f"✅ Found: {results['documents'][0][0]}")
\ No newline at end of file
+
+    print(f"✅ Found: {results['documents'][0][0]}")
@@ -0,0 +1,152 @@
+"""Balances generations over several Ollama backends, with health checks and ejection."""
+
+import os
+import time
+import random
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+
+class BackendUnavailable(Exception):
+    """A backend answered with a server error; the request can go to another one."""
+
+
+def model_names(model: str):
+    return (model, f"{model}:latest") if ":" not in model else (model,)
+
+
+class Backend:
+    """One Ollama instance and what the pool knows about it."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.api_url = f"{self.url}/api/generate"
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.failures = 0              # consecutive
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.healthy = True            # until a health check says otherwise
+        self.loaded: Dict[str, Dict[str, Any]] = {}   # model name -> /api/ps entry
+        self.warming = False
+        self.load_ms = None
+        self.last_loaded_at = None
+        self.last_used_at = 0.0
+        self.cold_starts = 0
+
+    def ejected(self, now: float = None) -> bool:
+        return (now or time.time()) < self.ejected_until
+
+    def has_model(self, model: str) -> bool:
+        return any(name in self.loaded for name in model_names(model))
+
+    def to_dict(self, model: str) -> Dict[str, Any]:
+        entry = next((self.loaded[name] for name in model_names(model) if name in self.loaded), None)
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "ejected": self.ejected(),
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "ejections": self.ejections,
+            "model_loaded": entry is not None,
+            "expires_at": entry.get("expires_at") if entry else None,
+            "load_ms": self.load_ms,
+            "last_loaded_at": self.last_loaded_at,
+            "cold_starts": self.cold_starts,
+        }
+
+
+class BackendPool:
+    """Picks a backend per request and tracks their health."""
+
+    def __init__(self, urls: List[str] = None, affinity: float = None, health_interval: float = None,
+                 eject_after: int = None, eject_sec: float = None):
+        if not urls:
+            configured = os.getenv("SYNAPSE_OLLAMA_URLS") or os.getenv("SYNAPSE_OLLAMA_URL", "http://localhost:11434")
+            urls = configured.split(",")
+        self.backends = [Backend(url.strip()) for url in urls if url and url.strip()]
+        self.affinity = affinity if affinity is not None else float(os.getenv("SYNAPSE_OLLAMA_AFFINITY", "4"))
+        self.health_interval = health_interval if health_interval is not None else float(os.getenv("SYNAPSE_OLLAMA_HEALTH_INTERVAL_SEC", "15"))
+        self.eject_after = eject_after or int(os.getenv("SYNAPSE_OLLAMA_EJECT_AFTER", "3"))
+        self.eject_sec = eject_sec or float(os.getenv("SYNAPSE_OLLAMA_EJECT_SEC", "30"))
+        self.failovers = 0
+
+    def pick(self, model: str, exclude=(), prefer: str = None) -> Optional[Backend]:
+        """
+        The least loaded backend not in `exclude`, counting a missing model (or,
+        with `prefer`, a different backend than the preferred one) as `affinity`
+        extra requests. Healthy backends first, then ejected ones rather than
+        none. None once every backend is excluded.
+        """
+        now = time.time()
+        candidates = [b for b in self.backends if b not in exclude]
+        candidates = ([b for b in candidates if b.healthy and not b.ejected(now)]
+                      or [b for b in candidates if not b.ejected(now)]
+                      or candidates)
+        if not candidates:
+            return None
+
+        def cost(backend):
+            penalty = 0 if backend.has_model(model) else self.affinity
+            if prefer and backend.url != prefer:
+                penalty += self.affinity
+            return backend.outstanding + penalty
+
+        lowest = min(cost(b) for b in candidates)
+        return random.choice([b for b in candidates if cost(b) == lowest])
+
+    @contextmanager
+    def track(self, backend: Backend):
+        """Counts a request as outstanding on `backend` while it runs."""
+        backend.outstanding += 1
+        backend.requests += 1
+        try:
+            yield backend
+        finally:
+            backend.outstanding -= 1
+
+    def succeeded(self, backend: Backend, model: str):
+        backend.failures = 0
+        backend.healthy = True
+        backend.last_used_at = time.time()
+        if not backend.has_model(model):
+            backend.loaded[model] = {"name": model}
+
+    def failed(self, backend: Backend, error: BaseException):
+        backend.errors += 1
+        backend.failures += 1
+        if backend.failures >= self.eject_after and not backend.ejected():
+            backend.ejected_until = time.time() + self.eject_sec
+            backend.ejections += 1
+            print(f"🚫 Ollama backend {backend.url} ejected for {self.eject_sec:g}s ({error!r})")
+
+    async def check(self, client, timeout: float):
+        """Probes every backend's /api/ps: health, plus which models it has loaded."""
+        async def probe(backend):
+            try:
+                response = await client.get(f"{backend.url}/api/ps", timeout=timeout)
+                response.raise_for_status()
+                backend.loaded = {m.get("name"): m for m in response.json().get("models", [])}
+                if not backend.healthy or backend.ejected():
+                    print(f"✅ Ollama backend {backend.url} is back")
+                backend.healthy = True
+                backend.failures = 0
+                backend.ejected_until = 0.0
+            except Exception:
+                backend.healthy = False
+                backend.loaded = {}
+
+        await asyncio.gather(*(probe(b) for b in self.backends))
+
+    async def run_health_checks(self, client, timeout: float):
+        """Checks every backend now, then every `health_interval` seconds; status pages read the result."""
+        while self.health_interval > 0:
+            await self.check(client, timeout)
+            await asyncio.sleep(self.health_interval)
+
+    def stats(self, model: str) -> List[Dict[str, Any]]:
+        return [b.to_dict(model) for b in self.backends]
@@ -0,0 +1,242 @@
+"""On-disk cache of extracted text, keyed by file hash and parser version."""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional
+
+from app.core.vector_store import DEFAULT_DB_PATH
+
+HASH_BLOCK_BYTES = 1024 * 1024
+KEY_MEMO_SIZE = 64
+
+
+class ParseCache:
+    """Compressed page text of parsed files on disk, LRU-evicted to stay under `max_bytes`."""
+
+    def __init__(self, path: str = None, max_bytes: int = None):
+        self.path = path or os.path.join(DEFAULT_DB_PATH, "parse_cache")
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("SYNAPSE_PARSE_CACHE_MB", "1024")) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.path, "index.json")
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()   # key -> {pages, bytes, used}, oldest first
+        self._file_keys = weakref.WeakKeyDictionary()               # file object -> content hash
+        self._path_keys: "OrderedDict[tuple, str]" = OrderedDict()  # (path, size, mtime) -> content hash
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.path, exist_ok=True)
+        self._load_index()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.jsonl.gz")
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        for key, entry in sorted(saved.items(), key=lambda item: item[1].get("used", 0)):
+            if os.path.exists(self._entry_path(key)):
+                self._entries[key] = entry
+        # Leftovers from a crash mid-write or an index that lost track of them
+        for name in os.listdir(self.path):
+            if name.endswith(".tmp") or (name.endswith(".jsonl.gz") and name[:-len(".jsonl.gz")] not in self._entries):
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+        # The budget may have shrunk since the last run
+        self._evict()
+
+    def _save_index(self):
+        """Caller holds the lock."""
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.index_path)
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return sum(entry["bytes"] for entry in self._entries.values())
+
+    # ---- keys ----
+
+    def key_for(self, source, parser_version: str) -> str:
+        """Cache key of a file (path or binary file object) for the given parser."""
+        return f"{self._content_hash(source)}-{hashlib.sha1(parser_version.encode()).hexdigest()[:12]}"
+
+    def _content_hash(self, source) -> str:
+        # count_pages and iter_pages both ask for the key of the same file; hash it once
+        if isinstance(source, str):
+            stat = os.stat(source)
+            memo = (os.path.abspath(source), stat.st_size, stat.st_mtime_ns)
+            with self._lock:
+                digest = self._path_keys.get(memo)
+            if digest is None:
+                with open(source, "rb") as f:
+                    digest = self._hash_stream(f)
+                with self._lock:
+                    self._path_keys[memo] = digest
+                    while len(self._path_keys) > KEY_MEMO_SIZE:
+                        self._path_keys.popitem(last=False)
+            return digest
+        try:
+            with self._lock:
+                digest = self._file_keys.get(source)
+        except TypeError:
+            digest = None
+        if digest is None:
+            position = source.tell()
+            source.seek(0)
+            digest = self._hash_stream(source)
+            source.seek(position)
+            try:
+                with self._lock:
+                    self._file_keys[source] = digest
+            except TypeError:
+                pass
+        return digest
+
+    @staticmethod
+    def _hash_stream(f) -> str:
+        digest = hashlib.sha256()
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+        return digest.hexdigest()
+
+    # ---- reads ----
+
+    def page_count(self, key: str) -> Optional[int]:
+        """Pages stored under `key`, or None on a miss (doesn't count as a hit)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["pages"] if entry else None
+
+    def iter_pages(self, key: str) -> Optional[Iterator[str]]:
+        """Generator over the cached pages, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry["used"] = time.time()
+            self._entries.move_to_end(key)
+            try:
+                f = gzip.open(self._entry_path(key), "rt", encoding="utf-8")
+            except OSError:
+                # Removed behind our back: treat as a miss
+                del self._entries[key]
+                self.hits -= 1
+                self.misses += 1
+                return None
+        return self._read(f)
+
+    @staticmethod
+    def _read(f) -> Iterator[str]:
+        with f:
+            for line in f:
+                yield json.loads(line)
+
+    # ---- writes ----
+
+    def writer(self, key: str) -> "CacheWriter":
+        return CacheWriter(self, key)
+
+    def _publish(self, key: str, tmp_path: str, pages: int):
+        size = os.path.getsize(tmp_path)
+        if size > self.max_bytes:
+            os.remove(tmp_path)
+            return
+        os.replace(tmp_path, self._entry_path(key))
+        with self._lock:
+            self._entries[key] = {"pages": pages, "bytes": size, "used": time.time()}
+            self._entries.move_to_end(key)
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        """Drops least recently used entries until the cache fits. Caller holds the lock."""
+        total = sum(entry["bytes"] for entry in self._entries.values())
+        while total > self.max_bytes and self._entries:
+            key, entry = self._entries.popitem(last=False)
+            total -= entry["bytes"]
+            self.evictions += 1
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    os.remove(self._entry_path(key))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._save_index()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": sum(e["bytes"] for e in self._entries.values()),
+                    "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions}
+
+
+class CacheWriter:
+    """Streams pages into a temp entry; commit() publishes it, abort() throws it away."""
+
+    def __init__(self, cache: ParseCache, key: str):
+        self.cache = cache
+        self.key = key
+        self.pages = 0
+        self.tmp_path = os.path.join(cache.path, f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        self._file = gzip.open(self.tmp_path, "wt", encoding="utf-8", compresslevel=6)
+
+    def add(self, page: str):
+        self._file.write(json.dumps(page) + "\n")
+        self.pages += 1
+
+    def commit(self):
+        self._file.close()
+        try:
+            self.cache._publish(self.key, self.tmp_path, self.pages)
+        except OSError as e:
+            print(f"⚠️ Could not cache parsed text: {e}")
+            self.abort()
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+_parse_cache = None
+_parse_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """Process-wide cache, created on first use; None when SYNAPSE_PARSE_CACHE_MB is 0."""
+    global _parse_cache
+    with _parse_cache_lock:
+        if _parse_cache is None:
+            if float(os.getenv("SYNAPSE_PARSE_CACHE_MB", "1024")) <= 0:
+                return None
+            try:
+                _parse_cache = ParseCache()
+            except OSError as e:
+                print(f"⚠️ Parsed-text cache disabled: {e}")
+                return None
+        return _parse_cache
@@ -0,0 +1,716 @@
+"""Streaming document parsers, looked up by file extension or MIME type."""
+
+import io
+import os
+import re
+import csv
+import json
+import codecs
+import mmap
+import signal
+import zipfile
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from html.parser import HTMLParser
+from xml.etree.ElementTree import iterparse
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import pypdf
+
+# Parsers hand the pipeline pieces of about this many characters
+BLOCK_CHARS = 1024 * 1024
+READ_CHARS = 64 * 1024
+SNIFF_BYTES = 8192
+# Strings this long with no whitespace are blobs (base64, hashes), not prose
+BLOB_CHARS = 256
+BLOB = re.compile(r"^[A-Za-z0-9+/=_\-:;,.]+$")
+
+TEXT_EXTENSIONS = (".txt", ".md", ".markdown", ".rst", ".log")
+TEXT_BLOCK_BYTES = 1024 * 1024   # text files stream through the pipeline in blocks of this size
+
+# PDF pages are extracted in a process pool, a page range per task
+PDF_WORKERS = int(os.getenv("SYNAPSE_PDF_WORKERS", str(min(os.cpu_count() or 1, 8))))
+PDF_PAGE_TIMEOUT_SEC = float(os.getenv("SYNAPSE_PDF_PAGE_TIMEOUT_SEC", "30"))
+PDF_MAX_RANGE_PAGES = 32
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+class UnsupportedFormat(ValueError):
+    """No parser can read this file (maps to HTTP 415)."""
+
+
+def looks_binary(head: bytes) -> bool:
+    """Cheap check on the first bytes of a file: NULs or mostly control characters."""
+    if not head:
+        return False
+    if b"\x00" in head:
+        return True
+    control = sum(1 for byte in head if byte < 32 and byte not in (9, 10, 12, 13, 27))
+    return control / len(head) > 0.1
+
+
+def read_head(source, size: int = SNIFF_BYTES) -> bytes:
+    """First `size` bytes of a path or file object (the file position is restored)."""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read(size)
+    position = source.tell()
+    source.seek(0)
+    head = source.read(size)
+    source.seek(position)
+    return head
+
+
+@contextmanager
+def open_binary(source):
+    """Rewound binary file for a path or file object; only files opened here are closed."""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            yield f
+    else:
+        source.seek(0)
+        yield source
+
+
+@contextmanager
+def open_text(source):
+    """UTF-8 text view of a path or file object; undecodable bytes become U+FFFD."""
+    with open_binary(source) as f:
+        text = io.TextIOWrapper(f, encoding="utf-8-sig", errors="replace", newline="")
+        try:
+            yield text
+        finally:
+            # Don't let the wrapper close a file object we were handed
+            text.detach()
+
+
+def _blocks(lines: Iterator[str], size: int = BLOCK_CHARS) -> Iterator[str]:
+    """Joins lines into blocks of about `size` characters."""
+    block, length = [], 0
+    for line in lines:
+        block.append(line)
+        length += len(line) + 1
+        if length >= size:
+            yield "\n".join(block)
+            block, length = [], 0
+    if block:
+        yield "\n".join(block)
+
+
+class Parser:
+    """
+    Base parser. Subclasses set `name`, `extensions` and `mime_types` and
+    implement iter_pages. `version` is part of the parse cache key; bump it
+    when the extracted text changes. `cacheable` parsers are slow enough that
+    FileIngester keeps their output in the parse cache.
+    """
+
+    name = "base"
+    extensions: tuple = ()
+    mime_types: tuple = ()
+    version = "1"
+    cacheable = False
+
+    def accepts(self, head: bytes) -> bool:
+        """False if the first bytes show the file isn't this format (text formats: not binary)."""
+        return not looks_binary(head)
+
+    def count(self, source) -> Optional[int]:
+        """How many pieces iter_pages will yield, if that's cheap to know; None otherwise."""
+        return None
+
+    def iter_pages(self, source, skipped: List[int] = None) -> Iterator[str]:
+        """Yields the file's text piece by piece; indices of pieces that failed go to `skipped`."""
+        raise NotImplementedError
+
+
+class ParserRegistry:
+    """Parsers by extension and MIME type."""
+
+    def __init__(self):
+        self._by_extension: Dict[str, Parser] = {}
+        self._by_mime: Dict[str, Parser] = {}
+
+    def register(self, parser: Parser) -> Parser:
+        for extension in parser.extensions:
+            self._by_extension[extension.lower()] = parser
+        for mime in parser.mime_types:
+            self._by_mime[mime.lower()] = parser
+        return parser
+
+    def for_file(self, filename: str, content_type: Optional[str] = None) -> Optional[Parser]:
+        """The parser for a file name's extension, else for its MIME type, else None."""
+        extension = os.path.splitext(filename or "")[1].lower()
+        if extension in self._by_extension:
+            return self._by_extension[extension]
+        if content_type:
+            return self._by_mime.get(content_type.split(";")[0].strip().lower())
+        return None
+
+    def extensions(self) -> List[str]:
+        return sorted(self._by_extension)
+
+
+registry = ParserRegistry()
+
+
+class HtmlParser(Parser):
+    name = "html"
+    extensions = (".html", ".htm", ".xhtml")
+    mime_types = ("text/html", "application/xhtml+xml")
+
+    SKIP = {"script", "style", "noscript", "svg", "template", "object", "iframe"}
+    BREAKS = {"p", "div", "br", "li", "tr", "table", "section", "article", "header", "footer", "blockquote",
+              "pre", "h1", "h2", "h3", "h4", "h5", "h6", "dt", "dd", "hr", "title"}
+
+    class _Extractor(HTMLParser):
+        def __init__(self):
+            super().__init__(convert_charrefs=True)
+            self.parts = []
+            self.skipping = 0
+
+        def handle_starttag(self, tag, attrs):
+            if tag in HtmlParser.SKIP:
+                self.skipping += 1
+            elif tag in HtmlParser.BREAKS:
+                self.parts.append("\n")
+
+        def handle_endtag(self, tag):
+            if tag in HtmlParser.SKIP:
+                self.skipping = max(0, self.skipping - 1)
+            elif tag in HtmlParser.BREAKS:
+                self.parts.append("\n")
+
+        def handle_data(self, data):
+            if not self.skipping:
+                self.parts.append(data)
+
+        def take(self) -> str:
+            text = "".join(self.parts)
+            self.parts = []
+            return re.sub(r"\n\s*\n+", "\n\n", re.sub(r"[ \t\r\f\v]+", " ", text))
+
+    def iter_pages(self, source, skipped=None):
+        extractor = self._Extractor()
+        pending = 0
+        with open_text(source) as f:
+            for data in iter(lambda: f.read(READ_CHARS), ""):
+                extractor.feed(data)
+                pending += len(data)
+                if pending >= BLOCK_CHARS:
+                    text = extractor.take()
+                    pending = 0
+                    if text.strip():
+                        yield text
+        extractor.close()
+        text = extractor.take()
+        if text.strip():
+            yield text
+
+
+def _flatten(value, path: str = "") -> Iterator[str]:
+    """'a.b[0]: value' lines for the leaves of a JSON value; blob-like strings are skipped."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{path}.{key}" if path else str(key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _flatten(item, f"{path}[{index}]")
+    elif isinstance(value, str):
+        if len(value) >= BLOB_CHARS and BLOB.match(value):
+            return
+        if value.strip():
+            yield f"{path}: {value}" if path else value
+    elif value is not None:
+        yield f"{path}: {json.dumps(value)}" if path else json.dumps(value)
+
+
+class JsonParser(Parser):
+    name = "json"
+    extensions = (".json",)
+    mime_types = ("application/json",)
+
+    def iter_pages(self, source, skipped=None):
+        with open_text(source) as f:
+            if self._is_lines(f):
+                yield from _blocks(self._iter_lines(f))
+            else:
+                yield from _blocks(self._iter_document(f))
+
+    @staticmethod
+    def _is_lines(f) -> bool:
+        """A .json file that is really JSON Lines: the first line is a complete value and more follows."""
+        first = f.readline(READ_CHARS)
+        rest = f.read(1)
+        f.seek(0)
+        try:
+            json.loads(first)
+        except ValueError:
+            return False
+        return bool(rest.strip())
+
+    @staticmethod
+    def _iter_lines(f) -> Iterator[str]:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            yield "\n".join(_flatten(record, f"[{number}]" if not isinstance(record, dict) else ""))
+            yield ""
+
+    @staticmethod
+    def _iter_document(f) -> Iterator[str]:
+        """
+        Decodes a top-level array or object one element at a time, so a huge
+        JSON export is never parsed (or held) as one Python value.
+        """
+        decoder = json.JSONDecoder()
+        buffer = ""
+        position = 0
+        eof = False
+
+        def fill(minimum: int = 1) -> bool:
+            nonlocal buffer, position, eof
+            if eof:
+                return False
+            # Read at least as much as is buffered, so retries on a big element stay linear
+            data = f.read(max(READ_CHARS, len(buffer) - position, minimum))
+            buffer = buffer[position:] + data
+            position = 0
+            eof = not data
+            return bool(data)
+
+        def skip(chars: str):
+            nonlocal position
+            while True:
+                while position < len(buffer) and (buffer[position].isspace() or buffer[position] in chars):
+                    position += 1
+                if position < len(buffer) or not fill():
+                    return
+
+        def decode():
+            nonlocal position
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                    # A number at the end of the buffer may continue in the next read
+                    if end < len(buffer) or eof:
+                        position = end
+                        return value
+                except ValueError:
+                    if eof:
+                        raise
+                fill()
+
+        skip("")
+        if position >= len(buffer):
+            return
+        opener = buffer[position]
+        if opener not in "[{":
+            yield from _flatten(decode())
+            return
+        position += 1
+        index = 0
+        while True:
+            skip(",")
+            if position >= len(buffer) or buffer[position] in "]}":
+                return
+            if opener == "{":
+                key = decode()
+                skip(":")
+                yield from _flatten(decode(), str(key))
+            else:
+                yield from _flatten(decode(), f"[{index}]")
+            index += 1
+
+
+class JsonLinesParser(JsonParser):
+    name = "jsonl"
+    extensions = (".jsonl", ".ndjson")
+    mime_types = ("application/x-ndjson", "application/jsonl")
+
+    def iter_pages(self, source, skipped=None):
+        with open_text(source) as f:
+            yield from _blocks(self._iter_lines(f))
+
+
+class CsvParser(Parser):
+    name = "csv"
+    extensions = (".csv", ".tsv")
+    mime_types = ("text/csv", "text/tab-separated-values")
+
+    def iter_pages(self, source, skipped=None):
+        with open_text(source) as f:
+            sample = f.read(SNIFF_BYTES)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",\t;|")
+            except csv.Error:
+                dialect = csv.excel_tab if "\t" in sample and "," not in sample else csv.excel
+            rows = csv.reader(f, dialect)
+            header = next(rows, None)
+            if header is None:
+                return
+            header = [column.strip() or f"column{i + 1}" for i, column in enumerate(header)]
+            yield from _blocks(self._records(header, rows))
+
+    @staticmethod
+    def _records(header: List[str], rows) -> Iterator[str]:
+        for row in rows:
+            cells = []
+            for i, value in enumerate(row):
+                value = value.strip()
+                if not value or (len(value) >= BLOB_CHARS and BLOB.match(value)):
+                    continue
+                cells.append(f"{header[i] if i < len(header) else f'column{i + 1}'}: {value}")
+            if cells:
+                yield "; ".join(cells)
+
+
+class DocxParser(Parser):
+    name = "docx"
+    extensions = (".docx",)
+    mime_types = ("application/vnd.openxmlformats-officedocument.wordprocessingml.document",)
+    cacheable = True
+
+    W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+    def accepts(self, head: bytes) -> bool:
+        return head.startswith(b"PK\x03\x04")
+
+    def iter_pages(self, source, skipped=None):
+        with open_binary(source) as f:
+            try:
+                archive = zipfile.ZipFile(f)
+            except zipfile.BadZipFile as e:
+                raise UnsupportedFormat(f"Not a valid .docx file: {e}")
+            with archive:
+                try:
+                    document = archive.open("word/document.xml")
+                except KeyError:
+                    raise UnsupportedFormat("Not a valid .docx file: no word/document.xml")
+                with document:
+                    yield from _blocks(self._paragraphs(document))
+
+    def _paragraphs(self, document) -> Iterator[str]:
+        paragraph, text, tab, br = self.W + "p", self.W + "t", self.W + "tab", self.W + "br"
+        parts = []
+        for event, element in iterparse(document, events=("end",)):
+            tag = element.tag
+            if tag == text:
+                parts.append(element.text or "")
+            elif tag == tab:
+                parts.append("\t")
+            elif tag == br:
+                parts.append("\n")
+            elif tag == paragraph:
+                line = "".join(parts).strip()
+                parts = []
+                element.clear()
+                if line:
+                    yield line
+
+
+class CodeParser(Parser):
+    name = "code"
+    extensions = (".py", ".js", ".jsx", ".ts", ".tsx", ".java", ".kt", ".go", ".rs", ".c", ".h", ".cc",
+                  ".cpp", ".hpp", ".cs", ".rb", ".php", ".swift", ".scala", ".sh", ".sql", ".r", ".lua",
+                  ".yaml", ".yml", ".toml", ".ini", ".cfg")
+    mime_types = ("text/x-python", "text/javascript", "application/javascript", "text/x-java-source",
+                  "text/x-c", "text/x-go", "text/x-rust", "text/x-shellscript", "application/x-yaml")
+
+    def iter_pages(self, source, skipped=None):
+        """Blocks of about BLOCK_CHARS, cut only before an unindented line (a top-level definition)."""
+        block, length = [], 0
+        with open_text(source) as f:
+            for line in f:
+                if length >= BLOCK_CHARS and line.strip() and not line[0].isspace():
+                    yield "".join(block)
+                    block, length = [], 0
+                block.append(line)
+                length += len(line)
+        if block:
+            yield "".join(block)
+
+
+class PageTimeout(Exception):
+    """A PDF page took longer than the per-page timeout to extract."""
+
+
+def _on_page_alarm(signum, frame):
+    raise PageTimeout()
+
+
+def _extract_page_range(source, start: int, end: int, page_timeout: float):
+    """
+    Process-pool task: text of pages [start, end) of a PDF given as a path or bytes.
+    Returns (pages, skipped); a page that fails or runs past `page_timeout`
+    comes back as "" so one pathological page never sinks the whole file.
+    """
+    reader = pypdf.PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+    # SIGALRM only exists on POSIX; elsewhere the parent's per-range timeout is the backstop
+    use_alarm = bool(page_timeout) and hasattr(signal, "setitimer")
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _on_page_alarm)
+    pages, skipped = [], []
+    try:
+        for number in range(start, end):
+            text = ""
+            try:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, page_timeout)
+                text = reader.pages[number].extract_text() or ""
+            except PageTimeout:
+                skipped.append((number, f"took over {page_timeout:g}s"))
+            except Exception as e:
+                skipped.append((number, str(e)))
+            finally:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            pages.append(text)
+    finally:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, previous)
+    return pages, skipped
+
+
+def _new_pdf_pool() -> ProcessPoolExecutor:
+    # Never fork: the server is multi-threaded by the time PDFs arrive (locks held
+    # by other threads would be copied locked). Workers start from a clean
+    # interpreter and import only this module.
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context(method))
+
+
+def start_pdf_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Creates the shared PDF extraction pool. Call once at startup; until then
+    (and with SYNAPSE_PDF_WORKERS=0) PDFs are parsed in-process.
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None and PDF_WORKERS > 0:
+            _pdf_pool = _new_pdf_pool()
+        return _pdf_pool
+
+
+def stop_pdf_pool():
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+
+def _restart_pdf_pool(stale: ProcessPoolExecutor) -> Optional[ProcessPoolExecutor]:
+    """
+    Replaces `stale` (a worker hung past its timeout, or died) with a fresh
+    pool, unless another thread already did; returns the current pool.
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is stale and stale is not None:
+            stale.shutdown(wait=False, cancel_futures=True)
+            # Python 3.14+: also kill the hung worker instead of letting it run on
+            terminate = getattr(stale, "terminate_workers", None)
+            if terminate:
+                terminate()
+            _pdf_pool = _new_pdf_pool()
+        return _pdf_pool
+
+
+def _pdf_worker_source(source):
+    """What a worker process can open: a path, the bytes of an in-memory spool, or None."""
+    if isinstance(source, str):
+        return source
+    name = getattr(source, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name
+    if not getattr(source, "on_disk", True):
+        # An upload spool still in RAM, so bounded by the upload memory ceiling
+        source.seek(0)
+        data = source.read()
+        source.seek(0)
+        return data
+    return None
+
+
+class PdfParser(Parser):
+    name = "pdf"
+    extensions = (".pdf",)
+    mime_types = ("application/pdf",)
+    # Cached text is re-parsed after a pypdf upgrade
+    version = f"pypdf-{pypdf.__version__}/1"
+    cacheable = True
+
+    def accepts(self, head: bytes) -> bool:
+        # The header may follow a little junk, but must be within the first KB
+        return b"%PDF-" in head[:1024]
+
+    def count(self, source) -> int:
+        total = len(pypdf.PdfReader(source).pages)
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return total
+
+    def iter_pages(self, source, skipped=None):
+        """
+        Yields PDF pages in order while the process pool extracts page ranges in
+        parallel. Only a few ranges are in flight at a time, so a slow consumer
+        doesn't pile up the text of the whole document. Page numbers that came
+        back empty because they failed or timed out are appended to `skipped`.
+        """
+        skipped = [] if skipped is None else skipped
+        with _pdf_pool_lock:
+            pool = _pdf_pool
+        worker_source = _pdf_worker_source(source) if pool else None
+        if worker_source is None:
+            # pypdf seeks within the file object / path directly
+            for page in pypdf.PdfReader(source).pages:
+                yield page.extract_text() or ""
+            return
+
+        reader = pypdf.PdfReader(io.BytesIO(worker_source) if isinstance(worker_source, bytes) else worker_source)
+        total = len(reader.pages)
+        span = max(1, min(PDF_MAX_RANGE_PAGES, -(-total // (PDF_WORKERS * 4))))
+        ranges = deque((start, min(start + span, total)) for start in range(0, total, span))
+        pending = deque()
+
+        def fill():
+            while ranges and len(pending) < PDF_WORKERS * 2:
+                start, end = ranges.popleft()
+                pending.append(((start, end), pool.submit(
+                    _extract_page_range, worker_source, start, end, PDF_PAGE_TIMEOUT_SEC)))
+
+        def requeue():
+            # Ranges still waiting on the old pool go back to the front, in order
+            while pending:
+                page_range, stale = pending.pop()
+                stale.cancel()
+                ranges.appendleft(page_range)
+
+        try:
+            fill()
+            while pending:
+                (start, end), future = pending.popleft()
+                # Backstop where SIGALRM isn't available: give up on the whole range
+                timeout = PDF_PAGE_TIMEOUT_SEC * (end - start) + 30 if PDF_PAGE_TIMEOUT_SEC else None
+                try:
+                    pages, failed = future.result(timeout=timeout)
+                except FutureTimeout:
+                    # The worker is stuck and would hold its slot forever: replace the pool
+                    print(f"⚠️ PDF pages {start + 1}-{end} timed out; restarting the PDF worker pool.")
+                    pages, failed = [""] * (end - start), [(n, "range timed out") for n in range(start, end)]
+                    requeue()
+                    pool = _restart_pdf_pool(pool)
+                except CancelledError:
+                    # Another file's timeout replaced the pool: retry from this range on the new one
+                    pages, failed = [], []
+                    requeue()
+                    ranges.appendleft((start, end))
+                    pool = _restart_pdf_pool(pool)
+                except BrokenProcessPool as e:
+                    # A worker died (e.g. OOM on a huge page): finish this file in-process
+                    print(f"⚠️ PDF worker pool broke ({e}); extracting the rest in-process.")
+                    pages, failed = [], []
+                    requeue()
+                    ranges.appendleft((start, end))
+                    _restart_pdf_pool(pool)
+                    pool = None
+                for number, reason in failed:
+                    skipped.append(number)
+                    print(f"⏭️ Skipped PDF page {number + 1}: {reason}")
+                yield from pages
+                if pool is None:
+                    # Broken, or stopped during shutdown
+                    for first, last in ranges:
+                        for number in range(first, last):
+                            yield reader.pages[number].extract_text() or ""
+                    return
+                fill()
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def _text_size(source) -> int:
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    position = source.tell()
+    size = source.seek(0, os.SEEK_END)
+    source.seek(position)
+    return size
+
+
+def _split_blocks(blocks):
+    # Like open_text: a stray Latin-1 byte becomes U+FFFD rather than failing the file
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    carry = b""
+    pending = None
+    for block in blocks:
+        if pending is not None:
+            yield pending
+        data = carry + block
+        # ASCII whitespace never occurs inside a multi-byte UTF-8 sequence
+        cut = max(data.rfind(c) for c in (b" ", b"\n", b"\t", b"\r", b"\x0b", b"\x0c"))
+        if cut < 0:
+            carry, pending = data, ""
+        else:
+            carry, pending = data[cut + 1:], decoder.decode(data[:cut + 1])
+    if pending is not None:
+        yield pending + decoder.decode(carry, final=True)
+
+
+class TextParser(Parser):
+    name = "text"
+    extensions = TEXT_EXTENSIONS
+    mime_types = ("text/plain", "text/markdown", "text/x-rst")
+
+    def count(self, source) -> int:
+        return max(1, -(-_text_size(source) // TEXT_BLOCK_BYTES))
+
+    def iter_pages(self, source, skipped=None):
+        """
+        Yields UTF-8 text in TEXT_BLOCK_BYTES blocks (straight from a memory map
+        when the data is on disk), so a huge text file is never one big string.
+        Blocks end on whitespace; a word straddling the cut moves to the next block.
+        Always yields ceil(size / TEXT_BLOCK_BYTES) blocks, matching count().
+        """
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                yield from self.iter_pages(f)
+            return
+        fileno = None
+        # An upload spool still in RAM has no file descriptor to map
+        if getattr(source, "on_disk", True):
+            try:
+                fileno = source.fileno()
+            except (AttributeError, io.UnsupportedOperation):
+                fileno = None
+        size = _text_size(source)
+        if fileno is not None and size > 0:
+            with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+                blocks = (mapped[start:start + TEXT_BLOCK_BYTES] for start in range(0, size, TEXT_BLOCK_BYTES))
+                yield from _split_blocks(blocks)
+        else:
+            blocks = iter(lambda: source.read(TEXT_BLOCK_BYTES), b"")
+            yielded = 0
+            for text in _split_blocks(blocks):
+                yielded += 1
+                yield text
+            if not yielded:
+                yield ""
+
+
+for _parser in (HtmlParser(), JsonParser(), JsonLinesParser(), CsvParser(), DocxParser(), CodeParser(),
+                PdfParser(), TextParser()):
+    registry.register(_parser)
@@ -0,0 +1,120 @@
+"""Generator stages on their own threads, connected by bounded queues."""
+
+import queue
+import threading
+from typing import Callable, Iterable, Iterator
+
+_END = object()
+
+
+class PipelineStopped(Exception):
+    """Internal: a stage was told to stop because another stage failed or the consumer left."""
+
+
+class Pipeline:
+    """Generator stages on worker threads, linked by queues of at most `maxsize` items."""
+
+    def __init__(self, source: Iterable, maxsize: int = 8, name: str = "pipeline"):
+        self.source = source
+        self.maxsize = maxsize
+        self.name = name
+        self._stages = []            # (transform, name, maxsize)
+        self._stop = threading.Event()
+        self._error = None
+        self._error_lock = threading.Lock()
+
+    def then(self, transform: Callable[[Iterator], Iterable], name: str = None, maxsize: int = None) -> "Pipeline":
+        """Adds a stage: `transform` consumes the previous stage's items and yields its own."""
+        self._stages.append((transform, name or f"stage{len(self._stages) + 1}", maxsize or self.maxsize))
+        return self
+
+    def _fail(self, error: BaseException):
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _put(self, out: queue.Queue, item):
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                out.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _drain(self, inbox: queue.Queue) -> Iterator:
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _END:
+                return
+            yield item
+
+    def _pump(self, items: Iterable, out: queue.Queue):
+        """Runs one stage to completion on its thread, always ending its output queue."""
+        try:
+            for item in items:
+                self._put(out, item)
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            close = getattr(items, "close", None)
+            if close:
+                close()
+            # Unblocks the next stage even when this one failed
+            try:
+                self._put(out, _END)
+            except PipelineStopped:
+                pass
+
+    def __iter__(self) -> Iterator:
+        inbox = queue.Queue(maxsize=self.maxsize)
+        threads = [threading.Thread(target=self._pump, args=(iter(self.source), inbox),
+                                    name=f"{self.name}-source", daemon=True)]
+        for transform, name, maxsize in self._stages:
+            outbox = queue.Queue(maxsize=maxsize)
+            threads.append(threading.Thread(target=self._pump, args=(transform(self._drain(inbox)), outbox),
+                                            name=f"{self.name}-{name}", daemon=True))
+            inbox = outbox
+        for thread in threads:
+            thread.start()
+
+        try:
+            for item in self._drain(inbox):
+                yield item
+        except PipelineStopped:
+            pass
+        finally:
+            # Consumer finished, failed or walked away: release every stage
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def run(self) -> int:
+        """Drains the pipeline, discarding outputs; returns how many came out of the last stage."""
+        count = 0
+        for _ in self:
+            count += 1
+        return count
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """Groups a stream into lists of up to `size` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
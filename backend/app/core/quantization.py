@@ -0,0 +1,414 @@
+"""Compressed in-RAM vector codes (sq8, pq<M>) with exact re-scoring from the flat store."""
+
+import os
+import re
+import threading
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from app.core.vector_store import FlatVectorStore
+
+
+class ScalarQuantizer:
+    """Per-dimension min/max int8 quantizer. Codes are stored as uint8."""
+
+    def __init__(self):
+        self.code_size = None
+        self.offset = None
+        self.scale = None
+
+    @property
+    def trained(self):
+        return self.scale is not None
+
+    def train(self, vectors: np.ndarray):
+        self.offset = vectors.min(axis=0).astype(np.float32)
+        span = vectors.max(axis=0) - self.offset
+        self.scale = np.maximum(span / 255.0, 1e-12).astype(np.float32)
+        self.code_size = vectors.shape[1]
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self.offset) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def approx_distances(self, query: np.ndarray, query_norm: float, codes: np.ndarray, norms: np.ndarray) -> np.ndarray:
+        # x ~ offset + scale * code  =>  q.x ~ q.offset + (q * scale).code
+        dots = codes.astype(np.float32) @ (query * self.scale) + float(query @ self.offset)
+        return norms - 2.0 * dots + query_norm
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"offset": self.offset, "scale": self.scale}
+
+    def load_state(self, state):
+        self.offset = state["offset"]
+        self.scale = state["scale"]
+        self.code_size = len(self.offset)
+
+
+class ProductQuantizer:
+    """
+    Splits each vector into M sub-vectors and replaces each with the id of its
+    nearest of 256 k-means centroids. Distances use asymmetric lookup tables.
+    """
+
+    KSUB = 256
+
+    def __init__(self, m: int, iterations: int = 15, seed: int = 0):
+        self.m = m
+        self.code_size = m
+        self.iterations = iterations
+        self.seed = seed
+        self.codebooks = None   # [M, 256, dsub]
+
+    @property
+    def trained(self):
+        return self.codebooks is not None
+
+    def train(self, vectors: np.ndarray):
+        dim = vectors.shape[1]
+        if dim % self.m:
+            raise ValueError(f"PQ needs the dimension ({dim}) to be divisible by M ({self.m})")
+        dsub = dim // self.m
+        ksub = min(self.KSUB, len(vectors))
+        rng = np.random.default_rng(self.seed)
+
+        codebooks = np.zeros((self.m, self.KSUB, dsub), dtype=np.float32)
+        for sub in range(self.m):
+            data = vectors[:, sub * dsub:(sub + 1) * dsub]
+            centroids = data[rng.choice(len(data), ksub, replace=False)].copy()
+            for _ in range(self.iterations):
+                assign = self._nearest(data, centroids)
+                counts = np.bincount(assign, minlength=ksub)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, data)
+                filled = counts > 0
+                centroids[filled] = sums[filled] / counts[filled, None]
+                # Re-seed empty clusters from random points so every code stays useful
+                empty = np.flatnonzero(~filled)
+                if len(empty):
+                    centroids[empty] = data[rng.choice(len(data), len(empty))]
+            codebooks[sub, :ksub] = centroids
+            if ksub < self.KSUB:
+                codebooks[sub, ksub:] = centroids[0]
+        self.codebooks = codebooks
+
+    @staticmethod
+    def _nearest(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        dists = (np.einsum("ij,ij->i", centroids, centroids)[None, :] - 2.0 * data @ centroids.T)
+        return dists.argmin(axis=1)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        dsub = self.codebooks.shape[2]
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for sub in range(self.m):
+            codes[:, sub] = self._nearest(vectors[:, sub * dsub:(sub + 1) * dsub], self.codebooks[sub])
+        return codes
+
+    def approx_distances(self, query: np.ndarray, query_norm: float, codes: np.ndarray, norms: np.ndarray) -> np.ndarray:
+        # Lookup table [M, 256]: squared distance from each query sub-vector to each centroid
+        dsub = self.codebooks.shape[2]
+        sub_queries = query.reshape(self.m, 1, dsub)
+        table = ((self.codebooks - sub_queries) ** 2).sum(axis=2)
+        return table[np.arange(self.m), codes].sum(axis=1)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"codebooks": self.codebooks}
+
+    def load_state(self, state):
+        self.codebooks = state["codebooks"]
+        self.m = self.codebooks.shape[0]
+        self.code_size = self.m
+
+
+def make_quantizer(level: str):
+    """'sq8' -> ScalarQuantizer, 'pq48' -> ProductQuantizer(m=48)."""
+    if level == "sq8":
+        return ScalarQuantizer()
+    match = re.fullmatch(r"pq(\d+)", level or "")
+    if match:
+        return ProductQuantizer(m=int(match.group(1)))
+    raise ValueError(f"Unknown quantization level '{level}'. Use 'sq8' or 'pq<M>' (e.g. pq48).")
+
+
+class QuantizedVectorStore(FlatVectorStore):
+    """
+    FlatVectorStore that scans compressed codes held in RAM and re-scores
+    only the top `k * rescore_factor` candidates against the full-precision
+    vectors on disk.
+
+    Extra files next to the flat layout:
+        quantizer.<level>.npz - trained quantizer parameters
+        codes.<level>.u8      - one code row per vector row, append-only
+    """
+
+    BLOCK_ROWS = 65536
+    MIN_TRAIN_ROWS = 1024
+
+    def __init__(self, path: str, collection_name: str, level: str = "sq8",
+                 rescore_factor: int = 8, train_size: int = 20000):
+        self.level = level
+        self.name = f"flat+{level}"
+        self.quantizer = make_quantizer(level)
+        self.rescore_factor = rescore_factor
+        self.train_size = train_size
+        self._codes = None
+        self._code_rows = 0
+        self._compactions = 0
+        self._training = None    # background thread of the first training, once started
+        super().__init__(path, collection_name)
+
+        self.quantizer_path = os.path.join(self.dir, f"quantizer.{level}.npz")
+        self.codes_path = os.path.join(self.dir, f"codes.{level}.u8")
+        if os.path.exists(self.quantizer_path):
+            with np.load(self.quantizer_path) as state:
+                self.quantizer.load_state(dict(state))
+            self._load_codes()
+        else:
+            self._start_training()
+
+    # --- Codes ---
+
+    def _start_training(self):
+        """
+        Starts train() in a background thread once MIN_TRAIN_ROWS exist (caller
+        holds the lock). Until it finishes, searches are exact.
+        """
+        if self._training is not None or int(self._alive.sum()) < self.MIN_TRAIN_ROWS:
+            return
+        self._training = threading.Thread(target=self._train_in_background, name=f"train-{self.level}", daemon=True)
+        self._training.start()
+
+    def _train_in_background(self):
+        try:
+            self.train()
+        except Exception as e:
+            # Not retried until the store is reopened; searches stay exact meanwhile
+            print(f"⚠️ Training the {self.level} quantizer failed: {e}")
+
+    def train(self) -> bool:
+        """
+        Fits a new quantizer on a random sample of the stored vectors and encodes
+        every row with it. K-means runs outside the store lock and encoding takes
+        it one block at a time, so adds and searches carry on meanwhile.
+        Returns False if there are fewer than MIN_TRAIN_ROWS vectors.
+        """
+        with self._lock:
+            live_rows = np.flatnonzero(self._alive)
+            if len(live_rows) < self.MIN_TRAIN_ROWS:
+                return False
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(live_rows, min(self.train_size, len(live_rows)), replace=False))
+            vectors = np.array(self._vectors[sample])
+        quantizer = make_quantizer(self.level)
+        quantizer.train(vectors)
+
+        codes, rows, compactions = [], 0, None
+        while True:
+            with self._lock:
+                if compactions != self._compactions:
+                    # Rows were renumbered: encode from the start
+                    codes, rows, compactions = [], 0, self._compactions
+                end = min(rows + self.BLOCK_ROWS, self.size)
+                codes.append(quantizer.encode(np.asarray(self._vectors[rows:end])))
+                rows = end
+                if rows >= self.size:
+                    self._install(quantizer, np.concatenate(codes))
+                    print(f"🗜️ Trained {self.level} quantizer on {len(sample)} vectors.")
+                    return True
+
+    def _install(self, quantizer, codes: np.ndarray):
+        """Swaps in a trained quantizer with codes for every row (caller holds the lock)."""
+        self.quantizer = quantizer
+        np.savez(self.quantizer_path, **quantizer.state())
+        if os.path.exists(self.codes_path):
+            os.remove(self.codes_path)
+        self._codes = np.zeros((0, quantizer.code_size), dtype=np.uint8)
+        self._code_rows = 0
+        self._append_codes(codes)
+
+    def _load_codes(self):
+        code_size = self.quantizer.code_size
+        if os.path.exists(self.codes_path):
+            raw = np.fromfile(self.codes_path, dtype=np.uint8)
+            rows = min(len(raw) // code_size, self.size)
+            self._codes = raw[:rows * code_size].reshape(rows, code_size).copy()
+        else:
+            self._codes = np.zeros((0, code_size), dtype=np.uint8)
+        self._code_rows = len(self._codes)
+        self._encode_tail()
+
+    def _encode_tail(self):
+        """Encodes rows present in the vector file but missing from the codes file."""
+        if self._code_rows >= self.size:
+            return
+        new_codes = []
+        for start in range(self._code_rows, self.size, self.BLOCK_ROWS):
+            block = np.asarray(self._vectors[start:min(start + self.BLOCK_ROWS, self.size)])
+            new_codes.append(self.quantizer.encode(block))
+        self._append_codes(np.concatenate(new_codes))
+
+    def _append_codes(self, codes: np.ndarray):
+        with open(self.codes_path, "r+b" if os.path.exists(self.codes_path) else "wb") as f:
+            f.truncate(self._code_rows * self.quantizer.code_size)
+            f.seek(0, os.SEEK_END)
+            f.write(codes.tobytes())
+        self._codes = np.concatenate([self._codes, codes])
+        self._code_rows = len(self._codes)
+
+    def _after_add(self, start, matrix):
+        if self.quantizer.trained:
+            self._encode_tail()
+        else:
+            self._start_training()
+
+    def _after_compact(self):
+        # Row numbers changed: re-encode the compacted file with the existing quantizer
+        self._compactions += 1
+        if not self.quantizer.trained:
+            return
+        if os.path.exists(self.codes_path):
+            os.remove(self.codes_path)
+        self._codes = np.zeros((0, self.quantizer.code_size), dtype=np.uint8)
+        self._code_rows = 0
+        self._encode_tail()
+
+    def memory_footprint(self):
+        codes = self._codes.nbytes if self._codes is not None else 0
+        return super().memory_footprint() + int(codes)
+
+    def retrain(self) -> bool:
+        """Re-fits the quantizer on the current data (e.g. after the corpus drifted); the old one serves until it's done."""
+        return self.train()
+
+    # --- Search ---
+
+    def _candidate_search(self, queries: np.ndarray, n_candidates: int):
+        """Top candidates per query from the compressed codes only (no disk reads)."""
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+        dead = ~self._alive[:self._code_rows]
+        candidates = []
+        for qi, query in enumerate(queries):
+            approx = np.concatenate([
+                self.quantizer.approx_distances(query, query_norms[qi],
+                                                self._codes[start:start + self.BLOCK_ROWS],
+                                                self._norms[start:start + self.BLOCK_ROWS])
+                for start in range(0, self._code_rows, self.BLOCK_ROWS)
+            ])
+            approx[dead] = np.inf
+            top = np.argpartition(approx, n_candidates - 1)[:n_candidates]
+            candidates.append(top[np.isfinite(approx[top])])
+        return candidates
+
+    def _search(self, queries, k):
+        if not self.quantizer.trained or self._code_rows < self.size:
+            return self._exact_search(queries, k)
+
+        n_candidates = min(k * self.rescore_factor, self._code_rows)
+        hits = []
+        for query, rows in zip(queries, self._candidate_search(queries, n_candidates)):
+            rows = np.sort(rows)   # sequential disk access for the re-score
+            full = np.asarray(self._vectors[rows])
+            exact = ((full - query) ** 2).sum(axis=1)
+            order = np.argsort(exact)[:k]
+            hits.append((rows[order], exact[order]))
+        return hits
+
+    # --- Reporting ---
+
+    def memory_usage(self) -> Dict[str, Any]:
+        dim = self.dim or 0
+        code_bytes = int(self._codes.nbytes) if self._codes is not None else 0
+        return {
+            "level": self.level,
+            "vectors": self.size,
+            "bytes_per_vector_in_ram": self.quantizer.code_size + 4 if self.quantizer.trained else dim * 4,
+            "ram_bytes": code_bytes + int(self._norms.nbytes),
+            "full_precision_bytes": self.size * dim * 4,
+            "compression_ratio": round((dim * 4) / self.quantizer.code_size, 1) if self.quantizer.trained else 1.0,
+        }
+
+    def compression_report(self, sample_queries: int = 200, k: int = 10) -> Dict[str, Any]:
+        """
+        Memory/recall trade-off for this collection's compression level.
+        Uses stored vectors as queries and compares against exact search.
+        """
+        with self._lock:
+            report = self.memory_usage()
+            alive = np.flatnonzero(self._alive)
+            if not self.quantizer.trained or len(alive) == 0:
+                report.update({"recall_at_k": None, "candidate_recall_at_k": None, "k": k})
+                return report
+
+            k = min(k, len(alive))
+            rng = np.random.default_rng(1)
+            rows = np.sort(rng.choice(alive, min(sample_queries, len(alive)), replace=False))
+            queries = np.asarray(self._vectors[rows])
+
+            exact = [set(r.tolist()) for r, _ in self._exact_search(queries, k)]
+            rescored = [set(r.tolist()) for r, _ in self._search(queries, k)]
+            codes_only = [set(r.tolist()) for r in self._candidate_search(queries, k)]
+
+            report.update({
+                "k": k,
+                "sample_queries": len(rows),
+                "rescore_factor": self.rescore_factor,
+                "recall_at_k": round(float(np.mean([len(a & b) / k for a, b in zip(exact, rescored)])), 4),
+                "candidate_recall_at_k": round(float(np.mean([len(a & b) / k for a, b in zip(exact, codes_only)])), 4),
+            })
+            return report
+
+
+def compare_levels(vectors: np.ndarray, levels: Optional[List[str]] = None, k: int = 10,
+                   sample_queries: int = 200, rescore_factor: int = 8) -> List[Dict[str, Any]]:
+    """
+    Trains each candidate level on `vectors` and reports RAM per vector and
+    recall@k (with and without re-scoring) so a level can be picked per collection.
+    """
+    levels = levels or ["sq8", "pq96", "pq48", "pq24"]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    rng = np.random.default_rng(2)
+    query_rows = rng.choice(len(vectors), min(sample_queries, len(vectors)), replace=False)
+    queries = vectors[query_rows]
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    k = min(k, len(vectors))
+    n_candidates = min(k * rescore_factor, len(vectors))
+
+    exact_dists = norms[None, :] - 2.0 * queries @ vectors.T
+    exact = np.argpartition(exact_dists, k - 1, axis=1)[:, :k]
+
+    report = []
+    for level in levels:
+        quantizer = make_quantizer(level)
+        try:
+            quantizer.train(vectors)
+        except ValueError as e:
+            report.append({"level": level, "error": str(e)})
+            continue
+        codes = quantizer.encode(vectors)
+        recall, candidate_recall = [], []
+        for qi, query in enumerate(queries):
+            approx = quantizer.approx_distances(query, float(query @ query), codes, norms)
+            truth = set(exact[qi].tolist())
+            candidate_recall.append(len(truth & set(np.argpartition(approx, k - 1)[:k].tolist())) / k)
+            candidates = np.argpartition(approx, n_candidates - 1)[:n_candidates]
+            rescored = candidates[np.argsort(exact_dists[qi, candidates])[:k]]
+            recall.append(len(truth & set(rescored.tolist())) / k)
+        report.append({
+            "level": level,
+            "bytes_per_vector_in_ram": quantizer.code_size + 4,
+            "compression_ratio": round(vectors.shape[1] * 4 / quantizer.code_size, 1),
+            "recall_at_k": round(float(np.mean(recall)), 4),
+            "candidate_recall_at_k": round(float(np.mean(candidate_recall)), 4),
+        })
+    return report
+
+# TEST RUNNER
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(64, 384)).astype(np.float32)
+    data = centers[rng.integers(0, 64, 5000)] + 0.5 * rng.normal(size=(5000, 384)).astype(np.float32)
+
+    print("📊 Compression levels on 5,000 synthetic 384-d vectors:")
+    for row in compare_levels(data):
+        print(f"   {row}")
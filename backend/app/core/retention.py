@@ -0,0 +1,201 @@
+"""Per-source retention policies, enforced by a background compaction job."""
+
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+from typing import Dict, Any, Optional, List
+
+
+# Chunk metadata the policies read
+POLICY_FIELDS = ("ingested_at", "source", "version")
+
+
+class RetentionPolicy:
+    """Retention rules for one source type. Unset rules keep everything."""
+
+    def __init__(self, max_age_days: float = None, max_chunks: int = None, keep_latest_version: bool = False):
+        self.max_age_days = max_age_days
+        self.max_chunks = max_chunks
+        self.keep_latest_version = keep_latest_version
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RetentionPolicy":
+        return cls(
+            max_age_days=data.get("max_age_days"),
+            max_chunks=data.get("max_chunks"),
+            keep_latest_version=bool(data.get("keep_latest_version", False)),
+        )
+
+    def expired_ids(self, ids: List[str], metadatas: List[Dict[str, Any]], now: float) -> List[str]:
+        """Returns the ids this policy wants removed from one source type's chunks."""
+        doomed = set()
+        ingested = [m.get("ingested_at") or 0 for m in metadatas]
+
+        if self.max_age_days is not None:
+            cutoff = now - self.max_age_days * 86400
+            # Legacy chunks without a timestamp have an unknown age: leave them alone
+            doomed.update(i for i, t, m in zip(ids, ingested, metadatas) if m.get("ingested_at") and t < cutoff)
+
+        if self.keep_latest_version:
+            latest = {}
+            for m in metadatas:
+                source = m.get("source")
+                latest[source] = max(latest.get(source, 0), m.get("version") or 0)
+            doomed.update(i for i, m in zip(ids, metadatas) if (m.get("version") or 0) < latest[m.get("source")])
+
+        if self.max_chunks is not None:
+            survivors = sorted(
+                ((t, i) for i, t in zip(ids, ingested) if i not in doomed),
+                reverse=True
+            )
+            doomed.update(i for _, i in survivors[self.max_chunks:])
+
+        return [i for i in ids if i in doomed]
+
+
+def load_policies(raw: Optional[str] = None) -> Dict[str, RetentionPolicy]:
+    """Parses SYNAPSE_RETENTION (inline JSON or a path to a JSON file)."""
+    raw = raw if raw is not None else os.getenv("SYNAPSE_RETENTION", "")
+    if not raw:
+        return {}
+    if os.path.isfile(raw):
+        with open(raw) as f:
+            data = json.load(f)
+    else:
+        data = json.loads(raw)
+    return {source_type: RetentionPolicy.from_dict(rules) for source_type, rules in data.items()}
+
+
+class Compactor:
+    """
+    Background job that applies retention policies to every tenant's memory.
+
+    Deletes go out in batches throttled to `max_deletes_per_sec` and pause
+    while the memory is serving queries, so live /ask traffic isn't starved.
+    When the deleted fraction crosses `rebuild_threshold` the store is
+    rebuilt (flat) or vacuumed (Chroma).
+    """
+
+    def __init__(self, pool, policies: Dict[str, RetentionPolicy] = None, batch_size: int = 500,
+                 max_deletes_per_sec: float = 2000, rebuild_threshold: float = 0.2, scan_size: int = 2000):
+        self.pool = pool
+        self.policies = policies if policies is not None else load_policies()
+        self.batch_size = batch_size
+        self.scan_size = scan_size
+        self.max_deletes_per_sec = max_deletes_per_sec
+        self.rebuild_threshold = rebuild_threshold
+        self.last_report = None
+        self.running = False
+        self._run_lock = threading.Lock()
+
+    def _wait_for_quiet(self, memory, max_wait: float = 5.0):
+        """Yields to in-flight queries (bounded, so compaction always makes progress)."""
+        deadline = time.time() + max_wait
+        while memory.busy and time.time() < deadline:
+            time.sleep(0.05)
+
+    def _collect_expired(self, store, now: float) -> Dict[str, List[str]]:
+        if not self.policies:
+            return {}
+        # Metadata only, a page at a time: documents and vectors are never loaded,
+        # and only the fields the policies read are kept per chunk
+        by_type = defaultdict(lambda: ([], []))
+        for batch in store.scan(batch_size=self.scan_size, include_embeddings=False, include_documents=False):
+            for doc_id, metadata in zip(batch["ids"], batch["metadatas"]):
+                metadata = metadata or {}
+                ids, metas = by_type[metadata.get("source_type", "upload")]
+                ids.append(doc_id)
+                metas.append({key: metadata.get(key) for key in POLICY_FIELDS})
+
+        expired = {}
+        for source_type, (ids, metas) in by_type.items():
+            policy = self.policies.get(source_type) or self.policies.get("*")
+            if policy:
+                doomed = policy.expired_ids(ids, metas, now)
+                if doomed:
+                    expired[source_type] = doomed
+        return expired
+
+    def compact_memory(self, memory) -> Dict[str, Any]:
+        """Applies every policy to one MemoryBank and returns its report."""
+        store = memory.store
+        started = time.time()
+        bytes_before = store.disk_usage()
+        rows_before = store.count()
+
+        expired = self._collect_expired(store, started)
+        deleted = 0
+        for source_type, ids in expired.items():
+            for start in range(0, len(ids), self.batch_size):
+                self._wait_for_quiet(memory)
+                batch = ids[start:start + self.batch_size]
+                batch_started = time.time()
+                deleted += store.delete(ids=batch)
+                # Token-bucket style throttle: never exceed max_deletes_per_sec
+                min_duration = len(batch) / self.max_deletes_per_sec
+                elapsed = time.time() - batch_started
+                if elapsed < min_duration:
+                    time.sleep(min_duration - elapsed)
+
+        fraction = store.deleted_fraction()
+        if fraction is None:
+            fraction = deleted / rows_before if rows_before else 0.0
+        rebuilt = False
+        if deleted and fraction >= self.rebuild_threshold:
+            self._wait_for_quiet(memory)
+            print(f"🧹 Compacting memory store ({fraction:.0%} deleted)...")
+            store.compact()
+            rebuilt = True
+
+        bytes_after = store.disk_usage()
+        return {
+            "deleted_chunks": deleted,
+            "deleted_by_source_type": {k: len(v) for k, v in expired.items()},
+            "deleted_fraction": round(fraction, 4),
+            "rebuilt": rebuilt,
+            "chunks_before": rows_before,
+            "chunks_after": store.count(),
+            "index_bytes_before": bytes_before,
+            "index_bytes_after": bytes_after,
+            "bytes_reclaimed": max(bytes_before - bytes_after, 0),
+            "duration_sec": round(time.time() - started, 3),
+        }
+
+    def run_once(self) -> Dict[str, Any]:
+        """Runs one compaction pass over every known tenant and returns the combined report."""
+        with self._run_lock:
+            started = time.time()
+            tenants = {}
+            for tenant_id in self.pool.tenant_ids():
+                with self.pool.lease(tenant_id) as memory:
+                    tenants[tenant_id] = self.compact_memory(memory)
+
+            totals = {key: sum(r[key] for r in tenants.values())
+                      for key in ("deleted_chunks", "index_bytes_before", "index_bytes_after", "bytes_reclaimed")}
+            self.last_report = {
+                **totals,
+                "tenants": tenants,
+                "duration_sec": round(time.time() - started, 3),
+                "finished_at": time.time(),
+            }
+            return self.last_report
+
+    def start(self, interval_sec: float):
+        """Runs the job every `interval_sec` on a daemon thread."""
+        self.running = True
+        thread = threading.Thread(target=self._loop, args=(interval_sec,))
+        thread.daemon = True
+        thread.start()
+
+    def _loop(self, interval_sec: float):
+        print(f"🧹 Compactor active: every {interval_sec:.0f}s")
+        while self.running:
+            time.sleep(interval_sec)
+            try:
+                report = self.run_once()
+                if report["deleted_chunks"]:
+                    print(f"🧹 Retention removed {report['deleted_chunks']} chunks, reclaimed {report['bytes_reclaimed']} bytes.")
+            except Exception as e:
+                print(f"⚠️ Compaction failed: {e}")
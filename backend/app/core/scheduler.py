@@ -0,0 +1,173 @@
+"""Admission control for LocalLLM: bounded concurrency, priorities and a bounded wait queue."""
+
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any
+
+PRIORITIES = {"interactive": 0, "background": 1}
+SAMPLE_WINDOW = 500
+
+
+class SchedulerFull(Exception):
+    """No generation slot within the queue bounds (maps to HTTP 503)."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Slot:
+    """
+    A granted generation slot. Whoever acquires it releases it, with
+    `async with scheduler.slot()` or an explicit release() in a finally;
+    release() is idempotent.
+    """
+
+    def __init__(self, scheduler: "GenerationScheduler", priority: str, waited: float):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.waited = waited
+        self.started_at = time.monotonic()
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.scheduler._release(self)
+
+
+class GenerationScheduler:
+    """Concurrency limit plus a bounded priority queue; run on the server's event loop."""
+
+    def __init__(self, max_concurrent: int = None, max_queue: int = None, max_wait_sec: float = None):
+        self.max_concurrent = max_concurrent or int(os.getenv("SYNAPSE_LLM_CONCURRENCY", "2"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("SYNAPSE_LLM_QUEUE", "32"))
+        self.max_wait_sec = max_wait_sec or float(os.getenv("SYNAPSE_LLM_QUEUE_TIMEOUT_SEC", "60"))
+        self.running = 0
+        self._waiters = []                 # heap of (priority, seq, future, name)
+        self._seq = itertools.count()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waits = deque(maxlen=SAMPLE_WINDOW)
+        self._holds = deque(maxlen=SAMPLE_WINDOW)
+
+    def queued(self) -> int:
+        return sum(1 for _, _, future, _ in self._waiters if not future.done())
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free: queued + running work over the concurrency limit."""
+        average = sum(self._holds) / len(self._holds) if self._holds else 5.0
+        return max(1, math.ceil(average * (self.queued() + 1) / self.max_concurrent))
+
+    def _reject(self, message: str):
+        self.rejected += 1
+        raise SchedulerFull(message, self.retry_after())
+
+    async def acquire(self, priority: str = "interactive") -> Slot:
+        """Waits for a slot; raises SchedulerFull if the queue is full or the wait runs too long."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}' (expected one of {', '.join(PRIORITIES)})")
+        enqueued = time.monotonic()
+        if self.running < self.max_concurrent and not self.queued():
+            return self._grant(priority, enqueued)
+
+        if self.queued() >= self.max_queue and not self._make_room(PRIORITIES[priority]):
+            self._reject("Generation queue is full.")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (PRIORITIES[priority], next(self._seq), future, priority)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait_sec)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                self.timed_out += 1
+                self._reject(f"Waited over {self.max_wait_sec:g}s for a generation slot.")
+        except asyncio.CancelledError:
+            # The client left while queued; a slot handed over meanwhile goes to the next waiter
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.running -= 1
+                self._dispatch()
+            future.cancel()
+            raise
+        # Cancelled futures raise, displaced ones carry SchedulerFull
+        future.result()
+        return self._granted(priority, enqueued)
+
+    def _make_room(self, priority: int) -> bool:
+        """Displaces the newest waiter of lower priority, if there is one."""
+        candidates = [entry for entry in self._waiters if not entry[2].done() and entry[0] > priority]
+        if not candidates:
+            return False
+        victim = max(candidates, key=lambda entry: (entry[0], entry[1]))
+        self.rejected += 1
+        victim[2].set_exception(SchedulerFull("Displaced by a higher priority request.", self.retry_after()))
+        return True
+
+    def _grant(self, priority: str, enqueued: float) -> Slot:
+        self.running += 1
+        return self._granted(priority, enqueued)
+
+    def _granted(self, priority: str, enqueued: float) -> Slot:
+        waited = time.monotonic() - enqueued
+        self.admitted += 1
+        self._waits.append(waited)
+        return Slot(self, priority, waited)
+
+    def _release(self, slot: Slot):
+        self._holds.append(time.monotonic() - slot.started_at)
+        self.running -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hands free slots to the best waiters (the slot is counted as running on hand-over)."""
+        while self.running < self.max_concurrent and self._waiters:
+            _, _, future, _ = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.running += 1
+            future.set_result(True)
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "interactive"):
+        slot = await self.acquire(priority)
+        try:
+            yield slot
+        finally:
+            slot.release()
+
+    @staticmethod
+    def _percentile(samples, q: float):
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+    def stats(self) -> Dict[str, Any]:
+        by_priority = {name: 0 for name in PRIORITIES}
+        for _, _, future, name in self._waiters:
+            if not future.done():
+                by_priority[name] += 1
+        return {
+            "running": self.running,
+            "max_concurrent": self.max_concurrent,
+            "queued": sum(by_priority.values()),
+            "queued_by_priority": by_priority,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_ms_p50": self._percentile(self._waits, 0.5),
+            "wait_ms_p95": self._percentile(self._waits, 0.95),
+            "generation_ms_p50": self._percentile(self._holds, 0.5),
+            "generation_ms_p95": self._percentile(self._holds, 0.95),
+            "retry_after_sec": self.retry_after(),
+        }
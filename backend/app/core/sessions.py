@@ -0,0 +1,194 @@
+"""Multi-turn /ask sessions that reuse Ollama's context between turns."""
+
+import os
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from app.core.scheduler import SchedulerFull
+
+PREAMBLE = """You are Synapse, an intelligent OS assistant, in a conversation with the user.
+Each question comes with context retrieved from the user's memory; use it to answer.
+"""
+
+TURN = """
+CONTEXT:
+{context}
+
+USER QUESTION:
+{question}
+
+ANSWER (Keep it concise and technical):
+"""
+
+SUMMARY_PROMPT = """Summarize this conversation between a user and Synapse, an OS assistant, in a few sentences.
+Keep names, facts, numbers and open questions; drop pleasantries.
+
+{conversation}
+
+SUMMARY:"""
+
+
+class Session:
+    """One conversation: recent turns, summary of older ones and Ollama's token state."""
+
+    def __init__(self, tenant_id: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.tenant_id = tenant_id
+        self.turns: List[Dict[str, str]] = []
+        self.summary = ""
+        self.context: Optional[List[int]] = None   # Ollama token state after the last turn
+        self.epoch = 0                              # bumped when compaction rewrites the history
+        self.backend = None                         # Ollama backend that holds the token state's KV cache
+        self.turn_count = 0
+        self.compacting = False
+        self.created_at = time.time()
+        self.last_active = self.created_at
+        self.lock = asyncio.Lock()                  # one turn at a time
+
+    def history(self, turns: List[Dict[str, str]] = None) -> str:
+        parts = []
+        if self.summary:
+            parts.append(f"SUMMARY OF THE CONVERSATION SO FAR:\n{self.summary}\n")
+        for turn in self.turns if turns is None else turns:
+            parts.append(f"USER: {turn['question']}\nSYNAPSE: {turn['answer']}\n")
+        return "\n".join(parts)
+
+    def prompt(self, context_block: str, question: str):
+        """The prompt for the next turn and the token state to continue from (None: full prompt)."""
+        turn = TURN.format(context=context_block, question=question)
+        if self.context:
+            return turn, self.context
+        history = self.history()
+        return PREAMBLE + (f"\n{history}" if history else "") + turn, None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.id,
+            "tenant_id": self.tenant_id,
+            "turns": self.turn_count,
+            "recent_turns": self.turns,
+            "summary": self.summary,
+            "context_tokens": len(self.context) if self.context else 0,
+            "backend": self.backend,
+            "created_at": self.created_at,
+            "last_active": self.last_active,
+        }
+
+
+class SessionStore:
+    """Live sessions, least recently active evicted first; compacts them in the background."""
+
+    def __init__(self, llm, scheduler, max_turns: int = None, context_tokens: int = None,
+                 ttl_sec: float = None, max_sessions: int = None):
+        self.llm = llm
+        self.scheduler = scheduler
+        self.max_turns = max_turns or int(os.getenv("SYNAPSE_SESSION_TURNS", "6"))
+        self.context_tokens = context_tokens or int(os.getenv("SYNAPSE_SESSION_CONTEXT_TOKENS", "6144"))
+        self.ttl_sec = ttl_sec or float(os.getenv("SYNAPSE_SESSION_TTL_SEC", "3600"))
+        self.max_sessions = max_sessions or int(os.getenv("SYNAPSE_SESSIONS_MAX", "1000"))
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._tasks = set()
+        self.compactions = 0
+        self.compactions_deferred = 0
+        self._evaluated = {"reused": [0, 0, 0.0], "full": [0, 0, 0.0]}   # turns, prompt tokens, prompt ms
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_sec
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_active >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[oldest.id]
+
+    def create(self, tenant_id: Optional[str]) -> Session:
+        session = Session(tenant_id)
+        self._sessions[session.id] = session
+        self._expire()
+        return session
+
+    def get(self, session_id: str, tenant_id: Optional[str]) -> Optional[Session]:
+        """The session, if it exists, hasn't expired and belongs to this tenant."""
+        self._expire()
+        session = self._sessions.get(session_id)
+        if session is None or session.tenant_id != tenant_id:
+            return None
+        session.last_active = time.time()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id: str, tenant_id: Optional[str]) -> bool:
+        if self.get(session_id, tenant_id) is None:
+            return False
+        del self._sessions[session_id]
+        return True
+
+    def record(self, session: Session, question: str, answer: str, final: Dict[str, Any], epoch: int, reused: bool):
+        """Adds a finished turn; `final` is Ollama's last response object (token state, timings)."""
+        session.turns.append({"question": question, "answer": answer})
+        session.turn_count += 1
+        session.last_active = time.time()
+        # A compaction that finished during this turn already dropped the state this turn continued
+        if session.epoch == epoch:
+            session.context = final.get("context") or None
+        session.backend = final.get("backend") or session.backend
+        totals = self._evaluated["reused" if reused else "full"]
+        totals[0] += 1
+        totals[1] += final.get("prompt_eval_count", 0)
+        totals[2] += final.get("prompt_eval_duration", 0) / 1e6
+        if len(session.turns) > self.max_turns or len(session.context or ()) > self.context_tokens:
+            self._schedule_compaction(session)
+
+    def _schedule_compaction(self, session: Session):
+        if session.compacting:
+            return
+        session.compacting = True
+        task = asyncio.ensure_future(self.compact(session))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def compact(self, session: Session):
+        """Folds all but the most recent turns into the summary and drops the token state."""
+        keep = max(1, self.max_turns // 2)
+        folded = session.turns[:-keep]
+        try:
+            if not folded:
+                return
+            async with self.scheduler.slot("background"):
+                data = await self.llm.generate(SUMMARY_PROMPT.format(conversation=session.history(folded)))
+            session.summary = data.get("response", "").strip() or session.summary
+            session.turns = session.turns[len(folded):]
+            # The next turn rebuilds the prompt from the new, shorter prefix
+            session.context = None
+            session.epoch += 1
+            self.compactions += 1
+            print(f"🗜️ Session {session.id[:8]}: {len(folded)} turns folded into the summary")
+        except SchedulerFull:
+            # Busy with interactive work; try again after the next turn
+            self.compactions_deferred += 1
+        except Exception as e:
+            print(f"⚠️ Session {session.id[:8]} compaction failed ({e!r})")
+        finally:
+            session.compacting = False
+
+    async def aclose(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        def averages(name):
+            turns, tokens, ms = self._evaluated[name]
+            return {"turns": turns,
+                    "avg_prompt_tokens_evaluated": round(tokens / turns, 1) if turns else None,
+                    "avg_prompt_eval_ms": round(ms / turns, 1) if turns else None}
+        return {
+            "sessions": len(self._sessions),
+            "max_turns": self.max_turns,
+            "compactions": self.compactions,
+            "compactions_deferred": self.compactions_deferred,
+            "compacting": sum(1 for task in self._tasks if not task.done()),
+            "context_reused": averages("reused"),
+            "full_prompt": averages("full"),
+        }
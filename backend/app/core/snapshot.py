@@ -0,0 +1,149 @@
+"""Columnar export/import of a vector store, so memory moves without re-embedding."""
+
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Dict, Any, List
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def _pack_strings(values: List[str]):
+    """Variable-length strings as one byte buffer plus offsets (Arrow-style)."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(raw: bytes, offsets: np.ndarray, start: int, end: int) -> List[str]:
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(start, end)]
+
+
+def _write_shard(path: str, ids, documents, metadatas, embeddings, compress: bool):
+    columns = {}
+    for name, values in (("ids", ids), ("documents", documents),
+                         ("metadatas", [json.dumps(m or {}) for m in metadatas])):
+        columns[f"{name}_data"], columns[f"{name}_offsets"] = _pack_strings(values)
+    columns["embeddings"] = np.asarray(embeddings, dtype=np.float32)
+    (np.savez_compressed if compress else np.savez)(path, **columns)
+
+
+def export_snapshot(store, out_dir: str, shard_size: int = 10000, compress: bool = False) -> Dict[str, Any]:
+    """Streams every live row of `store` into npz shards under `out_dir`."""
+    os.makedirs(out_dir, exist_ok=True)
+    started = time.time()
+    shards, dim, total = [], None, 0
+
+    buffer = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+
+    def flush():
+        nonlocal total
+        if not buffer["ids"]:
+            return
+        name = f"shard-{len(shards):05d}.npz"
+        _write_shard(os.path.join(out_dir, name), buffer["ids"], buffer["documents"],
+                     buffer["metadatas"], np.concatenate(buffer["embeddings"]), compress)
+        shards.append({"file": name, "rows": len(buffer["ids"])})
+        total += len(buffer["ids"])
+        for values in buffer.values():
+            values.clear()
+
+    for batch in store.scan(batch_size=min(shard_size, 2000), include_embeddings=True):
+        embeddings = np.asarray(batch["embeddings"], dtype=np.float32)
+        if len(embeddings):
+            dim = embeddings.shape[1]
+        buffer["ids"].extend(batch["ids"])
+        buffer["documents"].extend(d or "" for d in batch["documents"])
+        buffer["metadatas"].extend(batch["metadatas"])
+        buffer["embeddings"].append(embeddings)
+        if len(buffer["ids"]) >= shard_size:
+            flush()
+    flush()
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "dim": dim,
+        "count": total,
+        "source_backend": store.name,
+        "created_at": time.time(),
+        "shards": shards,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    elapsed = time.time() - started
+    return {"rows": total, "shards": len(shards), "seconds": round(elapsed, 3),
+            "rows_per_sec": round(total / elapsed, 1) if elapsed else None}
+
+
+def import_snapshot(store, in_dir: str, batch_size: int = 2000) -> Dict[str, Any]:
+    """
+    Bulk-loads a snapshot into `store` one shard at a time, in `batch_size`
+    row batches, so peak memory is bounded by a single shard. Rows are
+    upserted, so importing into a store that already holds some of them (a
+    re-import, or resuming one that was interrupted) doesn't fail or duplicate.
+    """
+    with open(os.path.join(in_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format_version')}")
+
+    started = time.time()
+    total = 0
+    for shard in manifest["shards"]:
+        with np.load(os.path.join(in_dir, shard["file"])) as columns:
+            ids_data, ids_offsets = columns["ids_data"].tobytes(), columns["ids_offsets"]
+            doc_data, doc_offsets = columns["documents_data"].tobytes(), columns["documents_offsets"]
+            meta_data, meta_offsets = columns["metadatas_data"].tobytes(), columns["metadatas_offsets"]
+            embeddings = columns["embeddings"]
+
+            for start in range(0, shard["rows"], batch_size):
+                end = min(start + batch_size, shard["rows"])
+                store.upsert(
+                    ids=_unpack_strings(ids_data, ids_offsets, start, end),
+                    documents=_unpack_strings(doc_data, doc_offsets, start, end),
+                    embeddings=embeddings[start:end],
+                    metadatas=[json.loads(m) for m in _unpack_strings(meta_data, meta_offsets, start, end)],
+                )
+                total += end - start
+        print(f"📦 Imported {shard['file']} ({total}/{manifest['count']} rows)")
+
+    elapsed = time.time() - started
+    return {"rows": total, "shards": len(manifest["shards"]), "seconds": round(elapsed, 3),
+            "rows_per_sec": round(total / elapsed, 1) if elapsed else None}
+
+
+def main(argv=None):
+    # Allow `python app/core/snapshot.py` as well as `python -m app.core.snapshot`
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from app.core.vector_store import DEFAULT_COLLECTION, DEFAULT_DB_PATH, open_vector_store
+
+    parser = argparse.ArgumentParser(description="Export/import Synapse memory snapshots.")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("directory", help="Snapshot directory")
+    parser.add_argument("--db-path", default=DEFAULT_DB_PATH)
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    parser.add_argument("--backend", default=os.getenv("SYNAPSE_VECTOR_BACKEND", "chroma"))
+    parser.add_argument("--quantization", default=os.getenv("SYNAPSE_QUANTIZATION") or None)
+    parser.add_argument("--shard-size", type=int, default=10000)
+    parser.add_argument("--compress", action="store_true", help="zlib-compress shards (smaller, slower)")
+    args = parser.parse_args(argv)
+
+    store = open_vector_store(args.backend, args.db_path, args.collection, quantization=args.quantization)
+    try:
+        if args.command == "export":
+            report = export_snapshot(store, args.directory, shard_size=args.shard_size, compress=args.compress)
+        else:
+            report = import_snapshot(store, args.directory)
+    finally:
+        store.close()
+    print(f"✅ {args.command.title()} complete: {report}")
+
+
+if __name__ == "__main__":
+    main()
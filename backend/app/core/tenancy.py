@@ -0,0 +1,172 @@
+"""Per-tenant memory, with an LRU of open collection handles."""
+
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List
+
+from app.core.amd_bridge import AMDBridge
+from app.core.memory import MemoryBank
+from app.core.vector_store import DEFAULT_COLLECTION, DEFAULT_DB_PATH
+
+DEFAULT_TENANT = "default"
+
+
+def collection_for_tenant(tenant_id: str) -> str:
+    """
+    Maps a tenant id to a collection name valid for every backend (3-63 chars,
+    [a-z0-9_-], starting and ending with an alphanumeric). The readable slug is
+    lowercased and sanitised, so the name always ends in a digest of the raw
+    id: tenant ids are case-sensitive ("user_2AbC" and "user_2abc" are two
+    tenants) and must never share a collection.
+    """
+    if not tenant_id or tenant_id == DEFAULT_TENANT:
+        return DEFAULT_COLLECTION
+    slug = re.sub(r"[^a-z0-9_-]", "_", tenant_id.lower())[:40]
+    digest = hashlib.sha1(tenant_id.encode("utf-8")).hexdigest()[:12]
+    return f"tenant_{slug}_{digest}"
+
+
+class TenantMemoryPool:
+    """
+    LRU of open MemoryBank handles keyed by tenant id.
+
+    Handles in use (see `lease`) are never evicted; everything else is closed
+    least-recently-used first once `max_open` or `memory_cap_bytes` is exceeded.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, max_open: int = None, memory_cap_bytes: int = None,
+                 backend: str = None, quantization: str = None):
+        self.path = path
+        self.max_open = max_open or int(os.getenv("SYNAPSE_TENANT_MAX_OPEN", "32"))
+        cap_mb = float(os.getenv("SYNAPSE_TENANT_MEMORY_CAP_MB", "1024"))
+        self.memory_cap_bytes = memory_cap_bytes or int(cap_mb * 1024 * 1024)
+        self.backend = backend
+        self.quantization = quantization
+
+        self._handles = OrderedDict()   # tenant_id -> MemoryBank, most recent last
+        self._footprints = {}           # tenant_id -> resident bytes, as of its last open or lease
+        self._opening = {}              # tenant_id -> Event set once its handle is open (or failed to open)
+        self._leases = {}               # tenant_id -> active lease count
+        self._lock = threading.RLock()
+        self._brain = None
+        self.evictions = 0
+
+        os.makedirs(path, exist_ok=True)
+        self._registry_path = os.path.join(path, "tenants.json")
+        self._known = set()
+        if os.path.exists(self._registry_path):
+            with open(self._registry_path) as f:
+                self._known = set(json.load(f))
+
+    @property
+    def brain(self):
+        """One shared embedding session for every tenant."""
+        with self._lock:
+            if self._brain is None:
+                self._brain = AMDBridge()
+            return self._brain
+
+    def tenant_ids(self) -> List[str]:
+        """Every tenant that has ever stored memory (open or not)."""
+        with self._lock:
+            return sorted(self._known | set(self._handles))
+
+    def _register(self, tenant_id: str):
+        if tenant_id in self._known:
+            return
+        self._known.add(tenant_id)
+        with open(self._registry_path, "w") as f:
+            json.dump(sorted(self._known), f)
+
+    def get(self, tenant_id: str = None) -> MemoryBank:
+        """Returns the tenant's MemoryBank, opening it (and evicting cold tenants) if needed."""
+        tenant_id = tenant_id or DEFAULT_TENANT
+        while True:
+            with self._lock:
+                memory = self._handles.get(tenant_id)
+                if memory is not None:
+                    self._handles.move_to_end(tenant_id)
+                    return memory
+                opening = self._opening.get(tenant_id)
+                if opening is None:
+                    opening = self._opening[tenant_id] = threading.Event()
+                    break
+            # Someone else is opening this tenant; use their handle (or retry if they failed)
+            opening.wait()
+
+        # Opened outside the pool lock, so a slow open doesn't hold up other tenants
+        try:
+            memory = MemoryBank(
+                collection_name=collection_for_tenant(tenant_id),
+                path=self.path,
+                backend=self.backend,
+                quantization=self.quantization,
+                brain=self.brain,
+            )
+            footprint = memory.store.memory_footprint()
+            with self._lock:
+                self._handles[tenant_id] = memory
+                self._footprints[tenant_id] = footprint
+                self._register(tenant_id)
+                self._evict(keep=tenant_id)
+            return memory
+        finally:
+            with self._lock:
+                del self._opening[tenant_id]
+            opening.set()
+
+    @contextmanager
+    def lease(self, tenant_id: str = None):
+        """Pins the tenant's handle open for the duration of a request or job."""
+        tenant_id = tenant_id or DEFAULT_TENANT
+        while True:
+            memory = self.get(tenant_id)
+            with self._lock:
+                # Another tenant's open may have evicted it in between
+                if self._handles.get(tenant_id) is memory:
+                    self._leases[tenant_id] = self._leases.get(tenant_id, 0) + 1
+                    break
+        try:
+            yield memory
+        finally:
+            with self._lock:
+                self._leases[tenant_id] -= 1
+                if not self._leases[tenant_id]:
+                    del self._leases[tenant_id]
+                    # Ingestion grows a store; re-measure it once nobody holds it
+                    if tenant_id in self._handles:
+                        self._footprints[tenant_id] = memory.store.memory_footprint()
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(self._footprints.values())
+
+    def _evict(self, keep: str = None):
+        """Closes least-recently-used, un-leased handles until both limits hold (on open only)."""
+        for tenant_id in list(self._handles):
+            over_count = len(self._handles) > self.max_open
+            if not over_count and self.resident_bytes() <= self.memory_cap_bytes:
+                return
+            if tenant_id == keep or tenant_id in self._leases:
+                continue
+            memory = self._handles.pop(tenant_id)
+            self._footprints.pop(tenant_id, None)
+            memory.store.close()
+            self.evictions += 1
+            print(f"💤 Closed memory for tenant '{tenant_id}' (LRU eviction).")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "open_tenants": list(self._handles),
+                "known_tenants": len(self._known | set(self._handles)),
+                "resident_bytes": self.resident_bytes(),
+                "memory_cap_bytes": self.memory_cap_bytes,
+                "max_open": self.max_open,
+                "evictions": self.evictions,
+            }
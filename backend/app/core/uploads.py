@@ -0,0 +1,164 @@
+"""Streams multipart uploads into a spool that spills to disk past a memory ceiling."""
+
+import io
+import os
+import tempfile
+from typing import Dict, Optional
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+DEFAULT_MAX_UPLOAD_MB = float(os.getenv("SYNAPSE_MAX_UPLOAD_MB", "1024"))
+DEFAULT_MEMORY_CEILING_MB = float(os.getenv("SYNAPSE_UPLOAD_MEMORY_MB", "8"))
+MAX_FIELD_BYTES = 64 * 1024
+
+
+class UploadSpool:
+    """
+    Bytes in RAM up to `max_size`, then a NamedTemporaryFile, so `.name` is a
+    path worker processes can open once the data is on disk. With a
+    `size_hint` past `max_size` (Content-Length, an archive entry's size) the
+    file starts on disk. Everything but write() goes to the current file.
+    """
+
+    def __init__(self, max_size: int, dir: Optional[str] = None, size_hint: Optional[int] = None):
+        self.max_size = max_size
+        self.dir = dir
+        self._file = io.BytesIO()
+        self.on_disk = False
+        if size_hint is not None and size_hint > max_size:
+            self._spill()
+
+    def _spill(self):
+        disk = tempfile.NamedTemporaryFile(dir=self.dir)
+        position = self._file.tell()
+        disk.write(self._file.getvalue())
+        disk.seek(position)
+        self._file = disk
+        self.on_disk = True
+
+    def write(self, data) -> int:
+        if not self.on_disk and self._file.tell() + len(data) > self.max_size:
+            self._spill()
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class UploadError(Exception):
+    """Malformed upload (maps to HTTP 400)."""
+
+
+class UploadTooLarge(UploadError):
+    """Upload crossed the size limit (maps to HTTP 413)."""
+
+
+class SpooledUpload:
+    """The file part of an upload plus any small form fields sent with it."""
+
+    def __init__(self, filename: str, file, size: int, fields: Dict[str, str], content_type: Optional[str] = None):
+        self.filename = filename
+        self.file = file          # UploadSpool, rewound to 0
+        self.size = size
+        self.fields = fields
+        self.content_type = content_type  # the file part's declared MIME type, if any
+
+    @property
+    def in_memory(self) -> bool:
+        return not self.file.on_disk
+
+    def close(self):
+        self.file.close()
+
+
+async def receive_upload(request, file_field: str = "file", max_bytes: int = None,
+                         memory_ceiling: int = None, spool_dir: Optional[str] = None) -> SpooledUpload:
+    """Streams the request body into an UploadSpool, enforcing `max_bytes` as it goes."""
+    max_bytes = max_bytes or int(DEFAULT_MAX_UPLOAD_MB * 1024 * 1024)
+    memory_ceiling = memory_ceiling or int(DEFAULT_MEMORY_CEILING_MB * 1024 * 1024)
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadError("Expected multipart/form-data upload.")
+
+    declared = request.headers.get("content-length")
+    declared = int(declared) if declared and declared.isdigit() else None
+    if declared is not None and declared > max_bytes + MAX_FIELD_BYTES:
+        raise UploadTooLarge(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+
+    state = {"headers": {}, "field": b"", "value": b"", "name": None, "filename": None, "target": None}
+    fields: Dict[str, str] = {}
+    upload = {"file": None, "filename": None, "size": 0, "content_type": None}
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["target"] = None
+
+    def on_header_field(data, start, end):
+        state["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"], state["value"] = b"", b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+        state["name"] = name
+        if name == file_field and filename is not None:
+            if upload["file"] is not None:
+                raise UploadError(f"Only one '{file_field}' file part is allowed per upload.")
+            upload["filename"] = os.path.basename(filename.decode("utf-8", "replace"))
+            part_type = state["headers"].get(b"content-type")
+            upload["content_type"] = part_type.decode("latin-1").strip() if part_type else None
+            # The whole body's length is an upper bound on the file's
+            upload["file"] = UploadSpool(max_size=memory_ceiling, dir=spool_dir, size_hint=declared)
+            state["target"] = "file"
+        else:
+            fields[name] = ""
+            state["target"] = "field"
+
+    def on_part_data(data, start, end):
+        if state["target"] == "file":
+            upload["size"] += end - start
+            if upload["size"] > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+            upload["file"].write(data[start:end])
+        elif state["target"] == "field":
+            value = fields[state["name"]] + data[start:end].decode("utf-8", "replace")
+            if len(value) > MAX_FIELD_BYTES:
+                raise UploadError(f"Form field '{state['name']}' is too large.")
+            fields[state["name"]] = value
+
+    parser = MultipartParser(params[b"boundary"], callbacks={
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                parser.write(chunk)
+        parser.finalize()
+    except Exception as e:
+        if upload["file"] is not None:
+            upload["file"].close()
+        if isinstance(e, UploadError):
+            raise
+        raise UploadError(f"Malformed upload: {e}")
+
+    if upload["file"] is None:
+        raise UploadError(f"No '{file_field}' file part in upload.")
+    upload["file"].seek(0)
+    return SpooledUpload(upload["filename"], upload["file"], upload["size"], fields, upload["content_type"])
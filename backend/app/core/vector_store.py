@@ -0,0 +1,534 @@
+"""VectorStore backends for MemoryBank: Chroma and a memory-mapped flat store."""
+
+import os
+import json
+import sqlite3
+import threading
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+
+try:
+    import chromadb
+    CHROMA_AVAILABLE = True
+except ImportError:
+    CHROMA_AVAILABLE = False
+
+DEFAULT_DB_PATH = "./synapse_memory_db"
+DEFAULT_COLLECTION = "project_alpha"
+
+
+def _matches(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Simple equality filter (the subset of Chroma's `where` we rely on)."""
+    if not where:
+        return True
+    return all(metadata.get(key) == value for key, value in where.items())
+
+
+class VectorStore:
+    """
+    Interface every storage backend implements.
+    Distances are squared L2, matching Chroma's default space.
+    """
+
+    name = "base"
+
+    def add(self, ids: List[str], documents: List[str], embeddings, metadatas: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def upsert(self, ids: List[str], documents: List[str], embeddings, metadatas: List[Dict[str, Any]]):
+        """Like add(), but replaces rows whose id already exists."""
+        raise NotImplementedError
+
+    def query(self, query_embeddings, n_results: int = 3) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            include_embeddings: bool = False) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> int:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def scan(self, batch_size: int = 1000, include_embeddings: bool = True, include_documents: bool = True):
+        """Yields get()-shaped batches covering every live row, in bounded memory."""
+        raise NotImplementedError
+
+    def disk_usage(self) -> int:
+        """Bytes used on disk by this store."""
+        return 0
+
+    def memory_footprint(self) -> int:
+        """Approximate bytes this open store keeps resident in RAM."""
+        return 0
+
+    def deleted_fraction(self):
+        """Share of stored rows that are tombstones, or None if the engine doesn't expose it."""
+        return None
+
+    def compact(self):
+        """Reclaims space left behind by deletes (rebuild / vacuum)."""
+        pass
+
+    def close(self):
+        pass
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ChromaVectorStore(VectorStore):
+    """ChromaDB-backed store (the original Synapse storage engine)."""
+
+    name = "chroma"
+
+    def __init__(self, path: str, collection_name: str):
+        if not CHROMA_AVAILABLE:
+            raise ImportError("chromadb package not installed. Install with: pip install chromadb")
+        self.path = path
+        self.client = chromadb.PersistentClient(path=path)
+        self.collection = self.client.get_or_create_collection(name=collection_name)
+
+    def add(self, ids, documents, embeddings, metadatas):
+        self.collection.add(
+            ids=list(ids),
+            documents=list(documents),
+            embeddings=[list(map(float, e)) for e in embeddings],
+            metadatas=list(metadatas)
+        )
+
+    def upsert(self, ids, documents, embeddings, metadatas):
+        self.collection.upsert(
+            ids=list(ids),
+            documents=list(documents),
+            embeddings=[list(map(float, e)) for e in embeddings],
+            metadatas=list(metadatas)
+        )
+
+    def query(self, query_embeddings, n_results=3):
+        return self.collection.query(
+            query_embeddings=[list(map(float, q)) for q in query_embeddings],
+            n_results=n_results
+        )
+
+    def get(self, ids=None, where=None, include_embeddings=False):
+        include = ["documents", "metadatas"]
+        if include_embeddings:
+            include.append("embeddings")
+        return self.collection.get(ids=ids, where=where or None, include=include)
+
+    def delete(self, ids=None, where=None):
+        if ids is None and not where:
+            return 0
+        matched = self.collection.get(ids=ids, where=where or None, include=[])["ids"]
+        if matched:
+            self.collection.delete(ids=matched)
+        return len(matched)
+
+    def count(self):
+        return self.collection.count()
+
+    def scan(self, batch_size=1000, include_embeddings=True, include_documents=True):
+        include = ["metadatas"] + (["documents"] if include_documents else []) + (["embeddings"] if include_embeddings else [])
+        offset = 0
+        while True:
+            batch = self.collection.get(limit=batch_size, offset=offset, include=include)
+            if not batch["ids"]:
+                return
+            yield batch
+            offset += len(batch["ids"])
+
+    def disk_usage(self):
+        return _dir_size(self.path)
+
+    def memory_footprint(self):
+        # Chroma's HNSW indexes live in a cache shared by every collection of the
+        # client; closing this handle frees none of it, so it counts for nothing here
+        return 0
+
+    def compact(self):
+        # Chroma keeps metadata in SQLite; VACUUM returns freed pages to the filesystem
+        db_file = os.path.join(self.path, "chroma.sqlite3")
+        if os.path.exists(db_file):
+            conn = sqlite3.connect(db_file, timeout=30)
+            try:
+                conn.execute("VACUUM")
+            finally:
+                conn.close()
+
+
+class FlatVectorStore(VectorStore):
+    """
+    Exact nearest-neighbour search over a memory-mapped float32 matrix.
+
+    Layout under `<path>/<collection>.flat/`:
+        vectors.f32  - row-major float32 matrix, grown by doubling
+        table.jsonl  - append-only side table: one row record per vector,
+                       plus {"delete": id} tombstones
+
+    Only row offsets, ids and squared norms live in RAM; documents and
+    metadata are read back from the side table for the top-k rows only.
+    """
+
+    name = "flat"
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, path: str, collection_name: str):
+        self.dir = os.path.join(path, f"{collection_name}.flat")
+        os.makedirs(self.dir, exist_ok=True)
+        self.vectors_path = os.path.join(self.dir, "vectors.f32")
+        self.table_path = os.path.join(self.dir, "table.jsonl")
+        self.header_path = os.path.join(self.dir, "header.json")
+        self._lock = threading.RLock()
+
+        self.dim = None
+        self.capacity = 0
+        self.size = 0                      # rows written (alive + tombstoned)
+        self._vectors = None               # np.memmap [capacity, dim]
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._offsets = np.zeros(0, dtype=np.int64)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._generation = 0               # bumped when compaction renumbers rows
+
+        self._load()
+        self._table = open(self.table_path, "ab")
+
+    # --- Persistence ---
+
+    def _load(self):
+        if os.path.exists(self.header_path):
+            with open(self.header_path) as f:
+                header = json.load(f)
+            self.dim = header["dim"]
+            self.capacity = header["capacity"]
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+",
+                                      shape=(self.capacity, self.dim))
+
+        if not os.path.exists(self.table_path):
+            return
+
+        offsets, alive = [], []
+        torn = False
+        with open(self.table_path, "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    torn = True
+                    break
+                if "delete" in record:
+                    row = self._rows.pop(record["delete"], None)
+                    if row is not None:
+                        alive[row] = False
+                else:
+                    old_row = self._rows.get(record["id"])
+                    if old_row is not None:
+                        alive[old_row] = False
+                    self._rows[record["id"]] = len(self._ids)
+                    self._ids.append(record["id"])
+                    offsets.append(offset)
+                    alive.append(True)
+                offset += len(line)
+        if torn:
+            # Crash mid-append left a partial last line: cut it off so new appends stay readable
+            with open(self.table_path, "ab") as f:
+                f.truncate(offset)
+
+        self.size = len(self._ids)
+        self._offsets = np.array(offsets, dtype=np.int64)
+        self._alive = np.array(alive, dtype=bool)
+        if self.size:
+            self._norms = np.concatenate([
+                np.einsum("ij,ij->i", block, block) for _, block in self.iter_vector_blocks()
+            ]).astype(np.float32)
+
+    def _write_header(self):
+        with open(self.header_path, "w") as f:
+            json.dump({"dim": self.dim, "capacity": self.capacity}, f)
+
+    def _reserve(self, rows_needed: int):
+        """Grow the memory-mapped matrix (doubling) so it can hold `rows_needed` rows."""
+        if rows_needed <= self.capacity:
+            return
+        new_capacity = max(self.INITIAL_CAPACITY, self.capacity)
+        while new_capacity < rows_needed:
+            new_capacity *= 2
+
+        if self._vectors is not None:
+            self._vectors.flush()
+            del self._vectors
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+",
+                                  shape=(new_capacity, self.dim))
+        self.capacity = new_capacity
+        self._write_header()
+
+    def iter_vector_blocks(self, block_rows: int = 65536):
+        """Yields (start_row, float32 block) over all written rows without loading the whole file."""
+        for start in range(0, self.size, block_rows):
+            yield start, np.asarray(self._vectors[start:min(start + block_rows, self.size)])
+
+    def _after_add(self, start: int, matrix: np.ndarray):
+        """Hook for subclasses that keep derived per-row data (e.g. quantized codes)."""
+        pass
+
+    def _after_compact(self):
+        """Hook for subclasses: row numbers changed, rebuild derived per-row data."""
+        pass
+
+    def _read_records(self, rows) -> List[Dict[str, Any]]:
+        records = []
+        with open(self.table_path, "rb") as f:
+            for row in rows:
+                f.seek(int(self._offsets[row]))
+                records.append(json.loads(f.readline()))
+        return records
+
+    # --- VectorStore API ---
+
+    def add(self, ids, documents, embeddings, metadatas):
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match store dimension {self.dim}")
+
+            start = self.size
+            end = start + len(ids)
+            self._reserve(end)
+            self._vectors[start:end] = matrix
+            self._vectors.flush()
+
+            offset = self._table.tell()
+            offsets = []
+            lines = []
+            for doc_id, document, metadata in zip(ids, documents, metadatas):
+                line = (json.dumps({"id": doc_id, "document": document, "metadata": metadata}) + "\n").encode("utf-8")
+                offsets.append(offset)
+                offset += len(line)
+                lines.append(line)
+            self._table.write(b"".join(lines))
+            self._table.flush()
+
+            self._ids.extend(ids)
+            self._offsets = np.concatenate([self._offsets, np.array(offsets, dtype=np.int64)])
+            self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+            # After extending _alive: an id repeated within this batch shadows its own earlier row
+            for row, doc_id in enumerate(ids, start=start):
+                old_row = self._rows.get(doc_id)
+                if old_row is not None:
+                    self._alive[old_row] = False
+                self._rows[doc_id] = row
+            self._norms = np.concatenate([self._norms, np.einsum("ij,ij->i", matrix, matrix)])
+            self.size = end
+            self._after_add(start, matrix)
+
+    def upsert(self, ids, documents, embeddings, metadatas):
+        # Appending a row with an existing id already tombstones the old row
+        self.add(ids, documents, embeddings, metadatas)
+
+    def _exact_search(self, queries: np.ndarray, k: int):
+        """Exact top-k rows per query: one matrix product over the mapped file plus argpartition."""
+        # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2, one matrix product for all queries
+        scores = queries @ self._vectors[:self.size].T
+        distances = self._norms[None, :] - 2.0 * scores + np.einsum("ij,ij->i", queries, queries)[:, None]
+        distances[:, ~self._alive] = np.inf
+
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        hits = []
+        for qi in range(len(queries)):
+            rows = top[qi][np.argsort(distances[qi, top[qi]])]
+            hits.append((rows, distances[qi, rows]))
+        return hits
+
+    def _search(self, queries: np.ndarray, k: int):
+        return self._exact_search(queries, k)
+
+    def query(self, query_embeddings, n_results=3):
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            k = min(n_results, int(self._alive.sum()))
+            if k == 0:
+                for _ in range(len(queries)):
+                    for key in result:
+                        result[key].append([])
+                return result
+
+            for rows, distances in self._search(queries, k):
+                records = self._read_records(rows)
+                result["ids"].append([r["id"] for r in records])
+                result["documents"].append([r["document"] for r in records])
+                result["metadatas"].append([r["metadata"] for r in records])
+                result["distances"].append([float(d) for d in distances])
+        return result
+
+    def get(self, ids=None, where=None, include_embeddings=False):
+        with self._lock:
+            if ids is not None:
+                rows = [self._rows[i] for i in ids if i in self._rows]
+            else:
+                rows = np.flatnonzero(self._alive[:self.size]).tolist()
+
+            result = {"ids": [], "documents": [], "metadatas": []}
+            kept_rows = []
+            for row, record in zip(rows, self._read_records(rows)):
+                if not _matches(record["metadata"], where):
+                    continue
+                kept_rows.append(row)
+                result["ids"].append(record["id"])
+                result["documents"].append(record["document"])
+                result["metadatas"].append(record["metadata"])
+            if include_embeddings:
+                result["embeddings"] = np.array(self._vectors[kept_rows]) if kept_rows else np.zeros((0, self.dim or 0), dtype=np.float32)
+            return result
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            if ids is None and not where:
+                return 0
+            targets = self.get(ids=ids, where=where)["ids"]
+            if not targets:
+                return 0
+            self._table.write(b"".join((json.dumps({"delete": i}) + "\n").encode("utf-8") for i in targets))
+            self._table.flush()
+            for doc_id in targets:
+                self._alive[self._rows.pop(doc_id)] = False
+            return len(targets)
+
+    def count(self):
+        with self._lock:
+            return int(self._alive.sum())
+
+    def scan(self, batch_size=1000, include_embeddings=True, include_documents=True):
+        with self._lock:
+            live_rows = np.flatnonzero(self._alive)
+            generation = self._generation
+        for start in range(0, len(live_rows), batch_size):
+            with self._lock:
+                if self._generation != generation:
+                    raise RuntimeError("Store was compacted during scan; restart the scan.")
+                # Re-check liveness: rows may have been deleted since the scan started
+                rows = [r for r in live_rows[start:start + batch_size] if self._alive[r]]
+                records = self._read_records(rows)
+                batch = {
+                    "ids": [r["id"] for r in records],
+                    "metadatas": [r["metadata"] for r in records],
+                }
+                if include_documents:
+                    batch["documents"] = [r["document"] for r in records]
+                if include_embeddings:
+                    batch["embeddings"] = np.asarray(self._vectors[rows], dtype=np.float32)
+            yield batch
+
+    def disk_usage(self):
+        return _dir_size(self.dir)
+
+    # Python-side cost of one id string plus its dict entry
+    ID_OVERHEAD_BYTES = 160
+
+    def memory_footprint(self):
+        with self._lock:
+            arrays = self._norms.nbytes + self._alive.nbytes + self._offsets.nbytes
+            return int(arrays + self.size * self.ID_OVERHEAD_BYTES)
+
+    def deleted_fraction(self):
+        with self._lock:
+            if self.size == 0:
+                return 0.0
+            return 1.0 - float(self._alive.sum()) / self.size
+
+    def compact(self, block_rows: int = 10000):
+        """
+        Rewrites the vector file and side table with only live rows,
+        then swaps them in atomically.
+        """
+        with self._lock:
+            live_rows = np.flatnonzero(self._alive)
+            vectors_tmp = self.vectors_path + ".compact"
+            table_tmp = self.table_path + ".compact"
+
+            capacity = self.INITIAL_CAPACITY
+            while capacity < len(live_rows):
+                capacity *= 2
+            with open(vectors_tmp, "wb") as vec_out, open(table_tmp, "wb") as table_out:
+                for start in range(0, len(live_rows), block_rows):
+                    rows = live_rows[start:start + block_rows]
+                    vec_out.write(np.asarray(self._vectors[rows], dtype=np.float32).tobytes())
+                    table_out.write(b"".join(
+                        (json.dumps(record) + "\n").encode("utf-8") for record in self._read_records(rows)
+                    ))
+                if self.dim:
+                    vec_out.truncate(capacity * self.dim * 4)
+
+            self._table.close()
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            os.replace(vectors_tmp, self.vectors_path)
+            os.replace(table_tmp, self.table_path)
+            if self.dim:
+                self.capacity = capacity
+                self._write_header()
+
+            # Reload from the compacted files
+            self.capacity = 0
+            self.size = 0
+            self._ids, self._rows = [], {}
+            self._norms = np.zeros(0, dtype=np.float32)
+            self._alive = np.zeros(0, dtype=bool)
+            self._offsets = np.zeros(0, dtype=np.int64)
+            self._load()
+            self._table = open(self.table_path, "ab")
+            self._generation += 1
+            self._after_compact()
+
+    def close(self):
+        with self._lock:
+            self._table.close()
+            if self._vectors is not None:
+                self._vectors.flush()
+
+
+BACKENDS = {
+    "chroma": ChromaVectorStore,
+    "flat": FlatVectorStore,
+}
+
+
+def open_vector_store(backend: str, path: str, collection_name: str, quantization: Optional[str] = None) -> VectorStore:
+    """
+    Factory used by MemoryBank. `backend` is one of BACKENDS.
+    `quantization` ('sq8', 'pq<M>') keeps compressed codes in RAM on top of the flat layout.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown vector backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+    if quantization:
+        if backend != "flat":
+            raise ValueError("Quantized storage requires the 'flat' vector backend.")
+        # Imported here: quantization builds on FlatVectorStore from this module
+        from app.core.quantization import QuantizedVectorStore
+        return QuantizedVectorStore(path, collection_name, level=quantization)
+    return BACKENDS[backend](path, collection_name)
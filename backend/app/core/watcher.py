@@ -0,0 +1,359 @@
+"""Keeps memory in sync with watched local folders."""
+
+import os
+import json
+import time
+import select
+import struct
+import hashlib
+import threading
+import ctypes
+import ctypes.util
+from typing import Dict, Any, List, Optional
+
+from app.core.ingester import FileIngester
+from app.core.jobs import TERMINAL_STATES
+from app.core.vector_store import DEFAULT_DB_PATH
+
+HASH_BLOCK_BYTES = 1024 * 1024
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def watched_dirs() -> List[str]:
+    raw = os.getenv("SYNAPSE_WATCH_DIRS", "")
+    return [os.path.realpath(d) for d in raw.split(os.pathsep) if d.strip()]
+
+
+def _skip_dir(name: str) -> bool:
+    return name.startswith(".") or name in ("node_modules", "__pycache__")
+
+
+def file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class InotifyWatch:
+    """Recursive inotify watch over a set of directory trees."""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}     # watch descriptor -> directory
+
+    def add_tree(self, root: str):
+        """Watches `root` and every non-hidden directory below it."""
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not _skip_dir(d)]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                # Usually fs.inotify.max_user_watches; keep watching what we have
+                print(f"⚠️ Cannot watch {dirpath}: {os.strerror(ctypes.get_errno())}")
+                continue
+            self._dirs[wd] = dirpath
+
+    def read(self, timeout: float):
+        """Waits up to `timeout` and returns [(kind, path)], kind in changed/deleted/dir_created/dir_deleted/overflow."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0"))
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                events.append(("overflow", None))
+                continue
+            directory = self._dirs.get(wd)
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            if directory is None or mask & IN_DELETE_SELF:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not _skip_dir(name):
+                    events.append(("dir_created", path))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    events.append(("dir_deleted", path))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append(("deleted", path))
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                events.append(("changed", path))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """Feeds changes under the watched folders into ingestion and removes chunks of deleted files."""
+
+    def __init__(self, job_manager, pool, roots: Optional[List[str]] = None, tenant_id: Optional[str] = None,
+                 debounce_sec: float = None, poll_sec: float = None, manifest_path: Optional[str] = None):
+        self.job_manager = job_manager
+        self.pool = pool
+        self.roots = roots if roots is not None else watched_dirs()
+        self.tenant_id = tenant_id or os.getenv("SYNAPSE_WATCH_TENANT") or None
+        self.debounce_sec = debounce_sec if debounce_sec is not None else float(os.getenv("SYNAPSE_WATCH_DEBOUNCE_SEC", "2"))
+        self.poll_sec = poll_sec or float(os.getenv("SYNAPSE_WATCH_POLL_SEC", "10"))
+        self.manifest_path = manifest_path or os.path.join(DEFAULT_DB_PATH, "watch_manifest.json")
+
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        self._dirty = False
+        self._pending: Dict[str, float] = {}     # path -> time of last event
+        self._in_flight: Dict[str, tuple] = {}   # job id -> (job, path) awaiting stale-chunk cleanup
+        self._latest_job: Dict[str, str] = {}    # path -> id of the newest job ingesting it
+        self._superseded: Dict[str, set] = {}    # path -> chunk ids of older/failed jobs, for the newest job to clean up
+        self.backend = None
+        self.running = False
+        self.files_ingested = 0
+        self.files_unchanged = 0
+        self.files_removed = 0
+
+    # --- lifecycle ---
+
+    def start(self):
+        if not self.roots:
+            return
+        self.running = True
+        thread = threading.Thread(target=self._loop, name="folder-watcher")
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def _loop(self):
+        try:
+            self.backend = InotifyWatch()
+            for root in self.roots:
+                self.backend.add_tree(root)
+            mode = "inotify"
+        except (OSError, AttributeError) as e:
+            # No inotify (macOS/Windows) or out of watches: rescan on an interval instead
+            self.backend = None
+            mode = f"polling every {self.poll_sec:.0f}s ({e})"
+        print(f"👀 Watching {len(self.roots)} folder(s) via {mode}")
+
+        # Watches are in place first, so nothing that changes during the scan is missed
+        self.reconcile()
+        last_scan = time.time()
+        while self.running:
+            try:
+                if self.backend:
+                    for kind, path in self.backend.read(timeout=0.5):
+                        self._on_event(kind, path)
+                else:
+                    time.sleep(0.5)
+                    if time.time() - last_scan >= self.poll_sec:
+                        self.reconcile()
+                        last_scan = time.time()
+                self._flush()
+                self._finish_jobs()
+            except Exception as e:
+                print(f"⚠️ Folder watcher error: {e}")
+                time.sleep(1.0)
+        if self.backend:
+            self.backend.close()
+
+    def _on_event(self, kind: str, path: Optional[str]):
+        if kind == "overflow":
+            # Kernel dropped events: only a full rescan can tell what changed
+            self.reconcile()
+        elif kind == "dir_created":
+            self.backend.add_tree(path)
+            self.reconcile(path)
+        elif kind == "dir_deleted":
+            prefix = path.rstrip(os.sep) + os.sep
+            for known in [p for p in self.manifest if p.startswith(prefix)]:
+                self._pending[known] = time.time()
+        elif FileIngester.supports(path):
+            self._pending[path] = time.time()
+
+    # --- change detection ---
+
+    def reconcile(self, root: Optional[str] = None):
+        """Compares the folders with the manifest and queues every difference (mtime/size first, then hash)."""
+        roots = [root] if root else self.roots
+        seen = set()
+        for top in roots:
+            for dirpath, dirnames, filenames in os.walk(top):
+                dirnames[:] = [d for d in dirnames if not _skip_dir(d)]
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    if not FileIngester.supports(path) or os.path.islink(path):
+                        continue
+                    seen.add(path)
+                    entry = self.manifest.get(path)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    if entry is None or entry["mtime"] != stat.st_mtime or entry["size"] != stat.st_size:
+                        self._pending.setdefault(path, 0.0)   # already quiet: no need to debounce
+        for top in roots:
+            prefix = top.rstrip(os.sep) + os.sep
+            for known in self.manifest:
+                if known.startswith(prefix) and known not in seen:
+                    self._pending.setdefault(known, 0.0)
+
+    def _flush(self):
+        """Handles every path that has been quiet for debounce_sec."""
+        now = time.time()
+        ready = [path for path, last in self._pending.items() if now - last >= self.debounce_sec]
+        for path in ready:
+            del self._pending[path]
+            try:
+                if os.path.isfile(path):
+                    self._ingest(path)
+                elif path in self.manifest:
+                    self._forget(path)
+            except Exception as e:
+                print(f"⚠️ Could not sync {path}: {e}")
+        if self._dirty:
+            self._save_manifest()
+
+    def _ingest(self, path: str):
+        stat = os.stat(path)
+        entry = self.manifest.get(path)
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            return
+        sha1 = file_sha1(path)
+        # The stored version's chunk ids stay until a newer version replaces them
+        stored = {k: entry[k] for k in ("chunks", "version") if entry and k in entry}
+        self.manifest[path] = {"mtime": stat.st_mtime, "size": stat.st_size, "sha1": sha1, **stored}
+        self._dirty = True
+        if entry and entry.get("sha1") == sha1:
+            self.files_unchanged += 1     # touched, not edited
+            return
+        job = self.job_manager.submit(path, path, self.tenant_id, owned=False,
+                                      metadata={"path": path, "source_type": "folder"}, keep_ids=True)
+        self._in_flight[job.id] = (job, path)
+        self._latest_job[path] = job.id
+        self.files_ingested += 1
+
+    def _forget(self, path: str):
+        """Deleted (or moved away): drop every chunk that came from the file."""
+        with self.pool.lease(self.tenant_id) as memory:
+            removed = memory.store.delete(ids=sorted(self._stored_ids(memory.store, path)))
+        del self.manifest[path]
+        self._dirty = True
+        self.files_removed += 1
+        print(f"🗑️ Removed {removed} chunks of deleted file {path}")
+
+    def _stored_ids(self, store, path: str) -> set:
+        """Chunk ids of the file's stored version, from the manifest (manifests written before ids were kept fall back to a lookup)."""
+        entry = self.manifest.get(path) or {}
+        if "chunks" in entry:
+            return set(entry["chunks"])
+        return set(store.get(where={"path": path})["ids"])
+
+    @staticmethod
+    def _restamp(store, ids, version):
+        """Gives chunks a superseded job stored again the newest version back."""
+        if not ids:
+            return
+        rows = store.get(ids=sorted(ids), include_embeddings=True)
+        stale = [k for k, metadata in enumerate(rows["metadatas"]) if (metadata or {}).get("version") != version]
+        if stale:
+            store.upsert(ids=[rows["ids"][k] for k in stale],
+                         documents=[rows["documents"][k] for k in stale],
+                         embeddings=[rows["embeddings"][k] for k in stale],
+                         metadatas=[{**rows["metadatas"][k], "version": version} for k in stale])
+
+    def _finish_jobs(self):
+        """
+        Once a file's newest job is stored, delete the chunks only older versions
+        had. Chunk ids are content hashes, so versions share ids: cleanup goes by
+        the ids each job queued, never by version, and chunks a superseded job
+        stored again are given the newest version back. The newest job's ids
+        are kept in the manifest for the next cleanup.
+        """
+        for job_id, (job, path) in list(self._in_flight.items()):
+            if job.status not in TERMINAL_STATES:
+                continue
+            del self._in_flight[job_id]
+            ids, job.chunk_ids = job.chunk_ids or set(), None   # finished jobs stay listed; drop the ids
+            latest = self._latest_job.get(path) == job_id
+            if latest:
+                del self._latest_job[path]
+            entry = self.manifest.get(path)
+
+            if not latest or job.status == "failed":
+                # Superseded, or failed part way: whatever it stored isn't the current version
+                self._superseded.setdefault(path, set()).update(ids)
+                if latest and entry:
+                    # Forget the hash so the next scan or edit retries the file
+                    entry["sha1"] = None
+                    self._dirty = True
+                if path in self._latest_job or (entry and (latest or "chunks" not in entry)):
+                    continue   # the newest job (or the retry) cleans up when it's done
+                # The newest job already finished (or the file is gone): clean up now
+                current = set(entry.get("chunks", ())) if entry else set()
+                version = entry.get("version") if entry else None
+                stale = self._superseded.pop(path)
+            elif entry is None:
+                # Deleted while it was being ingested
+                current, version = set(), None
+                stale = ids | self._superseded.pop(path, set())
+            else:
+                current, version = ids, job.version
+                with self.pool.lease(self.tenant_id) as memory:
+                    stale = self._stored_ids(memory.store, path) | self._superseded.pop(path, set())
+                entry["chunks"], entry["version"] = sorted(ids), job.version
+                self._dirty = True
+
+            with self.pool.lease(self.tenant_id) as memory:
+                if stale - current:
+                    memory.store.delete(ids=sorted(stale - current))
+                self._restamp(memory.store, stale & current, version)
+        if self._dirty:
+            self._save_manifest()
+
+    def _save_manifest(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, self.manifest_path)
+        self._dirty = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "roots": self.roots,
+            "mode": "inotify" if self.backend else ("polling" if self.running else "off"),
+            "tracked_files": len(self.manifest),
+            "pending_changes": len(self._pending),
+            "jobs_in_flight": len(self._in_flight),
+            "files_ingested": self.files_ingested,
+            "files_unchanged": self.files_unchanged,
+            "files_removed": self.files_removed,
+        }
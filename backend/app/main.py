@@ -1,10 +1,17 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, Header, Request
 from pydantic import BaseModel
+from typing import Optional, List, Literal
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 import uvicorn
 from dotenv import load_dotenv
 import os
 import sys
+import time
+import json
+import asyncio
+import tempfile
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,10 +20,24 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 load_dotenv()
 
 # --- INTERNAL MODULES ---
-from app.core.memory import MemoryBank
+from app.core.tenancy import TenantMemoryPool
 from app.core.ingester import FileIngester
+from app.core.parse_cache import get_parse_cache
+from app.core.parsers import UnsupportedFormat, registry as parser_registry, start_pdf_pool, stop_pdf_pool
 from app.core.llm import LocalLLM
+from app.core.scheduler import GenerationScheduler, SchedulerFull
+from app.core.coalesce import Coalescer, Flight, normalize, fingerprint
+from app.core.answer_cache import AnswerCache, context_fingerprint
+from app.core.context_packer import ContextPacker
+from app.core.sessions import SessionStore
 from app.core.orchestrator import system_orchestrator
+from app.core.retention import Compactor
+from app.core.ingest_queue import IngestQueue, IngestWorkers, chunk_id
+from app.core.jobs import JobManager, TERMINAL_STATES
+from app.core.chunker import make_chunker
+from app.core.uploads import receive_upload, UploadError, UploadTooLarge
+from app.core.bulk import BulkIngester
+from app.core.watcher import FolderWatcher
 from app.agents.agent_manager import AgentManager  # <--- NEW: The Tool Router
 
 app = FastAPI(title="Synapse Backend", version="2.1")
@@ -32,69 +53,371 @@ app.add_middleware(
 
 # --- INITIALIZATION ---
 print("🔌 Booting Synapse Core...")
-memory = MemoryBank()           # The Hippocampus (Database)
-llm = LocalLLM(model="llama3")  # The Prefrontal Cortex (Ollama)
-agent_manager = AgentManager()  # The Hands (Toolbelt)
+memory_pool = TenantMemoryPool()  # The Hippocampus (Database)
+llm = LocalLLM(model="llama3")    # The Prefrontal Cortex (Ollama)
+generation_scheduler = GenerationScheduler()
+coalescer = Coalescer()
+answer_cache = AnswerCache()
+context_packer = ContextPacker()
+sessions = SessionStore(llm, generation_scheduler)
+agent_manager = AgentManager()    # The Hands (Toolbelt)
+compactor = Compactor(memory_pool)
+ingest_queue = IngestQueue()
+chunker = make_chunker()
+job_manager = JobManager(ingest_queue, chunker=chunker)
+ingest_workers = IngestWorkers(ingest_queue, memory_pool, on_stored=job_manager.record_stored,
+                               on_failed=job_manager.record_failed)
+
+# Spill directory for uploads larger than the per-request memory ceiling
+UPLOAD_DIR = os.getenv("SYNAPSE_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "synapse_uploads"))
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+bulk_ingester = BulkIngester(job_manager, spool_dir=UPLOAD_DIR)
+folder_watcher = FolderWatcher(job_manager, memory_pool)
+
+COMPACTION_INTERVAL_SEC = float(os.getenv("SYNAPSE_COMPACTION_INTERVAL_SEC", "0"))
+
+@app.on_event("startup")
+def start_background_work():
+    # Not at import time: PDF worker processes (spawn/forkserver) re-import
+    # this module when it is run as `python -m app.main`
+    memory_pool.get()             # Warm the default tenant so the first request doesn't pay for it
+    start_pdf_pool()              # before any thread can parse a PDF
+    ingest_workers.start()
+    folder_watcher.start()
+    if COMPACTION_INTERVAL_SEC > 0:
+        compactor.start(COMPACTION_INTERVAL_SEC)
 
 # --- DATA MODELS ---
 class Query(BaseModel):
     text: str
+    tenant_id: Optional[str] = None
+    priority: Literal["interactive", "background"] = "interactive"
+    session_id: Optional[str] = None
+
+def resolve_tenant(*candidates):
+    """First non-empty tenant id (body/form field, then X-Tenant-Id header), else the default tenant."""
+    for candidate in candidates:
+        if candidate:
+            return candidate.strip()
+    return None
 
 class ModeRequest(BaseModel):
     mode: str
 
+class SourceDocument(BaseModel):
+    text: str
+    source: str
+    source_type: str = "sync"
+    version: Optional[int] = None
+
+class IngestRequest(BaseModel):
+    documents: List[SourceDocument]
+    tenant_id: Optional[str] = None
+
+def enqueue_chunks(tenant, chunks, source, source_type, version):
+    """Appends one document's chunks to the durable ingestion log."""
+    ingest_queue.enqueue(tenant, [
+        {
+            "id": chunk_id(tenant, source, chunk),
+            "text": chunk,
+            "metadata": {"source": source, "source_type": source_type, "version": version},
+        }
+        for chunk in chunks
+    ])
+    return len(chunks)
+
 # --- ROUTES ---
 
 @app.get("/")
-def health_check():
+async def health_check():
     return {
         "status": "Online",
-        "memory_engine": memory.brain.hardware_mode,
+        "memory_engine": memory_pool.brain.hardware_mode,
         "generation_engine": "Ollama (Simulated GPU)",
+        "generation_model": llm.status(),
         "orchestrator": system_orchestrator.active_mode,
         "agents_active": ["GitHub"] 
     }
 
 # --- 1. THE EYES (File Ingestion) ---
 @app.post("/upload")
-async def upload_document(file: UploadFile = File(...)):
-    """Reads a PDF/Text file and saves it to Vector Memory."""
+async def upload_document(request: Request, x_tenant_id: Optional[str] = Header(None)):
+    """
+    Accepts a document (multipart field "file") and returns a job id immediately.
+    The body is streamed into a spooled temp file under a hard memory ceiling and
+    size limit; parsing, chunking and embedding run in the background (see /jobs/{id}).
+    Files no registered parser can read are refused with 415.
+    """
+    # A. Stream the upload to a spooled file (RAM up to the ceiling, disk beyond)
     try:
-        # A. Parse Text
-        raw_text = await FileIngester.parse_file(file)
-        
-        # B. Chunk Text
-        chunks = FileIngester.chunk_text(raw_text)
-        
-        # C. Memorize Each Chunk
-        saved_ids = []
-        for chunk in chunks:
-            doc_id = memory.memorize(chunk, metadata={"source": file.filename})
-            saved_ids.append(doc_id)
-            
+        upload = await receive_upload(request, spool_dir=UPLOAD_DIR)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # B. Refuse formats we can't parse before queueing any work
+    try:
+        parser = FileIngester.parser_for(upload.file, upload.filename, upload.content_type)
+    except UnsupportedFormat as e:
+        upload.close()
+        raise HTTPException(status_code=415, detail=f"{e} Supported: {', '.join(parser_registry.extensions())}")
+
+    tenant = resolve_tenant(upload.fields.get("tenant_id"), x_tenant_id)
+    try:
+        # C. Hand it to the background job pool (which closes the spool when parsed)
+        spooled_to_disk = not upload.in_memory
+        job = job_manager.submit(upload.file, upload.filename, tenant, content_type=upload.content_type)
         return {
-            "status": "success", 
-            "filename": file.filename, 
-            "chunks_processed": len(saved_ids),
-            "hardware": memory.brain.hardware_mode
+            "status": "accepted",
+            "job_id": job.id,
+            "filename": upload.filename,
+            "format": parser.name,
+            "bytes": upload.size,
+            "spooled_to_disk": spooled_to_disk,
+            "hardware": memory_pool.brain.hardware_mode
         }
     except Exception as e:
+        upload.close()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/jobs")
+def list_jobs(x_tenant_id: Optional[str] = Header(None)):
+    """Recent ingestion jobs of the caller's tenant, newest first."""
+    return {"jobs": job_manager.list(resolve_tenant(x_tenant_id))}
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str, x_tenant_id: Optional[str] = Header(None)):
+    """Parsed pages, chunks embedded, throughput and ETA for one upload."""
+    job = job_manager.get(job_id, resolve_tenant(x_tenant_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, x_tenant_id: Optional[str] = Header(None)):
+    """Server-Sent Events stream of job progress; closes when the job finishes."""
+    job = job_manager.get(job_id, resolve_tenant(x_tenant_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        last_revision = -1
+        while True:
+            if job.revision != last_revision:
+                last_revision = job.revision
+                yield f"event: progress\ndata: {json.dumps(job.to_dict())}\n\n"
+                if job.status in TERMINAL_STATES:
+                    return
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/ingest/documents")
+def ingest_documents(request: IngestRequest, x_tenant_id: Optional[str] = Header(None)):
+    """Connector sync path: chunk plain-text documents and append them to the ingestion log."""
+    tenant = resolve_tenant(request.tenant_id, x_tenant_id)
+    queued = 0
+    for doc in request.documents:
+        version = doc.version or int(time.time() * 1000)
+        queued += enqueue_chunks(tenant, chunker.chunk(doc.text), doc.source, doc.source_type, version)
+    return {"status": "queued", "documents": len(request.documents), "chunks_queued": queued}
+
+@app.get("/ingest/status")
+def ingest_status():
+    """Pending/leased/failed chunks in the ingestion log, worker throughput and parse cache hits."""
+    cache = get_parse_cache()
+    return {**ingest_workers.stats(), "parse_cache": cache.stats() if cache else None}
+
+@app.get("/ingest/watch")
+def watch_status():
+    """Watched folders: tracked files, pending changes and sync counters."""
+    return folder_watcher.stats()
+
+@app.post("/ingest/bulk")
+async def ingest_bulk(request: Request, x_tenant_id: Optional[str] = Header(None)):
+    """
+    Bulk onboarding in one request: either a multipart zip/tar archive (field "file")
+    or a JSON body {"directory": "/srv/docs", "tenant_id": ...} naming a folder under
+    SYNAPSE_INGEST_ROOTS. Returns a bulk id; GET /ingest/bulk/{id} has the per-file summary.
+    """
+    if request.headers.get("content-type", "").startswith("application/json"):
+        body = await request.json()
+        tenant = resolve_tenant(body.get("tenant_id"), x_tenant_id)
+        try:
+            bulk = bulk_ingester.submit_directory(body.get("directory") or "", tenant)
+        except PermissionError as e:
+            raise HTTPException(status_code=403, detail=str(e))
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    else:
+        try:
+            upload = await receive_upload(request, spool_dir=UPLOAD_DIR)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except UploadError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        tenant = resolve_tenant(upload.fields.get("tenant_id"), x_tenant_id)
+        try:
+            bulk = bulk_ingester.submit_archive(upload.file, upload.filename, tenant)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "accepted", "bulk_id": bulk.id, "kind": bulk.kind, "name": bulk.name}
+
+@app.get("/ingest/bulk")
+def list_bulk_jobs(x_tenant_id: Optional[str] = Header(None)):
+    """Recent bulk ingestions of the caller's tenant, newest first (totals only)."""
+    return {"bulk_jobs": bulk_ingester.list(resolve_tenant(x_tenant_id))}
+
+@app.get("/ingest/bulk/{bulk_id}")
+def bulk_status(bulk_id: str, x_tenant_id: Optional[str] = Header(None)):
+    """Per-file results plus files/sec and chunks/sec for one archive or directory."""
+    bulk = bulk_ingester.get(bulk_id, resolve_tenant(x_tenant_id))
+    if bulk is None:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return bulk.to_dict()
+
+@app.on_event("startup")
+async def warm_llm():
+    # Load llama3 in the background while the server starts taking requests
+    llm.start_warmup()
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await sessions.aclose()
+    await llm.aclose()
+    stop_pdf_pool()
+
 # --- 2. THE VOICE & HANDS (Agentic Search) ---
+def busy(e: SchedulerFull) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def recall_context(text: str, tenant_id: str):
+    """
+    Top memory chunks for a question, the context block handed to the LLM
+    (packed into the context token budget), the question's embedding and the
+    packing report.
+    """
+    query_vector = memory_pool.brain.embed_text(text)
+    with memory_pool.lease(tenant_id) as memory:
+        results = memory.recall(text, n_results=3, query_vector=query_vector)
+    retrieved_docs = results['documents'][0]
+    if not retrieved_docs:
+        return retrieved_docs, "No relevant memory found.", query_vector, {}
+    context_block, packing = context_packer.pack(text, retrieved_docs)
+    return retrieved_docs, context_block, query_vector, packing
+
+async def shared_recall(text: str, tenant_id: str):
+    """recall_context, run once for concurrent identical questions from the same tenant."""
+    return await coalescer.call(("recall", tenant_id, normalize(text)),
+                                lambda: run_in_threadpool(recall_context, text, tenant_id))
+
+def cached_answer(text: str, tenant_id: str, retrieved_docs, query_vector):
+    """A cached answer to this question or a paraphrase of it, generated from the same retrieved chunks."""
+    return answer_cache.lookup(tenant_id, context_fingerprint(llm.model, retrieved_docs), query_vector)
+
+async def answer_flight(text: str, tenant_id: str, retrieved_docs, context_block: str, query_vector, priority: str):
+    """
+    The generation already running for this question and context, or a new one
+    once the scheduler grants a slot (503 if it can't). Joiners skip the queue.
+    A finished generation goes into the answer cache, keyed on the retrieved
+    chunks rather than the packed block.
+    """
+    key = fingerprint(llm.model, normalize(text), context_block)
+    flight = coalescer.join(key)
+    if flight is not None:
+        return flight
+    try:
+        slot = await generation_scheduler.acquire(priority)
+    except SchedulerFull as e:
+        raise busy(e)
+    # An identical request may have started generating while this one queued
+    flight = coalescer.join(key)
+    if flight is not None:
+        slot.release()
+        return flight
+
+    def finished():
+        slot.release()
+        if flight.error is None:
+            answer_cache.put(tenant_id, context_fingerprint(llm.model, retrieved_docs), query_vector, text, "".join(flight.tokens))
+
+    try:
+        flight = coalescer.start(key, llm.stream_answer(context_block, text), on_finish=finished)
+    except BaseException:
+        slot.release()
+        raise
+    return flight
+
+def find_session(session_id: str, tenant_id: str):
+    session = sessions.get(session_id, tenant_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return session
+
+async def session_flight(session, text: str, tenant_id: str, priority: str):
+    """
+    The next turn of a conversation. Retrieval also sees the previous question,
+    so a follow-up like "and how much memory does it use?" finds the same
+    material. The turn continues Ollama's token state from the previous one.
+    Not coalesced or cached: the answer depends on the conversation.
+    """
+    recall_text = f"{session.turns[-1]['question']} {text}" if session.turns else text
+    retrieved_docs, context_block, _, packing = await run_in_threadpool(recall_context, recall_text, tenant_id)
+    await session.lock.acquire()
+    slot = None
+    try:
+        slot = await generation_scheduler.acquire(priority)
+        prompt, state = session.prompt(context_block, text)
+        epoch, final = session.epoch, {}
+
+        def finished():
+            slot.release()
+            try:
+                if flight.error is None:
+                    sessions.record(session, text, "".join(flight.tokens), final, epoch, reused=state is not None)
+            finally:
+                session.lock.release()
+
+        flight = Flight(session.id, llm.stream_generate(prompt, state, on_done=final.update, prefer=session.backend), finished)
+    except BaseException as e:
+        # Until the flight is running nothing else will release them
+        if slot is not None:
+            slot.release()
+        session.lock.release()
+        if isinstance(e, SchedulerFull):
+            raise busy(e)
+        raise
+
+    def report():
+        return {
+            "session_id": session.id,
+            "turn": session.turn_count,
+            "context_reused": state is not None,
+            "prompt_tokens_evaluated": final.get("prompt_eval_count"),
+            "prompt_eval_ms": round(final["prompt_eval_duration"] / 1e6, 1) if "prompt_eval_duration" in final else None,
+        }
+
+    return flight, retrieved_docs, packing, report
+
 @app.post("/ask")
-def ask_synapse(query: Query):
+async def ask_synapse(query: Query, x_tenant_id: Optional[str] = Header(None)):
     """
     Logic Flow:
     1. Check Agent Manager (Does user want GitHub/Jira?) -> NPU Task
     2. If Yes -> Run Tool -> Return Result
     3. If No -> Search Memory -> Generate Answer (RAG) -> GPU Task
+
+    Agents and recall are blocking, so they run on the threadpool; generation
+    is awaited on the event loop and holds no thread while Ollama works.
     """
     print(f"User asked: {query.text}")
 
     # --- STEP 1: AGENTIC ROUTING (The Switchboard) ---
     # We ask the Agent Manager if this looks like a tool request
-    agent_response = agent_manager.route_request(query.text)
+    agent_response = await run_in_threadpool(agent_manager.route_request, query.text)
     
     if agent_response:
         print("🤖 Agent handled the request.")
@@ -107,25 +430,182 @@ def ask_synapse(query: Query):
     # --- STEP 2: STANDARD RAG (The Memory) ---
     print("🧠 No agent needed. Searching Memory...")
     
-    # A. Search local memory
-    results = memory.recall(query.text, n_results=3)
-    retrieved_docs = results['documents'][0]
-    
-    # B. Check if we found anything
-    if not retrieved_docs:
-        context_block = "No relevant memory found."
-    else:
-        context_block = "\n".join(retrieved_docs)
+    # A. Search the tenant's local memory (B. "No relevant memory found." if empty)
+    tenant = resolve_tenant(query.tenant_id, x_tenant_id)
+    if query.session_id:
+        # A follow-up in a conversation: continue its Ollama context instead
+        session = find_session(query.session_id, tenant)
+        flight, retrieved_docs, packing, turn_report = await session_flight(session, query.text, tenant, query.priority)
+        try:
+            ai_response = await flight.result()
+        except Exception as e:
+            ai_response = f"LLM Connection Failed: {str(e)}"
+        return {
+            "answer": ai_response,
+            "sources": retrieved_docs,
+            "hardware_flow": f"{memory_pool.brain.hardware_mode} -> ROCm_Sim",
+            "context_tokens": packing,
+            **turn_report(),
+        }
+    retrieved_docs, context_block, query_vector, packing = await shared_recall(query.text, tenant)
 
-    # C. Send to Llama 3 (Ollama)
-    ai_response = llm.generate_answer(context_block, query.text)
+    # C. Reuse the answer to an earlier paraphrase built from the same context, if there is one
+    cached = cached_answer(query.text, tenant, retrieved_docs, query_vector)
+    if cached:
+        return {
+            "answer": cached["answer"],
+            "sources": retrieved_docs,
+            "hardware_flow": f"{memory_pool.brain.hardware_mode} -> Answer_Cache",
+            "cached": True,
+            "context_tokens": packing,
+        }
+
+    # D. Send to Llama 3 (Ollama) once the scheduler has a slot, or share an identical generation
+    flight = await answer_flight(query.text, tenant, retrieved_docs, context_block, query_vector, query.priority)
+    try:
+        ai_response = await flight.result()
+    except Exception as e:
+        ai_response = f"LLM Connection Failed: {str(e)}"
     
     return {
         "answer": ai_response,
         "sources": retrieved_docs,
-        "hardware_flow": f"{memory.brain.hardware_mode} -> ROCm_Sim"
+        "hardware_flow": f"{memory_pool.brain.hardware_mode} -> ROCm_Sim",
+        "context_tokens": packing,
     }
 
+@app.post("/ask/stream")
+async def ask_synapse_stream(query: Query, x_tenant_id: Optional[str] = Header(None)):
+    """
+    /ask as Server-Sent Events: a `sources` event as soon as retrieval is done,
+    then one `token` event per generated token, then `done` with timings
+    (or `error`). The answer starts rendering at time-to-first-token instead
+    of after the whole generation. A full generation queue is a 503 before
+    the stream opens. Identical concurrent questions follow one generation.
+    """
+    print(f"User asked (stream): {query.text}")
+    started = time.time()
+    # A tool answer or a cached answer is sent as a single token
+    ready_answer = await run_in_threadpool(agent_manager.route_request, query.text)
+    cached, packing, turn_report = None, {}, None
+    if ready_answer:
+        sources = ["External API (GitHub/Tool)"]
+        hardware_flow = "NPU_Router -> External_Tool"
+    elif query.session_id:
+        tenant = resolve_tenant(query.tenant_id, x_tenant_id)
+        session = find_session(query.session_id, tenant)
+        hardware_flow = f"{memory_pool.brain.hardware_mode} -> ROCm_Sim"
+        flight, sources, packing, turn_report = await session_flight(session, query.text, tenant, query.priority)
+    else:
+        tenant = resolve_tenant(query.tenant_id, x_tenant_id)
+        sources, context_block, query_vector, packing = await shared_recall(query.text, tenant)
+        cached = cached_answer(query.text, tenant, sources, query_vector)
+        if cached:
+            ready_answer = cached["answer"]
+            hardware_flow = f"{memory_pool.brain.hardware_mode} -> Answer_Cache"
+        else:
+            hardware_flow = f"{memory_pool.brain.hardware_mode} -> ROCm_Sim"
+            flight = await answer_flight(query.text, tenant, sources, context_block, query_vector, query.priority)
+
+    def event(name, data):
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+    async def ready_tokens():
+        yield ready_answer
+
+    async def event_stream():
+        # Cancelled if the client leaves; the generation stops once none of its subscribers remain
+        yield event("sources", {"sources": sources, "hardware_flow": hardware_flow, "context_tokens": packing})
+        tokens = ready_tokens() if ready_answer else flight.subscribe()
+        first_token_at, count = None, 0
+        try:
+            async for token in tokens:
+                first_token_at = first_token_at or time.time()
+                count += 1
+                yield event("token", {"text": token})
+        except Exception as e:
+            yield event("error", {"detail": f"LLM Connection Failed: {e}"})
+            return
+        yield event("done", {
+            "tokens": count,
+            "time_to_first_token_ms": round((first_token_at - started) * 1000) if first_token_at else None,
+            "total_ms": round((time.time() - started) * 1000),
+            "cached": bool(cached),
+            **(turn_report() if turn_report else {}),
+        })
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/llm/backends")
+def llm_backends():
+    """Ollama backends: health, ejection, outstanding requests and whether each has the model loaded."""
+    return llm.status()
+
+@app.get("/llm/scheduler")
+def scheduler_stats():
+    """Generations running and queued, rejections, and queue wait / generation time percentiles."""
+    return generation_scheduler.stats()
+
+@app.get("/llm/coalescing")
+def coalescing_stats():
+    """Generations and retrievals run vs. saved by sharing identical in-flight /ask requests."""
+    return coalescer.stats()
+
+@app.post("/sessions")
+def create_session(x_tenant_id: Optional[str] = Header(None)):
+    """Starts a conversation; pass its session_id with each /ask in it."""
+    return sessions.create(resolve_tenant(x_tenant_id)).to_dict()
+
+@app.get("/sessions/{session_id}")
+def session_status(session_id: str, x_tenant_id: Optional[str] = Header(None)):
+    return find_session(session_id, resolve_tenant(x_tenant_id)).to_dict()
+
+@app.delete("/sessions/{session_id}")
+def end_session(session_id: str, x_tenant_id: Optional[str] = Header(None)):
+    if not sessions.delete(session_id, resolve_tenant(x_tenant_id)):
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return {"session_id": session_id, "deleted": True}
+
+@app.get("/llm/sessions")
+def session_stats():
+    """Live sessions, compactions, and prompt tokens evaluated per turn with vs. without context reuse."""
+    return sessions.stats()
+
+@app.get("/llm/context")
+def context_packing_stats():
+    """Context token budget and prompt tokens saved by packing retrieved chunks."""
+    return context_packer.stats()
+
+@app.get("/llm/answer-cache")
+def answer_cache_stats():
+    """Semantic answer cache size, hit rate and entries invalidated by changed sources."""
+    return answer_cache.stats()
+
+@app.get("/memory/compression")
+def compression_report(sample_queries: int = 200, k: int = 10, x_tenant_id: Optional[str] = Header(None)):
+    """Memory footprint vs recall@k for the tenant's vector compression level."""
+    with memory_pool.lease(resolve_tenant(x_tenant_id)) as memory:
+        return memory.compression_report(sample_queries=sample_queries, k=k)
+
+@app.get("/memory/tenants")
+def tenant_stats():
+    """Open tenant handles, resident memory and LRU evictions."""
+    return memory_pool.stats()
+
+@app.post("/memory/compact")
+def run_compaction():
+    """Applies retention policies now and reports what was reclaimed."""
+    try:
+        return compactor.run_once()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/memory/compaction")
+def last_compaction():
+    """Report from the most recent compaction run."""
+    return compactor.last_report or {"status": "never_run"}
+
 # --- 3. THE AUTONOMIC SYSTEM (Orchestrator) ---
 @app.post("/set_mode")
 def change_workflow(request: ModeRequest):
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the backend as `app.*`, like `python -m app.main` does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
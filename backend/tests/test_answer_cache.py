@@ -0,0 +1,44 @@
+from app.core.answer_cache import AnswerCache, context_fingerprint
+from app.core.context_packer import ContextPacker
+
+
+class WordTokenizer:
+    """Whitespace 'tokenizer' so the packer doesn't need the embedding model's files."""
+
+    def __call__(self, texts, add_special_tokens=False):
+        return {"input_ids": [text.split() for text in texts]}
+
+
+DOCS = [
+    "Synapse embeds every chunk with the MiniLM embedding model. The vectors are stored on disk. "
+    "Ingestion runs in background workers. Uploads larger than eight megabytes spill to a temp file.",
+    "The embedding model runs on the NPU when one is present. Otherwise it falls back to the CPU.",
+]
+
+
+def test_paraphrases_share_one_entry_with_packing_enabled():
+    packer = ContextPacker(budget_tokens=1024, tokenizer=WordTokenizer())
+    first, second = "what does synapse use for embeddings", "which embedding model does synapse use"
+    first_block, _ = packer.pack(first, DOCS)
+    second_block, _ = packer.pack(second, DOCS)
+    # Packing keeps the sentences matching each question's words...
+    assert first_block != second_block
+
+    # ...but the cache is keyed on the retrieved chunks, so the paraphrase still hits
+    cache = AnswerCache(threshold=0.9, max_entries=16, ttl_sec=60)
+    key = context_fingerprint("llama3", DOCS)
+    cache.put("tenant", key, [1.0, 0.10, 0.0], first, "MiniLM.")
+    hit = cache.lookup("tenant", context_fingerprint("llama3", DOCS), [1.0, 0.12, 0.0])
+
+    assert hit is not None and hit["answer"] == "MiniLM."
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["invalidated"] == 0
+
+
+def test_changed_chunks_miss_and_drop_the_stale_answer():
+    cache = AnswerCache(threshold=0.9, max_entries=16, ttl_sec=60)
+    cache.put("tenant", context_fingerprint("llama3", DOCS), [1.0, 0.0, 0.0], "q", "old answer")
+    edited = [DOCS[0].replace("MiniLM", "BGE"), DOCS[1]]
+
+    assert cache.lookup("tenant", context_fingerprint("llama3", edited), [1.0, 0.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,124 @@
+import io
+import tarfile
+import threading
+import time
+import zipfile
+
+import pytest
+
+from app.core.bulk import BulkIngester, resolve_directory
+
+
+class Job:
+    def __init__(self, name, data, parsed=True):
+        self.id = name
+        self.name = name
+        self.data = data
+        self.parsed = threading.Event()
+        self.status = "queued"
+        self.chunks_queued = self.chunks_embedded = self.chunks_reused = self.pages_parsed = 0
+        self.error = None
+        if parsed:
+            self.finish()
+
+    def finish(self):
+        self.status = "done"
+        self.parsed.set()
+
+
+class Jobs:
+    def __init__(self, parsed=True):
+        self.parsed = parsed
+        self.submitted = []
+
+    def submit(self, source, filename, tenant_id, owned=True, metadata=None):
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                data = f.read()
+        else:
+            data = source.read()
+            source.close()
+        job = Job(filename, data, parsed=self.parsed)
+        self.submitted.append(job)
+        return job
+
+
+FILES = {"./notes.txt": b"hello notes", "docs/guide.md": b"# guide", "image.png": b"\x89PNG", "big.txt": b"x" * 64}
+
+
+def zip_archive():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in FILES.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def tar_archive():
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in FILES.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+def wait_for(bulk):
+    deadline = time.time() + 10
+    while bulk.status not in ("done", "failed") and time.time() < deadline:
+        time.sleep(0.01)
+    return bulk.to_dict()
+
+
+@pytest.mark.parametrize("archive", [zip_archive, tar_archive])
+def test_archive_entries_are_spooled_to_jobs_and_the_rest_skipped(archive):
+    jobs = Jobs()
+    bulk = BulkIngester(jobs, max_entry_bytes=32).submit_archive(archive(), "team.zip", "acme")
+    summary = wait_for(bulk)
+
+    assert summary["status"] == "done"
+    assert {job.name: job.data for job in jobs.submitted} == {"notes.txt": b"hello notes", "docs/guide.md": b"# guide"}
+    skipped = {f["name"]: f["reason"] for f in summary["files"] if f["status"] == "skipped"}
+    assert skipped == {"image.png": "unsupported file type", "big.txt": "file too large"}
+    assert summary["files_done"] == 2 and summary["files_skipped"] == 2
+
+
+def test_not_an_archive_is_refused():
+    with pytest.raises(ValueError):
+        BulkIngester(Jobs()).submit_archive(io.BytesIO(b"plain text"), "notes.txt", None)
+
+
+def test_directories_must_sit_under_an_allowed_root(tmp_path):
+    allowed, other = tmp_path / "allowed", tmp_path / "other"
+    allowed.mkdir()
+    other.mkdir()
+    assert resolve_directory(str(allowed / "."), roots=[str(allowed)]) == str(allowed)
+    with pytest.raises(PermissionError):
+        resolve_directory(str(other), roots=[str(allowed)])
+    with pytest.raises(PermissionError):
+        resolve_directory(str(allowed / ".." / "other"), roots=[str(allowed)])
+    with pytest.raises(PermissionError):
+        resolve_directory(str(allowed), roots=[])
+
+
+def test_walk_waits_while_max_inflight_files_are_unparsed(tmp_path):
+    for i in range(5):
+        (tmp_path / f"{i}.txt").write_text(f"file {i}")
+    jobs = Jobs(parsed=False)
+    bulk = BulkIngester(jobs, max_inflight=2).submit_directory(str(tmp_path), None, check_roots=False)
+
+    time.sleep(0.3)
+    assert len(jobs.submitted) == 2 and bulk.status == "walking"
+    deadline = time.time() + 10
+    while not bulk.walk_done and time.time() < deadline:
+        for job in list(jobs.submitted):
+            job.finish()
+        time.sleep(0.01)
+    for job in jobs.submitted:
+        job.finish()
+    summary = wait_for(bulk)
+    assert summary["status"] == "done" and summary["files_done"] == 5
+    assert sorted(job.data for job in jobs.submitted) == [f"file {i}".encode() for i in range(5)]
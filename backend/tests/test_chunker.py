@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+pytest.importorskip("onnxruntime")   # the chunkers read MAX_TOKENS from the AMD Bridge
+from tokenizers import Tokenizer, models, pre_tokenizers, processors  # noqa: E402
+from transformers import PreTrainedTokenizerFast  # noqa: E402
+
+from app.core.chunker import ContentDefinedChunker, TokenChunker  # noqa: E402
+
+WORDS = [f"w{i}" for i in range(500)]
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    """A word-level fast tokenizer (one token per word or punctuation mark) with [CLS]/[SEP]."""
+    vocab = {token: i for i, token in enumerate(["[UNK]", "[CLS]", "[SEP]", ".", ","] + WORDS)}
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    backend.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 1), ("[SEP]", 2)])
+    return PreTrainedTokenizerFast(tokenizer_object=backend, unk_token="[UNK]", cls_token="[CLS]", sep_token="[SEP]")
+
+
+def document(sentences=200, seed=0):
+    rng = random.Random(seed)
+    return " ".join(" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))) + "." for _ in range(sentences))
+
+
+def n_tokens(tokenizer, text):
+    return len(tokenizer(text)["input_ids"])
+
+
+def test_token_chunks_fit_the_model_with_special_tokens(tokenizer):
+    chunker = TokenChunker(tokenizer, max_tokens=40, overlap=8)
+    chunks = chunker.chunk(document())
+    assert len(chunks) > 10
+    assert max(n_tokens(tokenizer, chunk) for chunk in chunks) <= 40
+
+
+def test_token_chunks_end_on_sentences_and_overlap(tokenizer):
+    chunker = TokenChunker(tokenizer, max_tokens=40, overlap=8)
+    chunks = chunker.chunk(document())
+    # Sentences are at most 13 tokens, so a sentence end always falls in the second half
+    assert all(chunk.endswith(".") for chunk in chunks)
+    for previous, following in zip(chunks, chunks[1:]):
+        head = following.split(".")[0]
+        assert head in previous
+
+
+def test_streamed_pages_chunk_like_the_whole_document(tokenizer, monkeypatch):
+    import app.core.chunker as chunker_module
+
+    monkeypatch.setattr(chunker_module, "STREAM_BUFFER_CHARS", 500)
+    chunker = TokenChunker(tokenizer, max_tokens=40, overlap=0)
+    text = document()
+    sentences = [s.strip() + "." for s in text.split(".") if s.strip()]
+    pages = [" ".join(sentences[i:i + 7]) for i in range(0, len(sentences), 7)]
+    streamed = list(chunker.iter_chunks(pages))
+    assert max(n_tokens(tokenizer, chunk) for chunk in streamed) <= 40
+    assert " ".join(streamed).split() == text.split()
+
+
+def test_content_defined_chunks_stay_within_bounds(tokenizer):
+    chunker = ContentDefinedChunker(tokenizer, max_tokens=64, min_tokens=16)
+    chunks = chunker.chunk(document(400))
+    sizes = [n_tokens(tokenizer, chunk) - 2 for chunk in chunks]
+    assert max(sizes) <= 62
+    assert min(sizes[:-1]) >= 16
+
+
+def test_an_edit_only_changes_the_chunks_around_it(tokenizer):
+    chunker = ContentDefinedChunker(tokenizer, max_tokens=64, min_tokens=16)
+    original = document(400)
+    words = original.split(" ")
+    middle = len(words) // 2
+    edited = " ".join(words[:middle] + ["w1", "w2", "w3"] + words[middle:])
+
+    before, after = chunker.chunk(original), chunker.chunk(edited)
+    unchanged = set(before) & set(after)
+    # Cut points resynchronise shortly after the edit, so almost every chunk id is reused
+    assert len(unchanged) >= len(before) - 3
+    # Fixed-size token chunks would shift every chunk after the insertion
+    fixed = TokenChunker(tokenizer, max_tokens=64, overlap=0)
+    assert len(set(fixed.chunk(original)) & set(fixed.chunk(edited))) < len(unchanged)
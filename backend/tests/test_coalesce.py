@@ -0,0 +1,76 @@
+import asyncio
+
+from app.core.coalesce import Coalescer, fingerprint, normalize
+
+
+async def tokens(*words):
+    for word in words:
+        await asyncio.sleep(0)
+        yield word
+
+
+def test_questions_differing_in_case_space_and_punctuation_coalesce():
+    assert normalize("  What is  ROCm? ") == normalize("what is rocm")
+    assert fingerprint("a", "bc") != fingerprint("ab", "c")
+
+
+def test_concurrent_calls_share_one_run():
+    async def scenario():
+        coalescer, runs = Coalescer(), []
+
+        async def recall():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return ["doc"]
+
+        results = await asyncio.gather(*(coalescer.call("key", recall) for _ in range(3)))
+        assert results == [["doc"]] * 3 and len(runs) == 1
+        assert coalescer.stats()["retrievals_saved"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_joiners_get_the_tokens_generated_before_they_joined():
+    async def scenario():
+        coalescer = Coalescer()
+        leader = coalescer.start("key", tokens("a", "b", "c"))
+        while not leader.tokens:
+            await asyncio.sleep(0)
+        joined = coalescer.join("key")
+        assert await asyncio.gather(leader.result(), joined.result()) == ["abc", "abc"]
+        assert coalescer.stats()["generations_saved"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_joiner_that_has_not_started_iterating_keeps_the_flight_alive():
+    async def scenario():
+        coalescer = Coalescer()
+        leader = coalescer.start("key", tokens("a", "b", "c"))
+        joined = coalescer.join("key")
+        assert joined is leader and leader.subscribers == 2
+
+        # The leader's client disconnects after the first token
+        stream = leader.subscribe()
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+        assert not leader.task.cancelled()
+
+        assert await joined.result() == "abc"
+        assert leader.subscribers == 0
+
+    asyncio.run(scenario())
+
+
+def test_last_subscriber_leaving_cancels_the_generation():
+    async def scenario():
+        coalescer = Coalescer()
+        flight = coalescer.start("key", tokens("a", "b", "c"))
+        stream = flight.subscribe()
+        await stream.__anext__()
+        await stream.aclose()
+        await asyncio.gather(flight.task, return_exceptions=True)
+        assert flight.done and isinstance(flight.error, ConnectionAbortedError)
+        assert coalescer.join("key") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,49 @@
+import pytest
+
+from app.core import context_packer
+from app.core.context_packer import ContextPacker
+
+DOCS = [
+    "ROCm runs PyTorch on AMD GPUs. The office opens at nine. ROCm needs a supported kernel driver.",
+    "ROCm runs PyTorch on AMD GPUs. Lunch is served in the atrium.",
+    "The NPU handles embeddings through Vitis AI. Parking is free on weekends.",
+]
+
+
+@pytest.fixture
+def packer(monkeypatch):
+    def unavailable():
+        raise OSError("offline")
+    monkeypatch.setattr(context_packer, "load_tokenizer", unavailable)   # count with the regex estimate
+    return lambda budget: ContextPacker(budget_tokens=budget)
+
+
+def test_sentences_repeated_across_chunks_are_kept_once(packer):
+    context, report = packer(1000).pack("How does ROCm run PyTorch?", DOCS)
+    assert context.count("ROCm runs PyTorch on AMD GPUs.") == 1
+    assert report["tokens_packed"] < report["tokens_retrieved"]
+
+
+def test_unrelated_sentences_are_dropped_and_order_is_kept(packer):
+    context, report = packer(1000).pack("Which kernel driver does ROCm need?", DOCS)
+    assert "office" not in context and "Lunch" not in context and "Parking" not in context
+    assert context.index("ROCm runs PyTorch") < context.index("kernel driver")
+    assert report["sentences_dropped"] > 0
+
+
+def test_packed_context_fits_the_budget(packer):
+    p = packer(12)
+    context, report = p.pack("ROCm PyTorch kernel driver NPU embeddings", DOCS)
+    assert report["tokens_packed"] <= 12
+    assert sum(p.count_tokens([line])[0] for line in context.split("\n")) <= 12
+
+
+def test_no_shared_terms_keeps_retrieval_order_up_to_the_budget(packer):
+    context, _ = packer(14).pack("zzz", DOCS)
+    assert context.startswith("ROCm runs PyTorch on AMD GPUs.")
+    assert "Parking" not in context
+
+
+def test_a_zero_budget_sends_the_chunks_whole():
+    context, report = ContextPacker(budget_tokens=0).pack("anything", DOCS)
+    assert context == "\n".join(DOCS) and report == {}
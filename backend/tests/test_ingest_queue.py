@@ -0,0 +1,89 @@
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from app.core.ingest_queue import IngestQueue, IngestWorkers, chunk_id
+
+
+class StrictStore:
+    """Rejects repeated ids within one write, like Chroma's upsert."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def get(self, ids=None, where=None, include_embeddings=False):
+        return {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+
+
+class Memory:
+    def __init__(self, fail_with=None):
+        self.store = StrictStore()
+        self.fail_with = fail_with
+
+    def store_embedded(self, texts, vectors, metadatas=None, ids=None):
+        if self.fail_with:
+            raise self.fail_with
+        if len(set(ids)) != len(ids):
+            raise ValueError(f"Expected IDs to be unique, found duplicates in {ids}")
+        for doc_id, text in zip(ids, texts):
+            self.store.rows[doc_id] = text
+        return ids
+
+
+class Brain:
+    def embed_batch(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class Pool:
+    def __init__(self, memory):
+        self.memory = memory
+        self.brain = Brain()
+
+    @contextmanager
+    def lease(self, tenant_id=None):
+        yield self.memory
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = IngestQueue(path=str(tmp_path / "queue.sqlite3"), max_attempts=2)
+    yield queue
+    queue.close()
+
+
+def chunks(texts, tenant="acme", source="notes.md"):
+    return [{"id": chunk_id(tenant, source, text), "text": text, "metadata": {"source": source}} for text in texts]
+
+
+def test_duplicate_ids_in_one_batch_are_stored_once_and_all_acked(queue):
+    memory = Memory()
+    workers = IngestWorkers(queue, Pool(memory), num_workers=1, batch_size=32)
+    # A repeated paragraph, and the same file enqueued twice before a claim
+    queue.enqueue("acme", chunks(["intro", "body", "intro"]))
+    queue.enqueue("acme", chunks(["intro", "body", "intro"]))
+
+    workers.process(queue.claim(32))
+
+    assert sorted(memory.store.rows.values()) == ["body", "intro"]
+    assert queue.stats() == {"pending": 0, "leased": 0, "failed": 0}
+    assert workers.batches_failed == 0
+
+
+def test_workers_claim_embed_and_store_in_the_background(queue):
+    memory = Memory()
+    stored = []
+    workers = IngestWorkers(queue, Pool(memory), num_workers=1, batch_size=2, on_stored=stored.extend)
+    queue.enqueue("acme", chunks([f"chunk {i}" for i in range(7)]))
+    workers.start()
+    try:
+        deadline = time.time() + 10
+        while workers.chunks_stored < 7 and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        workers.stop()
+
+    assert sorted(memory.store.rows.values()) == [f"chunk {i}" for i in range(7)]
+    assert len(stored) == 7 and workers.chunks_stored == 7
+    assert queue.stats()["pending"] == 0
@@ -0,0 +1,59 @@
+import time
+
+from app.core.chunker import WordChunker
+from app.core.ingest_queue import IngestQueue, IngestWorkers
+from app.core.jobs import JobManager, TERMINAL_STATES
+
+from test_ingest_queue import Memory, Pool
+
+
+def run_job(tmp_path, memory, text):
+    queue = IngestQueue(path=str(tmp_path / "queue.sqlite3"), max_attempts=2)
+    jobs = JobManager(queue, max_workers=1, chunker=WordChunker(chunk_size=5))
+    workers = IngestWorkers(queue, Pool(memory), batch_size=4,
+                            on_stored=jobs.record_stored, on_failed=jobs.record_failed)
+    path = tmp_path / "notes.txt"
+    path.write_text(text)
+    job = jobs.submit(str(path), "notes.txt", "acme", owned=False)
+    assert job.parsed.wait(10)
+
+    deadline = time.time() + 10
+    while job.status not in TERMINAL_STATES and time.time() < deadline:
+        items = queue.claim(workers.batch_size, lease_sec=0)
+        if items:
+            workers.process(items)
+    queue.close()
+    return job, queue
+
+
+def test_job_fails_once_its_chunks_are_parked_as_failed(tmp_path):
+    job, queue = run_job(tmp_path, Memory(fail_with=RuntimeError("disk full")), "one two three four five " * 6)
+
+    assert job.status == "failed"
+    assert job.chunks_total == 6
+    assert job.chunks_failed == 6 and job.chunks_embedded == 0
+    assert "disk full" in job.error
+    assert job.finished_at is not None
+
+
+def test_job_completes_when_every_chunk_is_stored(tmp_path):
+    job, _ = run_job(tmp_path, Memory(), "one two three four five " * 6)
+
+    assert job.status == "done"
+    assert job.chunks_embedded == 6 and job.chunks_failed == 0
+
+
+def test_jobs_are_only_visible_to_their_own_tenant(tmp_path):
+    queue = IngestQueue(path=str(tmp_path / "queue.sqlite3"))
+    jobs = JobManager(queue, max_workers=1, chunker=WordChunker(chunk_size=5))
+    path = tmp_path / "notes.txt"
+    path.write_text("one two three")
+    job = jobs.submit(str(path), "notes.txt", "acme", owned=False)
+    assert job.parsed.wait(10)
+    queue.close()
+
+    assert jobs.get(job.id, "acme") is job
+    assert jobs.get(job.id, "other") is None
+    assert jobs.get(job.id) is None
+    assert [j["job_id"] for j in jobs.list("acme")] == [job.id]
+    assert jobs.list("other") == [] and jobs.list() == []
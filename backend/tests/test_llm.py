@@ -0,0 +1,181 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from app.core.llm import LocalLLM, parse_range
+
+
+def ndjson(*objects):
+    return "".join(json.dumps(o) + "\n" for o in objects).encode()
+
+
+def make_llm(handler, urls=("http://ollama-a",), **kwargs):
+    llm = LocalLLM(base_url=list(urls), **kwargs)
+    llm._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return llm
+
+
+def collect(llm, prompt="hi", **kwargs):
+    async def scenario():
+        try:
+            return [token async for token in llm.stream_generate(prompt, **kwargs)]
+        finally:
+            await llm.aclose()
+    return asyncio.run(scenario())
+
+
+def test_stream_yields_tokens_then_reports_the_final_object():
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=ndjson({"response": "Hel", "done": False}, {"response": "lo", "done": False},
+                                                  {"response": "", "done": True, "context": [1, 2], "eval_count": 2}))
+
+    final = {}
+    assert collect(make_llm(handler), on_done=final.update) == ["Hel", "lo"]
+    assert final["context"] == [1, 2] and final["backend"] == "http://ollama-a"
+
+
+def test_model_errors_in_the_stream_are_raised():
+    def handler(request):
+        return httpx.Response(200, content=ndjson({"error": "model 'llama3' not found"}))
+
+    with pytest.raises(RuntimeError, match="not found"):
+        collect(make_llm(handler, retries=0))
+
+
+def test_closing_the_stream_early_closes_the_response():
+    closed = []
+
+    class Body(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield ndjson({"response": "one", "done": False})
+            yield ndjson({"response": "two", "done": False})
+
+        async def aclose(self):
+            closed.append(True)
+
+    llm = make_llm(lambda request: httpx.Response(200, stream=Body()))
+
+    async def scenario():
+        tokens = llm.stream_generate("hi")
+        assert await tokens.__anext__() == "one"
+        await tokens.aclose()
+        await llm.aclose()
+
+    asyncio.run(scenario())
+    assert closed
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    async def backoff(self, attempt, error):
+        pass
+    monkeypatch.setattr(LocalLLM, "_backoff", backoff)
+
+
+def test_connection_errors_are_retried(no_backoff):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"response": "ok", "done": True})
+
+    llm = make_llm(handler, retries=2)
+    data = asyncio.run(llm.generate("hi"))
+    assert data["response"] == "ok" and len(calls) == 3
+
+
+def test_out_of_retries_raises_the_connection_error(no_backoff):
+    def handler(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(make_llm(handler, retries=1).generate("hi"))
+
+
+def test_a_stream_that_already_yielded_is_not_retried(no_backoff):
+    calls = []
+
+    class Body(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield ndjson({"response": "partial", "done": False})
+            raise httpx.RemoteProtocolError("peer closed connection")
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, stream=Body())
+
+    llm = make_llm(handler, retries=2)
+    tokens = []
+
+    async def scenario():
+        async for token in llm.stream_generate("hi"):
+            tokens.append(token)
+
+    with pytest.raises(httpx.RemoteProtocolError):
+        asyncio.run(scenario())
+    assert tokens == ["partial"] and len(calls) == 1
+
+
+def test_warm_hours_and_days():
+    llm = LocalLLM(base_url=["http://ollama-a"], warm_hours="8-18", warm_days="1-5")
+    assert parse_range("8-18") == (8, 18) and parse_range("") is None
+    monday_10am = time.mktime((2026, 10, 19, 10, 0, 0, 0, 0, -1))
+    assert llm.in_warm_hours(monday_10am)
+    assert not llm.in_warm_hours(monday_10am + 10 * 3600)        # 8pm
+    assert not llm.in_warm_hours(monday_10am + 5 * 24 * 3600)    # Saturday
+
+
+def test_warm_loads_the_model_on_idle_backends_and_records_cold_starts():
+    requests = []
+
+    def handler(request):
+        requests.append((request.url.host, json.loads(request.content)))
+        return httpx.Response(200, json={"done": True, "load_duration": 2_000_000_000})
+
+    llm = make_llm(handler, urls=("http://ollama-a", "http://ollama-b"), keep_alive="45m")
+    llm.pool.backends[1].last_used_at = time.time()   # just served a request
+
+    asyncio.run(llm.warm(idle_for=60))
+    assert [host for host, _ in requests] == ["ollama-a"]
+    assert requests[0][1] == {"model": "llama3", "prompt": "", "keep_alive": "45m"}
+    assert llm.pool.backends[0].cold_starts == 1 and llm.pool.backends[0].has_model("llama3")
+
+
+def test_keep_warm_survives_an_unreachable_ollama(no_backoff):
+    def handler(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    llm = make_llm(handler, warm_interval=0)
+    asyncio.run(llm.keep_warm())     # logs and returns instead of raising
+    assert llm.pool.backends[0].errors == 1
+
+
+def test_status_reports_the_last_health_check_without_probing():
+    def handler(request):
+        raise AssertionError(f"status() made a request to {request.url}")
+
+    llm = make_llm(handler)
+    llm.pool.backends[0].loaded = {"llama3:latest": {"expires_at": "soon"}}
+    status = llm.status()
+    assert status["state"] == "warm" and status["backends"][0]["expires_at"] == "soon"
+    llm.pool.backends[0].loaded, llm.pool.backends[0].healthy = {}, False
+    assert llm.status()["state"] == "unreachable"
+
+
+def test_a_server_error_fails_over_to_the_next_backend(no_backoff):
+    def handler(request):
+        if request.url.host == "ollama-a":
+            return httpx.Response(503)
+        return httpx.Response(200, json={"response": "from b", "done": True})
+
+    llm = make_llm(handler, urls=("http://ollama-a", "http://ollama-b"), retries=0)
+    llm.pool.backends[0].loaded["llama3"] = {}   # so the pool tries ollama-a first
+    data = asyncio.run(llm.generate("hi"))
+    assert data["backend"] == "http://ollama-b" and llm.pool.failovers == 1
+    assert llm.pool.backends[0].errors == 1
@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+
+from app.core.ollama_pool import BackendPool
+
+
+def pool(**kwargs):
+    return BackendPool(["http://a", "http://b", "http://c"], affinity=4, **kwargs)
+
+
+def test_least_outstanding_backend_is_picked():
+    p = pool()
+    a, b, c = p.backends
+    a.outstanding, b.outstanding, c.outstanding = 3, 1, 2
+    assert p.pick("llama3") is b
+    assert p.pick("llama3", exclude={b}) is c
+
+
+def test_a_backend_with_the_model_loaded_is_worth_affinity_requests():
+    p = pool()
+    a, b, c = p.backends
+    a.loaded = {"llama3:latest": {}}
+    a.outstanding = 3
+    assert p.pick("llama3") is a
+    a.outstanding = 5
+    assert p.pick("llama3") is not a
+    # A conversation prefers the backend holding its KV cache
+    b.loaded = c.loaded = {"llama3": {}}
+    assert p.pick("llama3", prefer="http://c") is c
+
+
+def test_repeated_failures_eject_a_backend_until_a_health_check_passes():
+    p = pool(eject_after=2, eject_sec=60)
+    a = p.backends[0]
+    for _ in range(2):
+        p.failed(a, ConnectionError("refused"))
+    assert a.ejected() and a.ejections == 1
+    assert all(p.pick("llama3") is not a for _ in range(20))
+
+    def handler(request):
+        if request.url.host == "c":
+            raise httpx.ConnectError("down", request=request)
+        return httpx.Response(200, json={"models": [{"name": "llama3:latest", "expires_at": "later"}]})
+
+    async def check():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await p.check(client, timeout=1)
+
+    asyncio.run(check())
+    a, b, c = p.backends
+    assert not a.ejected() and a.healthy and a.has_model("llama3")
+    assert not c.healthy and not c.loaded
+    # Unhealthy backends are only used when nothing else is left
+    assert p.pick("llama3", exclude={a}) is b
+
+
+def test_every_backend_ejected_still_leaves_one_to_try():
+    p = pool(eject_after=1)
+    for backend in p.backends:
+        p.failed(backend, ConnectionError("refused"))
+    assert p.pick("llama3") in p.backends
@@ -0,0 +1,89 @@
+import io
+import os
+
+import pytest
+
+from app.core import ingester
+from app.core.ingester import FileIngester
+from app.core.parse_cache import ParseCache
+
+
+def put(cache, key, pages):
+    writer = cache.writer(key)
+    for page in pages:
+        writer.add(page)
+    writer.commit()
+
+
+def test_pages_round_trip_and_count_hits(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    key = cache.key_for(io.BytesIO(b"%PDF bytes"), "pdf/1")
+    assert cache.iter_pages(key) is None
+    put(cache, key, ["page one", "", "päge three\nwith lines"])
+
+    assert cache.page_count(key) == 3
+    assert list(cache.iter_pages(key)) == ["page one", "", "päge three\nwith lines"]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_key_depends_on_content_and_parser_version(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"same bytes")
+    by_path = cache.key_for(str(path), "pdf/1")
+    assert by_path == cache.key_for(io.BytesIO(b"same bytes"), "pdf/1")
+    assert by_path != cache.key_for(str(path), "pdf/2")
+    assert by_path != cache.key_for(io.BytesIO(b"other bytes"), "pdf/1")
+
+
+def test_aborted_writes_leave_nothing_behind(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    writer = cache.writer("k")
+    writer.add("half a file")
+    writer.abort()
+    assert cache.iter_pages("k") is None
+    assert [name for name in os.listdir(tmp_path) if name != "index.json"] == []
+
+
+def test_least_recently_used_entries_are_evicted_and_the_index_persists(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    put(cache, "a", [os.urandom(2000).hex()])
+    cache.max_bytes = int(cache.size_bytes() * 3.5)   # room for three entries of about this size
+    for key in ("b", "c"):
+        put(cache, key, [os.urandom(2000).hex()])
+    list(cache.iter_pages("a"))                       # "b" is now the oldest
+    put(cache, "d", [os.urandom(2000).hex()])
+
+    assert cache.page_count("b") is None and cache.evictions == 1
+    reopened = ParseCache(str(tmp_path), max_bytes=cache.max_bytes)
+    assert {k for k in "abcd" if reopened.page_count(k)} == {"a", "c", "d"}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(ingester, "get_parse_cache", lambda: cache)
+    return cache
+
+
+def test_a_file_is_parsed_once(cache):
+    calls = []
+
+    def parse(source, skipped):
+        calls.append(1)
+        yield from ["one", "two"]
+
+    source = io.BytesIO(b"a document")
+    for _ in range(2):
+        assert list(FileIngester._iter_cached(source, "fake/1", parse)) == ["one", "two"]
+    assert len(calls) == 1
+
+
+def test_files_with_skipped_pages_are_not_cached(cache):
+    def parse(source, skipped):
+        yield "one"
+        skipped.append(2)
+
+    source = io.BytesIO(b"a damaged document")
+    list(FileIngester._iter_cached(source, "fake/1", parse))
+    assert cache.stats()["entries"] == 0
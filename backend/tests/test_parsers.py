@@ -0,0 +1,115 @@
+import io
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import pytest
+
+from app.core import parsers
+from app.core.ingester import FileIngester
+
+
+def make_pdf(pages):
+    """A minimal PDF with one line of text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+PAGES = ["page one", "page two", "page three"]
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(make_pdf(PAGES))
+    return str(path)
+
+
+def test_pdf_and_text_parsers_are_registered():
+    assert isinstance(parsers.registry.for_file("a.pdf"), parsers.PdfParser)
+    assert isinstance(parsers.registry.for_file("notes.md"), parsers.TextParser)
+
+
+def test_pool_extracts_the_same_pages_as_in_process(pdf, monkeypatch):
+    monkeypatch.setattr(parsers, "PDF_WORKERS", 2)
+    in_process = list(parsers.PdfParser().iter_pages(pdf))
+    assert [page.strip() for page in in_process] == PAGES
+
+    parsers.start_pdf_pool()
+    try:
+        assert list(parsers.PdfParser().iter_pages(pdf)) == in_process
+    finally:
+        parsers.stop_pdf_pool()
+
+
+class HungPool:
+    """Every range times out."""
+
+    def __init__(self):
+        self.shutdowns = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.result = lambda timeout=None: (_ for _ in ()).throw(FutureTimeout())
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns.append(cancel_futures)
+
+
+class InlinePool:
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def test_timed_out_range_restarts_the_pool(pdf, monkeypatch):
+    hung, fresh = HungPool(), InlinePool()
+    monkeypatch.setattr(parsers, "PDF_WORKERS", 1)
+    monkeypatch.setattr(parsers, "_pdf_pool", hung)
+    monkeypatch.setattr(parsers, "_new_pdf_pool", lambda: fresh)
+
+    skipped = []
+    pages = list(parsers.PdfParser().iter_pages(pdf, skipped))
+
+    assert pages[0] == "" and [page.strip() for page in pages[1:]] == PAGES[1:]
+    assert skipped == [0]
+    assert hung.shutdowns == [True]
+    assert parsers._pdf_pool is fresh
+
+
+def test_text_blocks_split_on_whitespace(tmp_path, monkeypatch):
+    monkeypatch.setattr(parsers, "TEXT_BLOCK_BYTES", 8)
+    path = tmp_path / "notes.txt"
+    path.write_text("alpha beta gamma delta")
+    blocks = list(FileIngester.iter_pages(str(path), "notes.txt"))
+    assert "".join(blocks) == "alpha beta gamma delta"
+    assert len(blocks) == FileIngester.count_pages(str(path), "notes.txt")
+
+
+def test_latin1_text_is_decoded_with_replacement(tmp_path, monkeypatch):
+    monkeypatch.setattr(parsers, "TEXT_BLOCK_BYTES", 8)
+    path = tmp_path / "menu.txt"
+    path.write_bytes("café au lait, crème brûlée\n".encode("latin-1"))
+    text = "".join(FileIngester.iter_pages(str(path), "menu.txt"))
+    assert text == "caf� au lait, cr�me br�l�e\n"
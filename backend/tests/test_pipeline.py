@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+from app.core.pipeline import Pipeline, batched
+
+
+def running_total(items):
+    total = 0
+    for item in items:
+        total += item
+        yield total
+
+
+def test_stages_run_in_order_and_keep_their_state():
+    out = list(Pipeline(range(1, 6), maxsize=2).then(running_total).then(lambda xs: (x * 10 for x in xs)))
+    assert out == [10, 30, 60, 100, 150]
+
+
+def test_a_slow_consumer_holds_back_the_source():
+    produced = []
+
+    def source():
+        for i in range(1000):
+            produced.append(i)
+            yield i
+
+    stream = iter(Pipeline(source(), maxsize=2).then(lambda xs: xs, maxsize=2))
+    next(stream)
+    time.sleep(0.3)
+    # Two queues of 2, plus one item held by each thread
+    assert len(produced) <= 8
+    stream.close()
+
+
+def test_a_failing_stage_stops_the_source_and_reraises():
+    stopped = threading.Event()
+
+    def source():
+        try:
+            for i in range(10_000):
+                yield i
+        finally:
+            stopped.set()
+
+    def explode(items):
+        for item in items:
+            if item == 3:
+                raise ValueError("bad page")
+            yield item
+
+    with pytest.raises(ValueError, match="bad page"):
+        Pipeline(source(), maxsize=2).then(explode).run()
+    assert stopped.is_set()
+
+
+def test_batched_groups_a_stream():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,80 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.core.quantization import ProductQuantizer, QuantizedVectorStore, ScalarQuantizer, compare_levels
+
+
+def clustered(n, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(8, dim)).astype(np.float32)
+    return centers[rng.integers(0, 8, n)] + 0.1 * rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def fill(store, vectors, offset=0):
+    ids = [f"doc-{offset + i}" for i in range(len(vectors))]
+    store.add(ids=ids, documents=ids, embeddings=vectors.tolist(), metadatas=[{"n": offset + i} for i in range(len(vectors))])
+
+
+@pytest.mark.parametrize("quantizer, code_size", [(ScalarQuantizer(), 16), (ProductQuantizer(m=4), 4)])
+def test_quantizers_encode_to_their_code_size_and_keep_neighbours(quantizer, code_size):
+    vectors = clustered(500)
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+    assert codes.shape == (500, code_size) and codes.dtype == np.uint8
+
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    query = vectors[0]
+    approx = quantizer.approx_distances(query, float(query @ query), codes, norms)
+    # The query's own vector is among its nearest approximate neighbours
+    assert 0 in np.argsort(approx)[:10]
+
+
+def test_compare_levels_reports_ratio_and_recall():
+    report = {row["level"]: row for row in compare_levels(clustered(400), levels=["sq8", "pq4", "pq5"], k=5)}
+    assert report["sq8"]["compression_ratio"] == 4.0
+    assert report["pq4"]["compression_ratio"] == 16.0
+    assert 0.0 <= report["pq4"]["recall_at_k"] <= 1.0
+    assert "divisible" in report["pq5"]["error"]
+
+
+def test_store_trains_in_the_background_and_searches_exactly_meanwhile(tmp_path, monkeypatch):
+    monkeypatch.setattr(QuantizedVectorStore, "MIN_TRAIN_ROWS", 64)
+    started, release = threading.Event(), threading.Event()
+    real_train = ProductQuantizer.train
+
+    def slow_train(self, vectors):
+        started.set()
+        release.wait(5)
+        real_train(self, vectors)
+
+    monkeypatch.setattr(ProductQuantizer, "train", slow_train)
+    store = QuantizedVectorStore(str(tmp_path), "docs", level="pq4")
+    vectors = clustered(200)
+    fill(store, vectors)
+
+    # add() returned while k-means is still running; the store stays usable
+    assert started.wait(5) and not store.quantizer.trained
+    fill(store, clustered(10, seed=1), offset=200)
+    assert store.query(query_embeddings=[vectors[3].tolist()], n_results=1)["ids"][0] == ["doc-3"]
+
+    release.set()
+    store._training.join(5)
+    assert store.quantizer.trained and store._code_rows == store.size == 210
+    assert store.query(query_embeddings=[vectors[3].tolist()], n_results=1)["ids"][0] == ["doc-3"]
+
+    # Reopening loads the saved quantizer and codes instead of training again
+    store.close()
+    reopened = QuantizedVectorStore(str(tmp_path), "docs", level="pq4")
+    assert reopened.quantizer.trained and reopened._training is None and reopened._code_rows == 210
+
+
+def test_failed_training_leaves_exact_search(tmp_path, monkeypatch):
+    monkeypatch.setattr(QuantizedVectorStore, "MIN_TRAIN_ROWS", 64)
+    store = QuantizedVectorStore(str(tmp_path), "docs", level="pq5")   # 16 isn't divisible by 5
+    vectors = clustered(100)
+    fill(store, vectors)
+    store._training.join(5)
+    assert not store.quantizer.trained
+    assert store.query(query_embeddings=[vectors[7].tolist()], n_results=1)["ids"][0] == ["doc-7"]
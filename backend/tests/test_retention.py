@@ -0,0 +1,36 @@
+import time
+
+from app.core.retention import Compactor, RetentionPolicy
+from app.core.vector_store import FlatVectorStore
+
+DAY = 86400
+
+
+class MetadataOnly(FlatVectorStore):
+    """Fails the test if retention asks for documents or vectors."""
+
+    def get(self, *args, **kwargs):
+        raise AssertionError("retention must page through scan(), not get() the whole store")
+
+    def scan(self, batch_size=1000, include_embeddings=True, include_documents=True):
+        assert not include_embeddings and not include_documents
+        self.pages = getattr(self, "pages", 0)
+        for batch in super().scan(batch_size, include_embeddings, include_documents):
+            self.pages += 1
+            yield batch
+
+
+def test_expired_chunks_are_collected_from_metadata_pages(tmp_path):
+    now = time.time()
+    store = MetadataOnly(str(tmp_path), "retention")
+    ids = [f"chunk-{i}" for i in range(5)]
+    store.add(
+        ids=ids,
+        documents=["x" * 1000] * 5,
+        embeddings=[[float(i), 1.0] for i in range(5)],
+        metadatas=[{"source_type": "slack", "ingested_at": now - age * DAY} for age in (1, 100, 2, 200, 3)],
+    )
+    compactor = Compactor(pool=None, policies={"slack": RetentionPolicy(max_age_days=90)}, scan_size=2)
+
+    assert compactor._collect_expired(store, now) == {"slack": ["chunk-1", "chunk-3"]}
+    assert store.pages == 3
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from app.core.coalesce import Flight
+from app.core.scheduler import GenerationScheduler, SchedulerFull
+
+
+async def tokens(*words):
+    for word in words:
+        await asyncio.sleep(0)
+        yield word
+
+
+def test_flight_cancelled_before_it_runs_still_releases_its_slot():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1, max_queue=0, max_wait_sec=1)
+        slot = await scheduler.acquire()
+        flight = Flight("key", tokens("a", "b"), slot.release)
+        flight.task.cancel()
+        await asyncio.gather(flight.task, return_exceptions=True)
+        assert scheduler.running == 0
+        assert flight.done and isinstance(flight.error, ConnectionAbortedError)
+        # The slot is free for the next request
+        (await scheduler.acquire()).release()
+
+    asyncio.run(scenario())
+
+
+def test_unreleased_slot_is_not_released_by_garbage_collection():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1, max_queue=0, max_wait_sec=1)
+        await scheduler.acquire()
+        # Dropped without release(): still held, so the next request is refused
+        with pytest.raises(SchedulerFull):
+            await scheduler.acquire()
+
+    asyncio.run(scenario())
+
+
+def test_flight_finishes_even_if_its_callback_fails():
+    async def scenario():
+        def boom():
+            raise RuntimeError("record failed")
+
+        flight = Flight("key", tokens("a", "b"), boom)
+        await flight.task
+        assert flight.done and flight.tokens == ["a", "b"]
+
+    asyncio.run(scenario())
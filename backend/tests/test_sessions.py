@@ -0,0 +1,68 @@
+import asyncio
+
+from app.core.scheduler import GenerationScheduler
+from app.core.sessions import PREAMBLE, SessionStore
+
+
+class LLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate(self, prompt, context=None, prefer=None):
+        self.prompts.append(prompt)
+        return {"response": "They discussed ROCm setup."}
+
+
+def store(**kwargs):
+    return SessionStore(LLM(), GenerationScheduler(max_concurrent=1, max_queue=4, max_wait_sec=1), **kwargs)
+
+
+def test_first_turn_sends_the_full_prompt_and_later_turns_continue_the_token_state():
+    sessions = store()
+    session = sessions.create("acme")
+    prompt, state = session.prompt("ctx one", "What is ROCm?")
+    assert prompt.startswith(PREAMBLE) and state is None
+
+    sessions.record(session, "What is ROCm?", "A GPU stack.", {"context": [1, 2, 3], "backend": "http://b"},
+                    session.epoch, reused=False)
+    prompt, state = session.prompt("ctx two", "Does it run PyTorch?")
+    assert state == [1, 2, 3] and PREAMBLE not in prompt and "Does it run PyTorch?" in prompt
+    assert session.backend == "http://b"
+
+
+def test_sessions_are_private_to_their_tenant_and_expire():
+    sessions = store(ttl_sec=60, max_sessions=2)
+    first = sessions.create("acme")
+    assert sessions.get(first.id, "other") is None
+    assert sessions.get(first.id, "acme") is first
+
+    sessions.create("acme")
+    sessions.create("acme")     # over max_sessions: the least recently active goes
+    assert sessions.get(first.id, "acme") is None
+
+
+def test_compaction_folds_old_turns_into_the_summary_and_resets_the_state():
+    async def scenario():
+        sessions = store(max_turns=2)
+        session = sessions.create(None)
+        for i in range(3):
+            sessions.record(session, f"q{i}", f"a{i}", {"context": [i]}, session.epoch, reused=i > 0)
+        await asyncio.gather(*sessions._tasks)
+        return sessions, session
+
+    sessions, session = asyncio.run(scenario())
+    assert [turn["question"] for turn in session.turns] == ["q2"]
+    assert session.summary == "They discussed ROCm setup." and session.context is None
+    assert "USER: q0" in sessions.llm.prompts[0]
+    # Without token state the next prompt is rebuilt as preamble, summary, recent turns
+    prompt, state = session.prompt("ctx", "q3")
+    assert state is None and prompt.index("ROCm setup") < prompt.index("USER: q2") < prompt.index("q3")
+
+
+def test_a_turn_that_straddled_a_compaction_does_not_restore_old_state():
+    sessions = store()
+    session = sessions.create(None)
+    epoch = session.epoch
+    session.epoch += 1          # a compaction finished while this turn was generating
+    sessions.record(session, "q", "a", {"context": [9, 9]}, epoch, reused=True)
+    assert session.context is None
@@ -0,0 +1,37 @@
+import pytest
+
+from app.core.snapshot import export_snapshot, import_snapshot
+from app.core.vector_store import FlatVectorStore
+
+
+class AddRejectsExisting(FlatVectorStore):
+    """add() refuses ids already stored, like Chroma's."""
+
+    def add(self, ids, documents, embeddings, metadatas):
+        if self.get(ids=list(ids))["ids"]:
+            raise ValueError("ids already exist")
+        super().add(ids, documents, embeddings, metadatas)
+
+    def upsert(self, ids, documents, embeddings, metadatas):
+        FlatVectorStore.add(self, ids, documents, embeddings, metadatas)
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    source = FlatVectorStore(str(tmp_path / "source"), "memory")
+    source.add(ids=[f"chunk-{i}" for i in range(5)], documents=[f"text {i}" for i in range(5)],
+               embeddings=[[float(i), 1.0] for i in range(5)], metadatas=[{"n": i} for i in range(5)])
+    export_snapshot(source, str(tmp_path / "backup"), shard_size=2)
+    return str(tmp_path / "backup")
+
+
+def test_reimporting_a_snapshot_is_idempotent(tmp_path, snapshot):
+    target = AddRejectsExisting(str(tmp_path / "target"), "memory")
+    # An interrupted import left part of the rows behind
+    target.upsert(ids=["chunk-0"], documents=["text 0"], embeddings=[[0.0, 1.0]], metadatas=[{"n": 0}])
+
+    assert import_snapshot(target, snapshot, batch_size=2)["rows"] == 5
+    assert import_snapshot(target, snapshot, batch_size=2)["rows"] == 5
+
+    assert target.count() == 5
+    assert target.get(ids=["chunk-3"])["documents"] == ["text 3"]
@@ -0,0 +1,103 @@
+import re
+
+import pytest
+
+pytest.importorskip("onnxruntime")   # tenancy imports the AMD Bridge
+
+from app.core.tenancy import collection_for_tenant  # noqa: E402
+from app.core.vector_store import DEFAULT_COLLECTION  # noqa: E402
+
+VALID = re.compile(r"^[a-z0-9][a-z0-9_-]{1,61}[a-z0-9]$")
+
+
+def test_ids_differing_only_in_case_get_separate_collections():
+    upper, lower = collection_for_tenant("user_2AbC"), collection_for_tenant("user_2abc")
+    assert upper != lower
+    assert VALID.match(upper) and VALID.match(lower)
+
+
+def test_trailing_separator_still_ends_in_an_alphanumeric():
+    for tenant_id in ("acme_", "acme-", "team/", "x" * 80 + "_"):
+        name = collection_for_tenant(tenant_id)
+        assert VALID.match(name), name
+
+
+def test_sanitised_ids_do_not_collide():
+    assert collection_for_tenant("acme corp") != collection_for_tenant("acme_corp")
+
+
+def test_default_tenant_uses_the_default_collection():
+    assert collection_for_tenant(None) == DEFAULT_COLLECTION
+    assert collection_for_tenant("default") == DEFAULT_COLLECTION
+
+
+class FakeStore:
+    def __init__(self, size):
+        self.size = size
+        self.measured = 0
+        self.closed = False
+
+    def memory_footprint(self):
+        self.measured += 1
+        return self.size
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(tmp_path, monkeypatch, size=100, **kwargs):
+    import app.core.tenancy as tenancy
+
+    class FakeMemoryBank:
+        def __init__(self, collection_name, **_):
+            self.collection_name = collection_name
+            self.store = FakeStore(size)
+
+    monkeypatch.setattr(tenancy, "MemoryBank", FakeMemoryBank)
+    pool = tenancy.TenantMemoryPool(path=str(tmp_path), **kwargs)
+    pool._brain = object()
+    return pool
+
+
+def test_releasing_a_lease_neither_evicts_nor_measures_other_tenants(tmp_path, monkeypatch):
+    pool = make_pool(tmp_path, monkeypatch, max_open=2)
+    other = pool.get("other")
+    with pool.lease("acme"):
+        pass
+    assert other.store.measured == 1             # only when it was opened
+    assert pool.evictions == 0
+
+
+def test_cap_is_enforced_when_a_tenant_is_opened(tmp_path, monkeypatch):
+    pool = make_pool(tmp_path, monkeypatch, size=600_000, max_open=10, memory_cap_bytes=1_000_000)
+    first = pool.get("a")
+    pool.get("b")
+    assert first.store.closed
+    assert pool.stats()["open_tenants"] == ["b"]
+    assert pool.resident_bytes() == 600_000
+
+
+def test_a_slow_open_does_not_block_other_tenants(tmp_path, monkeypatch):
+    import threading
+
+    import app.core.tenancy as tenancy
+
+    pool = make_pool(tmp_path, monkeypatch)
+    pool.get("warm")
+    started, release = threading.Event(), threading.Event()
+    real = tenancy.MemoryBank
+
+    def slow(collection_name, **kwargs):
+        started.set()
+        release.wait(5)
+        return real(collection_name, **kwargs)
+
+    monkeypatch.setattr(tenancy, "MemoryBank", slow)
+    opener = threading.Thread(target=pool.get, args=("cold",))
+    opener.start()
+    assert started.wait(5)
+    with pool.lease("warm") as memory:           # would deadlock if the open held the pool lock
+        assert memory is pool.get("warm")
+    release.set()
+    opener.join(5)
+    assert "cold" in pool.stats()["open_tenants"]
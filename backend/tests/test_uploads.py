@@ -0,0 +1,83 @@
+import os
+import asyncio
+
+import pytest
+
+from app.core.ingester import FileIngester
+from app.core.uploads import UploadError, UploadSpool, receive_upload
+from test_parsers import PAGES, make_pdf
+
+
+def spool(data: bytes, max_size: int, size_hint=None) -> UploadSpool:
+    file = UploadSpool(max_size=max_size, size_hint=size_hint)
+    for start in range(0, len(data), 7):
+        file.write(data[start:start + 7])
+    file.seek(0)
+    return file
+
+
+def test_small_upload_stays_in_memory():
+    file = spool(b"hello world", max_size=64)
+    assert not file.on_disk and getattr(file, "name", None) is None
+    assert file.read() == b"hello world"
+
+
+def test_upload_spills_to_a_named_file_past_the_ceiling():
+    file = spool(b"x" * 100, max_size=64)
+    assert file.on_disk and os.path.isfile(file.name)
+    assert file.read() == b"x" * 100
+    file.close()
+    assert not os.path.exists(file.name)
+
+
+def test_size_hint_goes_straight_to_disk():
+    file = UploadSpool(max_size=64, size_hint=1000)
+    assert file.on_disk and os.path.isfile(file.name)
+    file.close()
+
+
+@pytest.mark.parametrize("max_size", [64, 1024 * 1024])
+@pytest.mark.parametrize("name, data, expected", [
+    ("doc.pdf", make_pdf(PAGES), PAGES),
+    ("notes.md", b"alpha beta\ngamma", ["alpha beta\ngamma"]),
+    ("rows.csv", b"name,team\nada,core\n", ["name: ada; team: core"]),
+])
+def test_parsers_read_a_spool_in_memory_or_on_disk(name, data, expected, max_size):
+    file = spool(data, max_size=max_size)
+    parser = FileIngester.parser_for(file, name)
+    assert [page.strip() for page in parser.iter_pages(file)] == expected
+
+
+class Request:
+    def __init__(self, body: bytes, boundary: str = "b0undary"):
+        self.headers = {"content-type": f"multipart/form-data; boundary={boundary}",
+                        "content-length": str(len(body))}
+        self.body = body
+
+    async def stream(self):
+        for start in range(0, len(self.body), 16):
+            yield self.body[start:start + 16]
+
+
+def multipart(filename: str, data: bytes, boundary: str = "b0undary") -> bytes:
+    return (f"--{boundary}\r\nContent-Disposition: form-data; name=\"tenant_id\"\r\n\r\nacme\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: text/plain\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+
+
+@pytest.mark.parametrize("size, on_disk", [(10, False), (800, True)])
+def test_receive_upload_spools_by_content_length(size, on_disk):
+    upload = asyncio.run(receive_upload(Request(multipart("a.txt", b"y" * size)), memory_ceiling=400))
+    assert upload.in_memory is not on_disk
+    assert upload.fields == {"tenant_id": "acme"} and upload.size == size
+    assert upload.file.read() == b"y" * size
+    upload.close()
+
+
+def test_a_second_file_part_is_rejected_and_the_first_spool_removed(tmp_path):
+    first = multipart("a.txt", b"y" * 800)
+    second = multipart("b.txt", b"z" * 800).replace(b"name=\"tenant_id\"", b"name=\"note\"")
+    body = first[:-len(b"--\r\n")] + b"\r\n" + second.split(b"\r\n", 1)[1]
+    with pytest.raises(UploadError, match="Only one 'file'"):
+        asyncio.run(receive_upload(Request(body), memory_ceiling=400, spool_dir=str(tmp_path)))
+    assert os.listdir(tmp_path) == []
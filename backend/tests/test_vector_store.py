@@ -0,0 +1,16 @@
+from app.core.vector_store import FlatVectorStore
+
+
+def test_id_repeated_within_one_add_keeps_only_the_last_row(tmp_path):
+    store = FlatVectorStore(str(tmp_path), "dupes")
+    store.add(ids=["a", "b", "a"], documents=["old", "b", "new"],
+              embeddings=[[1.0, 0.0], [0.0, 1.0], [2.0, 0.0]], metadatas=[{}, {}, {}])
+
+    assert store.count() == 2
+    assert store.get(ids=["a"])["documents"] == ["new"]
+    hits = store.query([[1.0, 0.0]], n_results=3)
+    assert sorted(hits["ids"][0]) == ["a", "b"]
+
+    reopened = FlatVectorStore(str(tmp_path), "dupes")
+    assert reopened.count() == 2
+    assert reopened.get(ids=["a"])["documents"] == ["new"]
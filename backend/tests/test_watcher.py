@@ -0,0 +1,168 @@
+import itertools
+from contextlib import contextmanager
+
+import pytest
+
+from app.core.vector_store import FlatVectorStore
+from app.core.watcher import FolderWatcher
+
+
+class Job:
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = "queued"
+        self.version = None
+        self.chunk_ids = None
+
+
+class Jobs:
+    def __init__(self):
+        self.submitted = []
+        self._ids = itertools.count(1)
+
+    def submit(self, source, filename, tenant_id, owned=True, metadata=None, keep_ids=False):
+        job = Job(f"job-{next(self._ids)}")
+        job.chunk_ids = set() if keep_ids else None
+        self.submitted.append(job)
+        return job
+
+
+class Memory:
+    def __init__(self, path):
+        self.store = FlatVectorStore(path, "watched")
+
+
+class Pool:
+    def __init__(self, memory):
+        self.memory = memory
+
+    @contextmanager
+    def lease(self, tenant_id=None):
+        yield self.memory
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    watcher = FolderWatcher(Jobs(), Pool(Memory(str(tmp_path / "store"))), roots=[str(folder)],
+                            manifest_path=str(tmp_path / "manifest.json"))
+    watcher.path = folder / "notes.md"
+    return watcher
+
+
+def store_version(watcher, job, version, texts=None):
+    """Stores a job's chunks the way the ingest workers do: content-addressed ids, upserted."""
+    texts = texts or [f"v{version}"]
+    job.version = version
+    job.chunk_ids.update(texts)
+    path = str(watcher.path)
+    watcher.pool.memory.store.upsert(ids=texts, documents=texts, embeddings=[[1.0, float(version)]] * len(texts),
+                                     metadatas=[{"path": path, "version": version}] * len(texts))
+
+
+def stored(watcher):
+    rows = watcher.pool.memory.store.get(where={"path": str(watcher.path)})
+    return dict(sorted((doc_id, m["version"]) for doc_id, m in zip(rows["ids"], rows["metadatas"])))
+
+
+def stored_versions(watcher):
+    return sorted(set(stored(watcher).values()))
+
+
+def finish(watcher, job, status="done"):
+    job.status = status
+    watcher._finish_jobs()
+
+
+def edit(watcher, text):
+    watcher.path.write_text(text)
+    watcher._ingest(str(watcher.path))
+    return watcher.job_manager.submitted[-1]
+
+
+def test_first_job_finishing_keeps_the_second_in_flight(watcher):
+    first = edit(watcher, "one")
+    second = edit(watcher, "two, a longer edit")
+    assert len(watcher._in_flight) == 2
+
+    store_version(watcher, first, 1)
+    first.status = "done"
+    watcher._finish_jobs()
+    assert list(watcher._in_flight) == [second.id]
+    assert stored_versions(watcher) == [1]
+
+    store_version(watcher, second, 2)
+    second.status = "done"
+    watcher._finish_jobs()
+    assert not watcher._in_flight
+    assert stored_versions(watcher) == [2]
+
+
+def test_older_job_finishing_last_does_not_survive_the_newer_one(watcher):
+    first = edit(watcher, "one")
+    second = edit(watcher, "two, a longer edit")
+
+    # The older job started later, so its chunks carry the higher version
+    store_version(watcher, second, 2)
+    second.status = "done"
+    watcher._finish_jobs()
+    store_version(watcher, first, 3)
+    first.status = "done"
+    watcher._finish_jobs()
+
+    assert stored_versions(watcher) == [2]
+
+
+def test_superseded_failure_does_not_reset_the_manifest(watcher):
+    first = edit(watcher, "one")
+    edit(watcher, "two, a longer edit")
+    first.status = "failed"
+    watcher._finish_jobs()
+    assert watcher.manifest[str(watcher.path)]["sha1"] is not None
+
+
+def test_older_job_finishing_last_keeps_shared_chunks_at_the_newest_version(watcher):
+    first = edit(watcher, "one")
+    second = edit(watcher, "two")
+    store_version(watcher, second, 2, ["intro", "new ending"])
+    finish(watcher, second)
+    # The superseded job re-stores the shared chunk with its own (older) version
+    store_version(watcher, first, 1, ["intro", "old ending"])
+    finish(watcher, first)
+
+    assert stored(watcher) == {"intro": 2, "new ending": 2}
+
+
+def test_next_edit_removes_only_chunks_the_new_version_lacks(watcher):
+    first = edit(watcher, "one")
+    store_version(watcher, first, 1, ["intro", "old ending"])
+    finish(watcher, first)
+    assert watcher.manifest[str(watcher.path)]["chunks"] == ["intro", "old ending"]
+
+    second = edit(watcher, "two")
+    store_version(watcher, second, 2, ["intro", "new ending"])
+    finish(watcher, second)
+    assert stored(watcher) == {"intro": 2, "new ending": 2}
+
+
+def test_cleanup_does_not_scan_the_store(watcher, monkeypatch):
+    first = edit(watcher, "one")
+    store_version(watcher, first, 1, ["intro"])
+    finish(watcher, first)
+
+    store = watcher.pool.memory.store
+    real_get = store.get
+
+    def get(ids=None, where=None, **kwargs):
+        assert where is None, "cleanup went through a full metadata scan"
+        return real_get(ids=ids, where=where, **kwargs)
+
+    monkeypatch.setattr(store, "get", get)
+    second = edit(watcher, "two")
+    store_version(watcher, second, 2, ["intro", "more"])
+    finish(watcher, second)
+    watcher.path.unlink()
+    watcher._forget(str(watcher.path))
+    monkeypatch.undo()
+    assert stored(watcher) == {}
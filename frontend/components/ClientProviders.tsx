@@ -2,6 +2,7 @@
 
 import dynamic from "next/dynamic";
 import { ClerkProvider } from "@clerk/nextjs";
+import TenantSync from "@/components/TenantSync";
 
 const CustomCursor = dynamic(() => import("@/components/CustomCursor"), {
   ssr: false,
@@ -14,6 +15,7 @@ export default function ClientProviders({
 }) {
   return (
     <ClerkProvider>
+      <TenantSync />
       <CustomCursor />
       {children}
     </ClerkProvider>
@@ -5,36 +5,122 @@ import { motion, AnimatePresence } from "framer-motion";
 import { Upload, FileText, CheckCircle, Loader2 } from "lucide-react";
 import { Card } from "@/components/ui/card";
 import { ScrollArea } from "@/components/ui/scroll-area";
-import { uploadDocument, type UploadResponse } from "@/lib/api";
+import SyncLog, { type SyncLogEntry } from "@/components/SyncLog";
+import {
+    uploadDocument,
+    watchJob,
+    type JobProgress,
+    type UploadResponse,
+} from "@/lib/api";
 import { toast } from "sonner";
 
 interface UploadedFile {
+    jobId: string;
     filename: string;
     chunks: number;
+    chunksTotal: number | null;
+    status: JobProgress["status"];
     hardware: string;
     timestamp: Date;
 }
 
+function describeProgress(p: JobProgress): string {
+    if (p.status === "parsing") {
+        return `Parsing page ${p.pages_parsed}/${p.pages_total ?? "?"}`;
+    }
+    if (p.status === "embedding") {
+        const rate = p.chunks_per_sec ? ` · ${p.chunks_per_sec.toFixed(1)} chunks/s` : "";
+        const eta = p.eta_sec !== null ? ` · ETA ${Math.ceil(p.eta_sec)}s` : "";
+        return `Embedded ${p.chunks_embedded}/${p.chunks_total ?? "?"} chunks${rate}${eta}`;
+    }
+    if (p.status === "done") {
+        return `Done: ${p.chunks_embedded} chunks in ${p.elapsed_sec.toFixed(1)}s`;
+    }
+    if (p.status === "failed") {
+        return `Failed: ${p.error ?? "unknown error"}`;
+    }
+    return "Queued";
+}
+
 export default function MemoryDropzone() {
     const [isDragging, setIsDragging] = useState(false);
     const [isUploading, setIsUploading] = useState(false);
     const [uploadedFiles, setUploadedFiles] = useState<UploadedFile[]>([]);
+    const [logs, setLogs] = useState<SyncLogEntry[]>([]);
     const inputRef = useRef<HTMLInputElement>(null);
 
+    const addLog = useCallback(
+        (message: string, type: SyncLogEntry["type"] = "info") => {
+            setLogs((prev) => [
+                ...prev,
+                {
+                    id: `${Date.now()}-${Math.random().toString(36).slice(2, 8)}`,
+                    timestamp: new Date().toLocaleTimeString(),
+                    platform: "Upload",
+                    message,
+                    type,
+                },
+            ]);
+        },
+        []
+    );
+
     const handleUpload = useCallback(async (file: File) => {
         setIsUploading(true);
         try {
             const result: UploadResponse = await uploadDocument(file);
             const uploaded: UploadedFile = {
+                jobId: result.job_id,
                 filename: result.filename,
-                chunks: result.chunks_processed,
+                chunks: 0,
+                chunksTotal: null,
+                status: "queued",
                 hardware: result.hardware,
                 timestamp: new Date(),
             };
             setUploadedFiles((prev) => [uploaded, ...prev]);
-            toast.success(`Ingested: ${result.filename}`, {
-                description: `${result.chunks_processed} chunks processed via ${result.hardware}`,
-            });
+            addLog(`${result.filename} accepted (job ${result.job_id.slice(0, 8)})`);
+
+            let lastStatus: JobProgress["status"] = "queued";
+            watchJob(
+                result.job_id,
+                (progress) => {
+                    setUploadedFiles((prev) =>
+                        prev.map((f) =>
+                            f.jobId === progress.job_id
+                                ? {
+                                      ...f,
+                                      chunks: progress.chunks_embedded,
+                                      chunksTotal: progress.chunks_total,
+                                      status: progress.status,
+                                  }
+                                : f
+                        )
+                    );
+                    // Log stage changes, not every tick
+                    if (progress.status !== lastStatus || progress.status === "done") {
+                        lastStatus = progress.status;
+                        addLog(
+                            `${progress.filename}: ${describeProgress(progress)}`,
+                            progress.status === "failed"
+                                ? "error"
+                                : progress.status === "done"
+                                  ? "success"
+                                  : "info"
+                        );
+                    }
+                    if (progress.status === "done") {
+                        toast.success(`Ingested: ${progress.filename}`, {
+                            description: `${progress.chunks_embedded} chunks processed via ${result.hardware}`,
+                        });
+                    } else if (progress.status === "failed") {
+                        toast.error(`Ingestion failed: ${progress.filename}`, {
+                            description: progress.error ?? undefined,
+                        });
+                    }
+                },
+                () => addLog(`${result.filename}: lost progress stream`, "error")
+            );
         } catch {
             toast.error("Upload failed", {
                 description: "Could not reach Synapse backend.",
@@ -42,7 +128,7 @@ export default function MemoryDropzone() {
         } finally {
             setIsUploading(false);
         }
-    }, []);
+    }, [addLog]);
 
     const onDrop = useCallback(
         (e: React.DragEvent) => {
@@ -145,7 +231,7 @@ export default function MemoryDropzone() {
                             <AnimatePresence>
                                 {uploadedFiles.map((f, i) => (
                                     <motion.div
-                                        key={`${f.filename}-${i}`}
+                                        key={f.jobId}
                                         initial={{ opacity: 0, x: -16 }}
                                         animate={{ opacity: 1, x: 0 }}
                                         transition={{ delay: i * 0.05 }}
@@ -157,7 +243,9 @@ export default function MemoryDropzone() {
                                                     {f.filename}
                                                 </p>
                                                 <p className="text-[10px] text-zinc-500">
-                                                    {f.chunks} chunks · {f.hardware}
+                                                    {f.status === "done"
+                                                        ? `${f.chunks} chunks · ${f.hardware}`
+                                                        : `${f.chunks}/${f.chunksTotal ?? "?"} chunks · ${f.status}`}
                                                 </p>
                                             </div>
                                         </Card>
@@ -168,6 +256,9 @@ export default function MemoryDropzone() {
                     </ScrollArea>
                 </div>
             )}
+
+            {/* Live ingestion progress */}
+            {logs.length > 0 && <SyncLog entries={logs} />}
         </div>
     );
 }
@@ -28,6 +28,7 @@ const platformColors: Record<string, string> = {
     Slack: "text-pink-600",
     Notion: "text-zinc-800",
     Jira: "text-blue-600",
+    Upload: "text-emerald-600",
     System: "text-zinc-500",
 };
 
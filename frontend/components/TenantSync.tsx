@@ -0,0 +1,20 @@
+"use client";
+
+import { useEffect } from "react";
+import { useAuth } from "@clerk/nextjs";
+import { setTenantId } from "@/lib/api";
+
+/**
+ * Keeps the backend tenant header in sync with the Clerk session.
+ * Workspace (organization) memory wins over personal memory when one is active.
+ */
+export default function TenantSync() {
+  const { isLoaded, userId, orgId } = useAuth();
+
+  useEffect(() => {
+    if (!isLoaded) return;
+    setTenantId(orgId ?? userId ?? null);
+  }, [isLoaded, userId, orgId]);
+
+  return null;
+}
@@ -1,13 +1,27 @@
 import axios from "axios";
 
+const API_BASE_URL = "http://localhost:8000";
+
 const api = axios.create({
-  baseURL: "http://localhost:8000",
+  baseURL: API_BASE_URL,
   timeout: 30000,
   headers: {
     "Content-Type": "application/json",
   },
 });
 
+/**
+ * Scope every backend call to the signed-in user's memory.
+ * The backend keeps one collection per tenant (X-Tenant-Id).
+ */
+export function setTenantId(tenantId: string | null): void {
+  if (tenantId) {
+    api.defaults.headers.common["X-Tenant-Id"] = tenantId;
+  } else {
+    delete api.defaults.headers.common["X-Tenant-Id"];
+  }
+}
+
 // ── Response Types ──────────────────────────────────────
 
 export interface HealthResponse {
@@ -20,11 +34,28 @@ export interface HealthResponse {
 
 export interface UploadResponse {
   status: string;
+  job_id: string;
   filename: string;
-  chunks_processed: number;
   hardware: string;
 }
 
+export type JobStatus = "queued" | "parsing" | "embedding" | "done" | "failed";
+
+export interface JobProgress {
+  job_id: string;
+  filename: string;
+  status: JobStatus;
+  pages_total: number | null;
+  pages_parsed: number;
+  chunks_total: number | null;
+  chunks_queued: number;
+  chunks_embedded: number;
+  chunks_per_sec: number | null;
+  eta_sec: number | null;
+  elapsed_sec: number;
+  error: string | null;
+}
+
 export interface AskResponse {
   answer: string;
   sources: string[];
@@ -52,6 +83,7 @@ export async function checkHealth(): Promise<HealthResponse> {
 
 /**
  * Upload a document file (PDF/TXT) to Vector Memory.
+ * Returns as soon as the backend accepts the file; ingestion runs as a job.
  */
 export async function uploadDocument(file: File): Promise<UploadResponse> {
   const formData = new FormData();
@@ -63,6 +95,38 @@ export async function uploadDocument(file: File): Promise<UploadResponse> {
   return data;
 }
 
+/**
+ * Fetch the current progress of an ingestion job.
+ */
+export async function getJob(jobId: string): Promise<JobProgress> {
+  const { data } = await api.get<JobProgress>(`/jobs/${jobId}`);
+  return data;
+}
+
+/**
+ * Stream ingestion progress over Server-Sent Events.
+ * Returns an unsubscribe function; the stream closes itself when the job ends.
+ */
+export function watchJob(
+  jobId: string,
+  onProgress: (progress: JobProgress) => void,
+  onError?: () => void
+): () => void {
+  const source = new EventSource(`${API_BASE_URL}/jobs/${jobId}/events`);
+  source.addEventListener("progress", (event) => {
+    const progress: JobProgress = JSON.parse((event as MessageEvent).data);
+    onProgress(progress);
+    if (progress.status === "done" || progress.status === "failed") {
+      source.close();
+    }
+  });
+  source.onerror = () => {
+    source.close();
+    onError?.();
+  };
+  return () => source.close();
+}
+
 /**
  * Send a query to the RAG pipeline.
  */